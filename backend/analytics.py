@@ -0,0 +1,415 @@
+import asyncio
+import math
+import re
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+ALL_BUCKET = "all"
+_BUCKET_RE = re.compile(r"^(all|\d{4}-\d{2}|\d{4}-\d{2}-\d{2})$")
+TIERS = ("tier1", "tier2")
+# Compact results (compact_results.py) carry a format marker and need their
+# dictionary to be read, so the pipelines only aggregate full documents
+_FULL_ONLY = {"results.format": {"$exists": False}}
+GENERATION_ID = "generation"
+ROLLUP_META_FIELDS = ("_id", "questionnaire_id", "bucket", "generation")
+
+
+def _key(name: str) -> str:
+    """Tier names become Mongo field names, which may not contain '.' or start with '$'."""
+    return name.replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+
+
+def _unkey(key: str) -> str:
+    return key.replace("%24", "$").replace("%2E", ".").replace("%25", "%")
+
+
+def buckets_for(created_at: str) -> Tuple[str, str, str]:
+    """created_at is an ISO timestamp; rollups exist for all time, its month and its day."""
+    return ALL_BUCKET, created_at[:7], created_at[:10]
+
+
+def validate_bucket(bucket: str) -> str:
+    if not _BUCKET_RE.match(bucket):
+        raise HTTPException(status_code=400, detail="bucket must be 'all', YYYY-MM or YYYY-MM-DD")
+    return bucket
+
+
+def _add_stat(deltas: Dict[str, float], prefix: str, value: Optional[float]):
+    if value is None:
+        return
+    deltas[f"{prefix}.n"] = deltas.get(f"{prefix}.n", 0) + 1
+    deltas[f"{prefix}.sum"] = deltas.get(f"{prefix}.sum", 0.0) + value
+    deltas[f"{prefix}.sumsq"] = deltas.get(f"{prefix}.sumsq", 0.0) + value * value
+
+
+def submission_deltas(results: Dict[str, Any]) -> Dict[str, float]:
+    """Flat counter increments one stored result contributes to its rollups."""
+    deltas: Dict[str, float] = {"count": 1}
+    maturity = results.get("maturity_results") or {}
+    _add_stat(deltas, "score", results.get("score"))
+    _add_stat(deltas, "overall_maturity", maturity.get("overall_maturity"))
+    for tier in TIERS:
+        for node in maturity.get(tier) or []:
+            if not node.get("name"):
+                continue
+            prefix = f"{tier}.{_key(node['name'])}"
+            _add_stat(deltas, f"{prefix}.current", node.get("current_maturity"))
+            _add_stat(deltas, f"{prefix}.gap", node.get("gap"))
+    return deltas
+
+
+def _add(target: Dict[str, float], deltas: Dict[str, float]):
+    for path, value in deltas.items():
+        target[path] = target.get(path, 0) + value
+
+
+def _apply(target: Dict[str, Any], deltas: Dict[str, float]):
+    """Add flat dotted-path increments into a nested dict, like Mongo's $inc."""
+    for path, value in deltas.items():
+        node = target
+        *parents, leaf = path.split(".")
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = node.get(leaf, 0) + value
+
+
+def _merge(target: Dict[str, Any], source: Dict[str, Any]):
+    for key, value in source.items():
+        if isinstance(value, dict):
+            _merge(target.setdefault(key, {}), value)
+        elif isinstance(value, (int, float)):
+            target[key] = target.get(key, 0) + value
+
+
+def _describe(stat: Optional[Dict[str, float]]) -> Dict[str, Any]:
+    n = (stat or {}).get("n", 0)
+    if not n:
+        return {"n": 0, "mean": None, "stddev": None}
+    mean = stat["sum"] / n
+    variance = max(0.0, stat["sumsq"] / n - mean * mean)
+    return {"n": n, "mean": mean, "stddev": math.sqrt(variance)}
+
+
+def summarize_rollup(rollup: Dict[str, Any]) -> Dict[str, Any]:
+    summary: Dict[str, Any] = {
+        "count": rollup.get("count", 0),
+        "score": _describe(rollup.get("score")),
+        "overall_maturity": _describe(rollup.get("overall_maturity")),
+    }
+    for tier in TIERS:
+        summary[tier] = [
+            {
+                "name": _unkey(key),
+                "current_maturity": _describe(node.get("current")),
+                "gap": _describe(node.get("gap")),
+            }
+            for key, node in sorted((rollup.get(tier) or {}).items())
+        ]
+    return summary
+
+
+class TierRollups:
+    """Running count / sum / sum-of-squares per questionnaire, bucket and tier node.
+
+    record() turns a stored submission into flat counter increments and
+    queues them; a background task flushes them with one upsert-$inc per
+    rollup document, so every worker reads the same totals from Mongo.
+    Without a collection the rollups are kept in process memory instead.
+    Reads touch a single rollup document per questionnaire, independent of
+    how many responses are stored.
+
+    Rollup documents carry a rebuild generation, kept in the "generation"
+    document next to them: `generation` is where increments go, `active`
+    is what reads see and `watermark` is the created_at up to which the
+    latest rebuild aggregates. rebuild() takes the watermark, bumps the
+    generation, aggregates responses up to the watermark into it and then
+    makes it active. Each pending increment remembers the generation it
+    was recorded under and its response's created_at; one recorded before
+    the current generation is dropped at flush when its response falls
+    under the watermark, because the rebuild counted it. Everything else
+    goes into the current generation, so nothing is counted by both.
+    """
+
+    def __init__(self, flush_interval: float = 2.0):
+        self.flush_interval = flush_interval
+        self.collection = None
+        # (generation when recorded, created_at, questionnaire id) -> increments
+        self._pending: Dict[Tuple[Optional[int], str, str], Dict[str, float]] = {}
+        self._local: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Latest generation and watermark this process knows of; None before the first read
+        self.generation: Optional[int] = None
+        self._watermark: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.errors = 0
+
+    async def ensure_indexes(self):
+        if self.collection is None:
+            return
+        # Rollups written before generations existed belong to generation 0
+        await self.collection.update_many(
+            {"bucket": {"$exists": True}, "generation": {"$exists": False}}, {"$set": {"generation": 0}}
+        )
+        await self.collection.create_index(
+            [("generation", 1), ("bucket", 1)], name="generation_bucket", background=True
+        )
+        if "bucket" in await self.collection.index_information():
+            await self.collection.drop_index("bucket")
+
+    async def _generations(self) -> Dict[str, Any]:
+        doc = await self.collection.find_one({"_id": GENERATION_ID}) or {}
+        return {
+            "generation": doc.get("generation", 0),
+            "active": doc.get("active", 0),
+            "watermark": doc.get("watermark"),
+        }
+
+    async def _refresh_generation(self):
+        current = await self._generations()
+        self.generation, self._watermark = current["generation"], current["watermark"]
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def record(self, doc: Dict[str, Any]):
+        """Queue the increments for one stored response document."""
+        key = (self.generation, doc.get("created_at") or "", doc.get("questionnaire_id"))
+        _add(self._pending.setdefault(key, {}), submission_deltas(doc.get("results") or {}))
+
+    async def _run(self):
+        if self.collection is not None and self.generation is None:
+            try:
+                await self._refresh_generation()
+            except Exception as e:
+                print(f"Failed to read the analytics rollup generation: {e}")
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        try:
+            if self.collection is not None:
+                await self._refresh_generation()
+            increments = self._increments(batch)
+            if self.collection is None:
+                for key, deltas in increments.items():
+                    _apply(self._local.setdefault(key, {}), deltas)
+            elif increments:
+                await self.collection.bulk_write(_upserts(increments, self.generation), ordered=False)
+            self.flushes += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"Failed to flush analytics rollups: {e}")
+            # Keep the increments for the next attempt
+            for key, deltas in batch.items():
+                _add(self._pending.setdefault(key, {}), deltas)
+
+    def _increments(self, batch) -> Dict[Tuple[str, str], Dict[str, float]]:
+        """Sum pending increments per rollup, leaving out what the latest rebuild counted."""
+        increments: Dict[Tuple[str, str], Dict[str, float]] = {}
+        for (generation, created_at, questionnaire_id), deltas in batch.items():
+            if generation != self.generation and self._watermark is not None and created_at <= self._watermark:
+                continue
+            for bucket in buckets_for(created_at):
+                _add(increments.setdefault((questionnaire_id, bucket), {}), deltas)
+        return increments
+
+    async def _stored(self, questionnaire_id: Optional[str], bucket: str) -> Iterable[Dict[str, Any]]:
+        if self.collection is None:
+            return [
+                rollup
+                for (qid, b), rollup in self._local.items()
+                if b == bucket and (questionnaire_id is None or qid == questionnaire_id)
+            ]
+        active = (await self._generations())["active"]
+        if questionnaire_id is not None:
+            doc = await self.collection.find_one({"_id": _rollup_id(questionnaire_id, bucket, active)})
+            return [doc] if doc else []
+        return await self.collection.find({"generation": active, "bucket": bucket}).to_list(length=None)
+
+    async def query(self, questionnaire_id: Optional[str] = None, bucket: str = ALL_BUCKET) -> Dict[str, Any]:
+        """Stored rollups for one questionnaire (or all of them) plus unflushed increments."""
+        rollup: Dict[str, Any] = {}
+        for doc in await self._stored(questionnaire_id, bucket):
+            _merge(rollup, {k: v for k, v in doc.items() if k not in ROLLUP_META_FIELDS})
+        for (_, created_at, qid), deltas in self._pending.items():
+            if bucket in buckets_for(created_at) and (questionnaire_id is None or qid == questionnaire_id):
+                _apply(rollup, deltas)
+        return {"questionnaire_id": questionnaire_id, "bucket": bucket, **summarize_rollup(rollup)}
+
+    async def rebuild(
+        self,
+        responses_collection,
+        expand_documents: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+    ) -> Dict[str, Any]:
+        """Recompute every rollup from stored responses with aggregation pipelines.
+
+        Compact-format documents are expanded with `expand_documents` and
+        folded in one by one. Only responses created up to the watermark are
+        aggregated; later ones reach the new generation through flush().
+        With Mongo the totals are written into a new generation, which
+        becomes active once complete.
+        """
+        watermark = datetime.utcnow().isoformat()
+        if self.collection is not None:
+            from pymongo import ReturnDocument
+
+            bumped = await self.collection.find_one_and_update(
+                {"_id": GENERATION_ID},
+                {"$inc": {"generation": 1}, "$set": {"watermark": watermark}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            generation = bumped["generation"]
+        else:
+            generation = (self.generation or 0) + 1
+        self.generation, self._watermark = generation, watermark
+        rollups: Dict[Tuple[str, str], Dict[str, float]] = {}
+        async for row in responses_collection.aggregate(_score_pipeline(watermark)):
+            deltas = {"count": row["n"]}
+            for field in ("score", "overall_maturity"):
+                deltas.update({f"{field}.{k}": row[f"{field}_{k}"] for k in ("n", "sum", "sumsq")})
+            for bucket in buckets_for(row["_id"]["day"] or ""):
+                _add(rollups.setdefault((row["_id"]["q"], bucket), {}), deltas)
+        for tier in TIERS:
+            async for row in responses_collection.aggregate(_tier_pipeline(tier, watermark)):
+                if not row["_id"]["name"]:
+                    continue
+                prefix = f"{tier}.{_key(row['_id']['name'])}"
+                deltas = {}
+                for field in ("current", "gap"):
+                    if row[f"{field}_n"]:
+                        deltas.update(
+                            {f"{prefix}.{field}.{k}": row[f"{field}_{k}"] for k in ("n", "sum", "sumsq")}
+                        )
+                for bucket in buckets_for(row["_id"]["day"] or ""):
+                    _add(rollups.setdefault((row["_id"]["q"], bucket), {}), deltas)
+        if expand_documents is not None:
+            compact = responses_collection.find(
+                {"results.format": {"$exists": True}, "created_at": {"$lte": watermark}},
+                {"created_at": 1, "questionnaire_id": 1, "results": 1},
+            )
+            async for doc in compact:
+                await expand_documents([doc])
+                deltas = submission_deltas(doc.get("results") or {})
+                for bucket in buckets_for(doc.get("created_at") or ""):
+                    _add(rollups.setdefault((doc.get("questionnaire_id"), bucket), {}), deltas)
+
+        if self.collection is None:
+            local: Dict[Tuple[str, str], Dict[str, Any]] = {}
+            for key, deltas in rollups.items():
+                _apply(local.setdefault(key, {}), deltas)
+            self._local = local
+            return {"rollups": len(rollups), "generation": generation}
+        # $inc rather than insert: workers that already saw the new generation
+        # may have flushed into the same documents
+        if rollups:
+            await self.collection.bulk_write(_upserts(rollups, generation), ordered=False)
+        # $max: a concurrent rebuild that started later must stay active
+        await self.collection.update_one({"_id": GENERATION_ID}, {"$max": {"active": generation}})
+        active = (await self._generations())["active"]
+        await self.collection.delete_many({"bucket": {"$exists": True}, "generation": {"$lt": active}})
+        return {"rollups": len(rollups), "generation": generation}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "errors": self.errors,
+            "generation": self.generation,
+            "backend": "mongo" if self.collection is not None else "memory",
+        }
+
+
+def _rollup_id(questionnaire_id: str, bucket: str, generation: int) -> str:
+    # Generation 0 keeps the ids rollups had before generations existed
+    if not generation:
+        return f"{questionnaire_id}|{bucket}"
+    return f"{questionnaire_id}|{bucket}|{generation}"
+
+
+def _upserts(batch: Dict[Tuple[str, str], Dict[str, float]], generation: int) -> List[Any]:
+    from pymongo import UpdateOne
+
+    return [
+        UpdateOne(
+            {"_id": _rollup_id(questionnaire_id, bucket, generation)},
+            {
+                "$setOnInsert": {"questionnaire_id": questionnaire_id, "bucket": bucket, "generation": generation},
+                "$inc": deltas,
+            },
+            upsert=True,
+        )
+        for (questionnaire_id, bucket), deltas in batch.items()
+    ]
+
+
+def _stat_group(prefix: str, expr: Any, present: Any) -> Dict[str, Any]:
+    return {
+        f"{prefix}_n": {"$sum": {"$cond": [present, 1, 0]}},
+        f"{prefix}_sum": {"$sum": {"$cond": [present, expr, 0]}},
+        f"{prefix}_sumsq": {"$sum": {"$cond": [present, {"$multiply": [expr, expr]}, 0]}},
+    }
+
+
+def _present(expr: str) -> Dict[str, Any]:
+    """Results store numbers or null; $ifNull also maps missing fields to null."""
+    return {"$ne": [{"$ifNull": [expr, None]}, None]}
+
+
+def _full_until(watermark: str) -> Dict[str, Any]:
+    return {"$match": {**_FULL_ONLY, "created_at": {"$lte": watermark}}}
+
+
+def _score_pipeline(watermark: str) -> List[Dict[str, Any]]:
+    return [
+        _full_until(watermark),
+        {
+            "$group": {
+                "_id": {"q": "$questionnaire_id", "day": {"$substr": ["$created_at", 0, 10]}},
+                "n": {"$sum": 1},
+                **_stat_group("score", "$results.score", _present("$results.score")),
+                **_stat_group(
+                    "overall_maturity",
+                    "$results.maturity_results.overall_maturity",
+                    _present("$results.maturity_results.overall_maturity"),
+                ),
+            }
+        }
+    ]
+
+
+def _tier_pipeline(tier: str, watermark: str) -> List[Dict[str, Any]]:
+    return [
+        _full_until(watermark),
+        {"$project": {
+            "questionnaire_id": 1,
+            "created_at": 1,
+            "node": f"$results.maturity_results.{tier}",
+        }},
+        {"$unwind": "$node"},
+        {
+            "$group": {
+                "_id": {
+                    "q": "$questionnaire_id",
+                    "day": {"$substr": ["$created_at", 0, 10]},
+                    "name": "$node.name",
+                },
+                **_stat_group("current", "$node.current_maturity", _present("$node.current_maturity")),
+                **_stat_group("gap", "$node.gap", _present("$node.gap")),
+            }
+        },
+    ]
@@ -0,0 +1,194 @@
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from scoring import ScoringPlan, _lookup
+
+
+CATEGORY_THRESHOLDS = ((80, "AI Ready"), (60, "Moderately Ready"), (40, "Developing Readiness"))
+
+
+def _row_sums(matrix: np.ndarray) -> np.ndarray:
+    """Left-to-right row sums, matching Python's ``sum()`` / ``+=`` rounding."""
+    if matrix.shape[1] == 0:
+        return np.zeros(matrix.shape[0])
+    return np.cumsum(matrix, axis=1)[:, -1]
+
+
+def build_score_matrices(
+    plan: ScoringPlan, items: Sequence[Tuple[Dict[str, Any], Dict[str, Any]]]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return (scores, answered, target scores) as N x Q arrays.
+
+    Unanswered cells and falsy/unmatched targets are 0.0, mirroring how the
+    per-item path drops them from its sums.
+    """
+    n_questions = len(plan.questions)
+    positions = plan.positions
+    option_scores = [q.scores for q in plan.questions]
+    score_rows: List[List[float]] = []
+    answered_rows: List[List[bool]] = []
+    target_rows: List[List[float]] = []
+    for responses, target_responses in items:
+        scores = [0.0] * n_questions
+        answered = [False] * n_questions
+        targets = [0.0] * n_questions
+        for qid, value in responses.items():
+            for pos in positions.get(qid, ()):
+                answered[pos] = True
+                scores[pos] = _lookup(option_scores[pos], value) or 0.0
+                if target_responses and qid in target_responses:
+                    targets[pos] = (
+                        _lookup(option_scores[pos], target_responses[qid]) or 0.0
+                    )
+        score_rows.append(scores)
+        answered_rows.append(answered)
+        target_rows.append(targets)
+    shape = (len(items), n_questions)
+    return (
+        np.array(score_rows, dtype=float).reshape(shape),
+        np.array(answered_rows, dtype=bool).reshape(shape),
+        np.array(target_rows, dtype=float).reshape(shape),
+    )
+
+
+def _tier_layout(plan: ScoringPlan, cols: Sequence[int]):
+    """Tier ordering for one answered pattern, same rules as score_responses."""
+    tier3_cols: Dict[str, List[int]] = {}
+    tier2_to_tier3: Dict[str, Dict[str, None]] = {}
+    tier1_to_tier2: Dict[str, Dict[str, None]] = {}
+    for pos in cols:
+        q = plan.questions[pos]
+        if q.tier3:
+            tier3_cols.setdefault(q.tier3, []).append(pos)
+        if q.tier1 and q.tier2:
+            tier1_to_tier2.setdefault(q.tier1, {})[q.tier2] = None
+        if q.tier2 and q.tier3:
+            tier2_to_tier3.setdefault(q.tier2, {})[q.tier3] = None
+    tier2_cols = {
+        t2: [pos for t3 in t3s for pos in tier3_cols[t3]]
+        for t2, t3s in tier2_to_tier3.items()
+    }
+    return tier3_cols, tier2_cols, tier1_to_tier2
+
+
+def _maturity(name: str, current: float, target: float) -> Dict[str, Any]:
+    if target != target:  # NaN marks "no target"
+        return {"name": name, "current_maturity": current, "target_maturity": None, "gap": None}
+    return {
+        "name": name,
+        "current_maturity": current,
+        "target_maturity": target,
+        "gap": target - current,
+    }
+
+
+def score_batch(
+    questionnaire_id: str,
+    plan: ScoringPlan,
+    items: Sequence[Tuple[Dict[str, Any], Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """Score many submissions at once.
+
+    Returns one dict per item with ``score``, ``category`` and
+    ``maturity_results`` equal to what score_responses produces for the same
+    input. Rows that answered the same set of questions share one tier
+    layout and are aggregated together with array operations.
+    """
+    n = len(items)
+    if n == 0:
+        return []
+    scores, answered, targets = build_score_matrices(plan, items)
+    weights = np.array([q.weight for q in plan.questions], dtype=float)
+    max_scores = np.array([q.max_weighted_score for q in plan.questions], dtype=float)
+
+    total = _row_sums(scores * weights)
+    max_possible = _row_sums(np.where(answered, max_scores, 0.0))
+    safe_max = np.where(max_possible > 0, max_possible, 1.0)
+    percentage = np.where(max_possible > 0, total / safe_max * 100.0, 0.0)
+    category_idx = np.select(
+        [percentage >= cut for cut, _ in CATEGORY_THRESHOLDS],
+        list(range(len(CATEGORY_THRESHOLDS))),
+        default=len(CATEGORY_THRESHOLDS),
+    )
+    categories = [name for _, name in CATEGORY_THRESHOLDS] + ["Not Ready"]
+
+    results: List[Dict[str, Any]] = [None] * n  # type: ignore[list-item]
+    patterns, inverse = np.unique(answered, axis=0, return_inverse=True)
+    for pattern_idx, pattern in enumerate(patterns):
+        rows = np.flatnonzero(inverse.reshape(-1) == pattern_idx)
+        tier3_cols, tier2_cols, tier1_to_tier2 = _tier_layout(
+            plan, np.flatnonzero(pattern).tolist()
+        )
+        s = scores[rows]
+        t = targets[rows]
+
+        tier2_current: Dict[str, np.ndarray] = {}
+        tier2_target: Dict[str, np.ndarray] = {}
+        for t2, cols in tier2_cols.items():
+            tier2_current[t2] = _row_sums(s[:, cols]) / len(cols)
+            tgt = t[:, cols]
+            count = (tgt != 0).sum(axis=1)
+            fallback = plan.tier2_targets.get(t2)
+            tier2_target[t2] = np.where(
+                count > 0,
+                _row_sums(tgt) / np.maximum(count, 1),
+                np.nan if fallback is None else float(fallback),
+            )
+
+        tier1_current: Dict[str, np.ndarray] = {}
+        tier1_target: Dict[str, np.ndarray] = {}
+        for t1, t2s in tier1_to_tier2.items():
+            members = [t2 for t2 in t2s if t2 in tier2_current]
+            if members:
+                tier1_current[t1] = _row_sums(
+                    np.stack([tier2_current[m] for m in members], axis=1)
+                ) / len(members)
+                tgt = np.stack([tier2_target[m] for m in members], axis=1)
+                present = ~np.isnan(tgt)
+                count = present.sum(axis=1)
+                target_mean = _row_sums(np.where(present, tgt, 0.0)) / np.maximum(count, 1)
+            else:
+                tier1_current[t1] = np.zeros(len(rows))
+                count = np.zeros(len(rows), dtype=int)
+                target_mean = np.zeros(len(rows))
+            fallback = plan.tier1_targets.get(t1)
+            tier1_target[t1] = np.where(
+                count > 0, target_mean, np.nan if fallback is None else float(fallback)
+            )
+
+        all_tier3 = [pos for cols in tier3_cols.values() for pos in cols]
+        overall = (
+            _row_sums(s[:, all_tier3]) / max(1, len(all_tier3))
+            if all_tier3
+            else np.zeros(len(rows))
+        )
+
+        t2_cur = {k: v.tolist() for k, v in tier2_current.items()}
+        t2_tgt = {k: v.tolist() for k, v in tier2_target.items()}
+        t1_cur = {k: v.tolist() for k, v in tier1_current.items()}
+        t1_tgt = {k: v.tolist() for k, v in tier1_target.items()}
+        overall_list = overall.tolist()
+        for j, row in enumerate(rows.tolist()):
+            tier2_results = [_maturity(k, t2_cur[k][j], t2_tgt[k][j]) for k in t2_cur]
+            tier1_results = [_maturity(k, t1_cur[k][j], t1_tgt[k][j]) for k in t1_cur]
+            results[row] = {
+                "questionnaire_id": questionnaire_id,
+                "score": float(percentage[row]),
+                "category": categories[category_idx[row]],
+                "maturity_results": {
+                    "tier1": tier1_results,
+                    "tier2": tier2_results,
+                    "maturity_plot": [
+                        {
+                            "name": item["name"],
+                            "current_maturity": item["current_maturity"],
+                            "target_maturity": item["target_maturity"],
+                        }
+                        for item in tier1_results
+                        if item["target_maturity"] is not None
+                    ],
+                    "overall_maturity": overall_list[j],
+                },
+            }
+    return results
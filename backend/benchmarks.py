@@ -0,0 +1,255 @@
+"""Offline micro-benchmarks for backend hot paths.
+
+Run from the backend directory:
+
+    python benchmarks.py                      # print timings
+    python benchmarks.py --save-baseline      # record benchmarks_baseline.json
+    python benchmarks.py --check              # exit 1 on regressions
+    python benchmarks.py --check --threshold 0.5 --only score_
+
+Timings are best-of-N means in microseconds (names ending in _bytes are
+tracemalloc peaks in bytes), so the baseline is only meaningful on the
+machine that recorded it; re-record it after hardware or interpreter
+changes.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict
+
+import main
+from excel_ingest import load_workbook_cached, parse_workbook
+from http_cache import build_payload
+from result_cache import ResultCache
+
+BASELINE_PATH = Path(__file__).parent / "benchmarks_baseline.json"
+DEFAULT_THRESHOLD = 0.25
+
+
+def _timeit(fn: Callable[[], object], repeat: int = 5, number: int = 2000) -> float:
+    """Best-of-`repeat` mean latency of `fn` in microseconds."""
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1e6
+
+
+def _answers(questionnaire_id: str, fraction: float, seed: int = 42):
+    questions = main.questionnaire_data[questionnaire_id]["questions"]
+    rng = random.Random(seed)
+    answered = questions[: max(1, int(len(questions) * fraction))]
+    responses = {q["id"]: rng.randint(1, 5) for q in answered}
+    targets = {q["id"]: rng.randint(1, 5) for q in answered}
+    return responses, targets
+
+
+def bench_scoring(questionnaire_id: str = "ai_readiness") -> Dict[str, float]:
+    results = {}
+    cache = main.result_cache
+    # Measure real scoring work, then the cost of a repeat submission
+    main.result_cache = ResultCache(max_entries=0)
+    try:
+        for fraction in (0.25, 0.5, 1.0):
+            responses, targets = _answers(questionnaire_id, fraction)
+            results[f"score_{len(responses)}_answers"] = _timeit(
+                lambda: main.calculate_assessment_score(questionnaire_id, responses, targets)
+            )
+        main.result_cache = ResultCache()
+        responses, targets = _answers(questionnaire_id, 1.0)
+        results["score_cached_hit"] = _timeit(
+            lambda: main.calculate_assessment_score(questionnaire_id, responses, targets)
+        )
+    finally:
+        main.result_cache = cache
+    return results
+
+
+def bench_excel_ingest() -> Dict[str, float]:
+    if not main.EXCEL_PATH.exists():
+        return {}
+    excel_path = str(main.EXCEL_PATH)
+    with tempfile.TemporaryDirectory() as tmp:
+        sidecar = Path(tmp) / "excel_cache.json"
+        load_workbook_cached(excel_path, sidecar)
+        return {
+            "excel_parse_workbook": _timeit(lambda: parse_workbook(excel_path), repeat=3, number=1),
+            "excel_sidecar_hit": _timeit(
+                lambda: load_workbook_cached(excel_path, sidecar), repeat=3, number=20
+            ),
+        }
+
+
+def bench_questionnaire_serialization(questionnaire_id: str = "ai_readiness") -> Dict[str, float]:
+    questionnaire = main.questionnaire_data[questionnaire_id]
+    listing = list(main.questionnaire_data.values())
+    return {
+        "questionnaire_json_dumps": _timeit(
+            lambda: json.dumps(questionnaire, ensure_ascii=False), number=200
+        ),
+        "questionnaire_build_payload": _timeit(lambda: build_payload(questionnaire), repeat=3, number=5),
+        "questionnaires_list_build_payload": _timeit(lambda: build_payload(listing), repeat=3, number=5),
+    }
+
+
+def bench_assessment_result(questionnaire_id: str = "ai_readiness") -> Dict[str, float]:
+    responses, targets = _answers(questionnaire_id, 1.0)
+    plan = main.get_scoring_plan(questionnaire_id, main.questionnaire_data[questionnaire_id])
+    raw = main.score_responses(questionnaire_id, plan, responses, targets).to_dict()
+    result = main.AssessmentResult(**raw)
+    return {
+        "assessment_result_construct": _timeit(lambda: main.AssessmentResult(**raw), number=500),
+        "assessment_result_dict": _timeit(lambda: result.dict(), number=500),
+        "assessment_result_json": _timeit(lambda: json.dumps(result.dict()), number=500),
+    }
+
+
+def _peak_bytes(fn: Callable[[], object], repeat: int = 5) -> float:
+    """Smallest tracemalloc peak over `repeat` calls, in bytes."""
+    fn()
+    best = float("inf")
+    tracemalloc.start()
+    try:
+        for _ in range(repeat):
+            tracemalloc.reset_peak()
+            start, _ = tracemalloc.get_traced_memory()
+            fn()
+            best = min(best, tracemalloc.get_traced_memory()[1] - start)
+    finally:
+        tracemalloc.stop()
+    return float(best)
+
+
+def bench_submission_result(questionnaire_id: str = "ai_readiness") -> Dict[str, float]:
+    """Turning one scored submission into a stored document and a response body.
+
+    legacy: AssessmentResult model, .dict() for the stored document and
+    FastAPI's jsonable_encoder + JSON for the response.
+    current: ScoredResult shared by the document and encoded to JSON once.
+    Scoring itself is identical in both and excluded.
+    """
+    import dataclasses
+
+    from fastapi.encoders import jsonable_encoder
+
+    responses, targets = _answers(questionnaire_id, 1.0)
+    plan = main.get_scoring_plan(questionnaire_id, main.questionnaire_data[questionnaire_id])
+    scored = main.score_responses(questionnaire_id, plan, responses, targets)
+    raw = scored.to_dict()
+
+    def legacy():
+        result = main.AssessmentResult(**raw)
+        stored = {"results": result.dict()}
+        body = json.dumps(
+            jsonable_encoder({"message": "ok", "results": result.dict(), "email_sent": True})
+        ).encode("utf-8")
+        return stored, body
+
+    def current():
+        result = dataclasses.replace(scored, _json=None)
+        stored = {"results": result.to_dict()}
+        body = b'{"message":"ok","results":' + result.to_json() + b',"email_sent":true}'
+        return stored, body
+
+    return {
+        "submission_result_legacy": _timeit(legacy, number=200),
+        "submission_result_current": _timeit(current, number=200),
+        "submission_result_legacy_peak_bytes": _peak_bytes(legacy),
+        "submission_result_current_peak_bytes": _peak_bytes(current),
+    }
+
+
+SUITES = (
+    bench_scoring,
+    bench_excel_ingest,
+    bench_questionnaire_serialization,
+    bench_assessment_result,
+    bench_submission_result,
+)
+
+
+def _unit(name: str) -> str:
+    return "B " if name.endswith("_bytes") else "us"
+
+
+def run_all(only: str = "") -> Dict[str, float]:
+    results: Dict[str, float] = {}
+    for suite in SUITES:
+        for name, micros in suite().items():
+            if not only or name.startswith(only):
+                results[name] = micros
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> bool:
+    """Print a comparison table; False when any benchmark regressed past threshold."""
+    ok = True
+    for name, micros in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<40} {micros:12.1f} {_unit(name)}   (no baseline)")
+            continue
+        change = (micros - base) / base if base else 0.0
+        regressed = change > threshold
+        ok = ok and not regressed
+        flag = "REGRESSION" if regressed else ""
+        unit = _unit(name)
+        print(f"{name:<40} {micros:12.1f} {unit}  baseline {base:12.1f} {unit}  {change:+7.1%}  {flag}")
+    return ok
+
+
+def main_cli(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save-baseline", action="store_true", help="write results to the baseline file")
+    parser.add_argument("--check", action="store_true", help="fail when slower than the baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="allowed slowdown as a fraction of the baseline (default %(default)s)",
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--only", default="", help="only run benchmarks whose name starts with this")
+    args = parser.parse_args(argv)
+
+    main.load_questionnaires()
+    results = run_all(args.only)
+
+    if args.save_baseline:
+        payload = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results_us": {name: round(micros, 3) for name, micros in results.items()},
+        }
+        args.baseline.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+        print(f"Saved {len(results)} benchmarks to {args.baseline}")
+
+    if args.check:
+        try:
+            baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["results_us"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Cannot read baseline {args.baseline}: {e}")
+            return 2
+        if not compare(results, baseline, args.threshold):
+            print(f"Benchmarks regressed by more than {args.threshold:.0%}")
+            return 1
+        return 0
+
+    if not args.save_baseline:
+        for name, micros in results.items():
+            print(f"{name:<40} {micros:12.1f} {_unit(name)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
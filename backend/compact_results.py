@@ -0,0 +1,212 @@
+"""Compact, normalized representation of scored results.
+
+A full result repeats every answered question's text, tier names and theme
+in detailed_results, and the tier1/tier2 names again in maturity_results.
+The compact form keeps only per-answer values in parallel arrays and
+points at a dictionary holding those strings for one questionnaire
+version:
+
+    {"format": "compact-1", "questionnaire_id", "score", "category",
+     "dictionary": "<id>", "overall_maturity",
+     "questions": [qid, ...], "responses": [...], "scores": [...],
+     "target_scores": [...],
+     "tier1": {"names": [index into dictionary tier1], "current": [...], "target": [...]},
+     "tier2": {...}}
+
+Derived values (weighted scores, gaps, maturity_plot, recommendations) are
+recomputed by expand_result(), which reproduces the full result exactly.
+Dictionaries are immutable and identified by a hash of their content.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from scoring import RECOMMENDATIONS, ScoringPlan
+
+COMPACT_FORMAT = "compact-1"
+RESULT_FORMATS = ("full", "compact")
+
+
+def is_compact(results: Any) -> bool:
+    return isinstance(results, dict) and results.get("format") == COMPACT_FORMAT
+
+
+def build_dictionary(questionnaire_id: str, plan: ScoringPlan) -> Dict[str, Any]:
+    questions: Dict[str, List[Any]] = {}
+    tier1: Dict[str, None] = {}
+    tier2: Dict[str, None] = {}
+    for q in plan.questions:
+        # Last definition wins, like detailed_results, which assigns in question order
+        questions[q.qid] = [q.text, q.tier1, q.tier2, q.tier3, q.theme, q.weight]
+        if q.tier1:
+            tier1[q.tier1] = None
+        if q.tier2:
+            tier2[q.tier2] = None
+    content = {
+        "questionnaire_id": questionnaire_id,
+        "questions": questions,
+        "tier1": list(tier1),
+        "tier2": list(tier2),
+    }
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:24]
+    return {"id": digest, **content}
+
+
+# Plan version -> dictionary. Versions only grow and a plan is replaced whenever
+# its questionnaire changes, so evicting the oldest entries drops retired plans first
+_by_plan: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+_BY_PLAN_MAX = 256
+
+
+def dictionary_for(questionnaire_id: str, plan: ScoringPlan) -> Dict[str, Any]:
+    """The dictionary for a compiled plan, built once per plan version."""
+    dictionary = _by_plan.get(plan.version)
+    if dictionary is None:
+        dictionary = _by_plan[plan.version] = build_dictionary(questionnaire_id, plan)
+        while len(_by_plan) > _BY_PLAN_MAX:
+            _by_plan.popitem(last=False)
+    return dictionary
+
+
+def _tier_index(dictionary: Dict[str, Any], tier: str) -> Dict[str, int]:
+    index = dictionary.get(f"_{tier}_index")
+    if index is None:
+        index = dictionary[f"_{tier}_index"] = {name: i for i, name in enumerate(dictionary[tier])}
+    return index
+
+
+def compact_result(result: Dict[str, Any], dictionary: Dict[str, Any]) -> Dict[str, Any]:
+    detailed = result.get("detailed_results") or {}
+    maturity = result.get("maturity_results") or {}
+    compact: Dict[str, Any] = {
+        "format": COMPACT_FORMAT,
+        "questionnaire_id": result["questionnaire_id"],
+        "score": result["score"],
+        "category": result["category"],
+        "dictionary": dictionary["id"],
+        "overall_maturity": maturity.get("overall_maturity"),
+        "questions": list(detailed),
+        "responses": [d["response"] for d in detailed.values()],
+        "scores": [d["score"] for d in detailed.values()],
+        "target_scores": [d["target_score"] for d in detailed.values()],
+    }
+    for tier in ("tier1", "tier2"):
+        index = _tier_index(dictionary, tier)
+        nodes = maturity.get(tier) or []
+        compact[tier] = {
+            "names": [index[n["name"]] for n in nodes],
+            "current": [n["current_maturity"] for n in nodes],
+            "target": [n["target_maturity"] for n in nodes],
+        }
+    if result.get("percentiles") is not None:
+        compact["percentiles"] = result["percentiles"]
+    return compact
+
+
+def _expand_tier(compact: Dict[str, Any], dictionary: Dict[str, Any], tier: str) -> List[Dict[str, Any]]:
+    data = compact.get(tier) or {}
+    names = dictionary[tier]
+    nodes = []
+    for i, current, target in zip(data.get("names", []), data.get("current", []), data.get("target", [])):
+        nodes.append({
+            "name": names[i],
+            "current_maturity": current,
+            "target_maturity": target,
+            "gap": (target - current) if target is not None else None,
+        })
+    return nodes
+
+
+def expand_result(compact: Dict[str, Any], dictionary: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild the full result; parts missing from a projected document come back empty."""
+    questions = dictionary["questions"]
+    detailed_results: Dict[str, Any] = {}
+    for qid, response, score, target in zip(
+        compact.get("questions", []),
+        compact.get("responses", []),
+        compact.get("scores", []),
+        compact.get("target_scores", []),
+    ):
+        text, tier1, tier2, tier3, theme, weight = questions[qid]
+        detailed_results[qid] = {
+            "question": text,
+            "response": response,
+            "score": score,
+            "weighted_score": score * weight,
+            "tier1": tier1,
+            "tier2": tier2,
+            "tier3": tier3,
+            "theme": theme,
+            "target_score": target,
+        }
+    tier1_results = _expand_tier(compact, dictionary, "tier1")
+    category = compact.get("category")
+    expanded = {
+        "questionnaire_id": compact.get("questionnaire_id"),
+        "score": compact.get("score"),
+        "category": category,
+        "recommendations": list(RECOMMENDATIONS.get(category, [])),
+        "detailed_results": detailed_results,
+        "maturity_results": {
+            "tier1": tier1_results,
+            "tier2": _expand_tier(compact, dictionary, "tier2"),
+            "maturity_plot": [
+                {
+                    "name": item["name"],
+                    "current_maturity": item["current_maturity"],
+                    "target_maturity": item["target_maturity"],
+                }
+                for item in tier1_results
+                if item["name"] and item["target_maturity"] is not None
+            ],
+            "overall_maturity": compact.get("overall_maturity"),
+        },
+    }
+    if compact.get("percentiles") is not None:
+        expanded["percentiles"] = compact["percentiles"]
+    return expanded
+
+
+def public_dictionary(dictionary: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in dictionary.items() if not k.startswith("_")}
+
+
+class DictionaryStore:
+    """Known dictionaries in memory, persisted once each to Mongo when available."""
+
+    def __init__(self):
+        self.collection = None
+        self._known: Dict[str, Dict[str, Any]] = {}
+        self._persisted: set = set()
+
+    async def remember(self, dictionary: Dict[str, Any]):
+        self._known.setdefault(dictionary["id"], dictionary)
+        if self.collection is None or dictionary["id"] in self._persisted:
+            return
+        doc = public_dictionary(dictionary)
+        doc["_id"] = doc.pop("id")
+        await self.collection.update_one({"_id": doc["_id"]}, {"$setOnInsert": doc}, upsert=True)
+        self._persisted.add(dictionary["id"])
+
+    async def get(self, dictionary_id: str) -> Optional[Dict[str, Any]]:
+        dictionary = self._known.get(dictionary_id)
+        if dictionary is None and self.collection is not None:
+            doc = await self.collection.find_one({"_id": dictionary_id})
+            if doc is not None:
+                doc["id"] = doc.pop("_id")
+                dictionary = self._known[dictionary_id] = doc
+                self._persisted.add(dictionary_id)
+        return dictionary
+
+    async def expand_documents(self, docs: Iterable[Dict[str, Any]]):
+        """Replace compact `results` in stored documents with the full form, in place."""
+        for doc in docs:
+            results = doc.get("results")
+            if not is_compact(results):
+                continue
+            dictionary = await self.get(results.get("dictionary"))
+            if dictionary is None:
+                continue  # leave it compact rather than guess
+            doc["results"] = expand_result(results, dictionary)
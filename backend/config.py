@@ -7,6 +7,45 @@ class Settings(BaseSettings):
     SMTP_PORT: int = 587
     SMTP_USER: str = ""
     SMTP_PASSWORD: str = ""
+    SMTP_USE_TLS: bool = True
+    SMTP_POOL_SIZE: int = 2
+    EMAIL_QUEUE_SIZE: int = 1000
+    EMAIL_MAX_RETRIES: int = 3
+    EMAIL_RETRY_BACKOFF: float = 2.0
+    # Submissions are inserted in batches of up to this size, at least this often
+    SUBMISSION_BATCH_SIZE: int = 100
+    SUBMISSION_FLUSH_SECONDS: float = 0.5
+    SUBMISSION_BUFFER_MAX: int = 5000
+    # "full" or "compact" (see compact_results.py) for stored response documents
+    RESULT_STORAGE_FORMAT: str = "full"
+    RESULT_CACHE_SIZE: int = 1024
+    RESULT_CACHE_TTL_SECONDS: float = 300.0
+    # Historical questionnaire snapshots kept in memory
+    QUESTIONNAIRE_SNAPSHOT_CACHE_SIZE: int = 64
+    # Unsubmitted drafts expire this long after their last change
+    DRAFT_TTL_SECONDS: float = 7 * 86400
+    DRAFT_CACHE_SIZE: int = 10000
+    # Live preview applies a client's answers once they pause this long (or after the max delay)
+    LIVE_PREVIEW_DEBOUNCE_SECONDS: float = 0.15
+    LIVE_PREVIEW_MAX_DELAY_SECONDS: float = 1.0
+    # Process pool size for admin jobs, and how many jobs may run at once
+    JOB_WORKERS: int = 2
+    JOB_MAX_CONCURRENT: int = 2
+    WORKBOOK_UPLOAD_MAX_BYTES: int = 20 * 1024 * 1024
+    # Responses read, rescored and written back per checkpointed step of a rescore job
+    RESCORE_BATCH_SIZE: int = 1000
+    EXPORT_BATCH_SIZE: int = 1000
+    ANALYTICS_FLUSH_SECONDS: float = 2.0
+    # Percentile sketches: values kept per sketch (rank error ~1.7/k), how often
+    # each worker merges its new submissions into Mongo, and the population
+    # a questionnaire needs before results carry percentiles
+    PERCENTILE_SKETCH_SIZE: int = 200
+    PERCENTILE_FLUSH_SECONDS: float = 30.0
+    PERCENTILE_MIN_POPULATION: int = 10
+    QUESTIONNAIRE_CACHE_MAX_AGE: int = 60
+    STARTUP_BUDGET_SECONDS: float = 2.0
+    # How often each worker checks the shared questionnaire version (0 disables)
+    REGISTRY_POLL_SECONDS: float = 1.0
     SECRET_KEY: str = "change-me"
     DEBUG: bool = True
     MONGO_URL: str = ""
@@ -0,0 +1,333 @@
+import secrets
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+from scoring import ScoringPlan, _lookup, categorize
+
+
+def _key(qid: str) -> str:
+    """Question ids become Mongo field names, which may not contain '.' or start with '$'."""
+    return qid.replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+
+
+def _unkey(key: str) -> str:
+    return key.replace("%24", "$").replace("%2E", ".").replace("%25", "%")
+
+
+class DraftScore:
+    """Running per-tier sums for a partially answered questionnaire.
+
+    set_answer/set_target take back the question's previous contribution
+    and add the new one, touching only that question's tier nodes, so an
+    answer delta costs O(1) however many questions are answered. summary()
+    follows the same rules as score_responses; only the order of tier
+    nodes comes from the questionnaire instead of from the answers.
+    """
+
+    def __init__(self, plan: ScoringPlan):
+        self.plan = plan
+        self.responses: Dict[str, Any] = {}
+        self.targets: Dict[str, Any] = {}
+        self.total = 0.0
+        self.max_total = 0.0
+        # tier3 -> [score sum, score count, target sum, target count]
+        self.tier3: Dict[str, list] = {}
+        # Reference counts of tier links made by answered questions
+        self.tier2_links: Dict[str, Dict[str, int]] = {}
+        self.tier1_links: Dict[str, Dict[str, int]] = {}
+        self.all_tier3 = [0.0, 0]
+        self._summary: Optional[Dict[str, Any]] = None
+        self._by_qid: Dict[str, list] = {}
+        self._order: Dict[Tuple[str, str], int] = {}
+        for pos, q in enumerate(plan.questions):
+            self._by_qid.setdefault(q.qid, []).append(q)
+            for tier in ("tier1", "tier2"):
+                name = getattr(q, tier)
+                if name:
+                    self._order.setdefault((tier, name), pos)
+
+    @staticmethod
+    def _link(links: Dict[str, Dict[str, int]], parent: str, child: str, sign: int):
+        children = links.setdefault(parent, {})
+        count = children.get(child, 0) + sign
+        if count:
+            children[child] = count
+        else:
+            children.pop(child, None)
+            if not children:
+                links.pop(parent, None)
+
+    def _apply(self, qid: str, sign: int):
+        if qid not in self.responses:
+            return
+        value = self.responses[qid]
+        for q in self._by_qid.get(qid, ()):
+            score = _lookup(q.scores, value) or 0.0
+            self.total += sign * score * q.weight
+            self.max_total += sign * q.max_weighted_score
+            target = _lookup(q.scores, self.targets[qid]) if qid in self.targets else None
+            if q.tier3:
+                stat = self.tier3.setdefault(q.tier3, [0.0, 0, 0.0, 0])
+                stat[0] += sign * score
+                stat[1] += sign
+                self.all_tier3[0] += sign * score
+                self.all_tier3[1] += sign
+                if target:
+                    stat[2] += sign * target
+                    stat[3] += sign
+                if not stat[1] and not stat[3]:
+                    del self.tier3[q.tier3]
+            if q.tier1 and q.tier2:
+                self._link(self.tier1_links, q.tier1, q.tier2, sign)
+            if q.tier2 and q.tier3:
+                self._link(self.tier2_links, q.tier2, q.tier3, sign)
+
+    def _set(self, values: Dict[str, Any], qid: str, value: Any):
+        self._summary = None
+        self._apply(qid, -1)
+        if value is None:
+            values.pop(qid, None)
+        else:
+            values[qid] = value
+        self._apply(qid, 1)
+        if not self.responses:
+            # Drop float residue left by adding and taking back the same values
+            self.total = self.max_total = 0.0
+            self.all_tier3 = [0.0, 0]
+
+    def set_answer(self, qid: str, value: Any):
+        """Set (or with None, clear) one response."""
+        self._set(self.responses, qid, value)
+
+    def set_target(self, qid: str, value: Any):
+        self._set(self.targets, qid, value)
+
+    def summary(self, questionnaire_id: str) -> Dict[str, Any]:
+        """Score and tier maturity in O(tier nodes); kept until the next change."""
+        if self._summary is None:
+            self._summary = self._build_summary(questionnaire_id)
+        return self._summary
+
+    def _build_summary(self, questionnaire_id: str) -> Dict[str, Any]:
+        percentage = (self.total / self.max_total * 100.0) if self.max_total > 0 else 0.0
+        category, recommendations = categorize(percentage)
+
+        tier2_results = []
+        tier2_scores: Dict[str, float] = {}
+        tier2_targets: Dict[str, float] = {}
+        for name in sorted(self.tier2_links, key=lambda n: self._order.get(("tier2", n), 0)):
+            total = n = target_total = tn = 0
+            for t3 in self.tier2_links[name]:
+                stat = self.tier3.get(t3)
+                if stat:
+                    total += stat[0]
+                    n += stat[1]
+                    target_total += stat[2]
+                    tn += stat[3]
+            current = total / n if n else 0.0
+            target = target_total / tn if tn else self.plan.tier2_targets.get(name)
+            tier2_results.append(_node(name, current, target))
+            tier2_scores[name] = current
+            if target is not None:
+                tier2_targets[name] = target
+
+        tier1_results = []
+        for name in sorted(self.tier1_links, key=lambda n: self._order.get(("tier1", n), 0)):
+            children = self.tier1_links[name]
+            currents = [tier2_scores[c] for c in children if c in tier2_scores]
+            targets = [tier2_targets[c] for c in children if c in tier2_targets]
+            current = sum(currents) / len(currents) if currents else 0.0
+            target = sum(targets) / len(targets) if targets else self.plan.tier1_targets.get(name)
+            tier1_results.append(_node(name, current, target))
+
+        total, count = self.all_tier3
+        return {
+            "questionnaire_id": questionnaire_id,
+            "answered": len(self.responses),
+            "score": percentage,
+            "category": category,
+            "recommendations": recommendations,
+            "maturity_results": {
+                "tier1": tier1_results,
+                "tier2": tier2_results,
+                "maturity_plot": [
+                    {k: item[k] for k in ("name", "current_maturity", "target_maturity")}
+                    for item in tier1_results
+                    if item["name"] and item["target_maturity"] is not None
+                ],
+                "overall_maturity": total / count if count else 0.0,
+            },
+        }
+
+
+def _node(name: str, current: float, target: Optional[float]) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "current_maturity": current,
+        "target_maturity": target,
+        "gap": (target - current) if target is not None else None,
+    }
+
+
+class Draft:
+    __slots__ = ("id", "questionnaire_id", "rev", "state", "touched")
+
+    def __init__(self, draft_id: str, questionnaire_id: str, rev: int, state: DraftScore):
+        self.id = draft_id
+        self.questionnaire_id = questionnaire_id
+        self.rev = rev
+        self.state = state
+        self.touched = time.monotonic()
+
+
+class DraftStore:
+    """Draft sessions: answers persisted in Mongo when available, scores cached.
+
+    Each worker keeps a bounded LRU of Draft objects with their running
+    scores. Every change bumps the stored revision; when the revision that
+    comes back is exactly one past the cached one the delta is applied in
+    place, otherwise (another worker changed the draft) the cached state is
+    rebuilt from the stored answers.
+    """
+
+    def __init__(self, ttl: float = 7 * 86400, max_cached: int = 10000):
+        self.ttl = ttl
+        self.max_cached = max_cached
+        self.collection = None
+        self._cache: "OrderedDict[str, Draft]" = OrderedDict()
+
+    async def ensure_indexes(self):
+        if self.collection is not None:
+            await self.collection.create_index("expires_at", name="expires_at", expireAfterSeconds=0)
+
+    def _expires_at(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=self.ttl)
+
+    def _remember(self, draft: Draft) -> Draft:
+        draft.touched = time.monotonic()
+        self._cache[draft.id] = draft
+        self._cache.move_to_end(draft.id)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return draft
+
+    @staticmethod
+    def _build(plan: ScoringPlan, responses: Dict[str, Any], targets: Dict[str, Any]) -> DraftScore:
+        state = DraftScore(plan)
+        for qid, value in targets.items():
+            state.set_target(qid, value)
+        for qid, value in responses.items():
+            state.set_answer(qid, value)
+        return state
+
+    async def create(
+        self,
+        questionnaire_id: str,
+        plan: ScoringPlan,
+        responses: Dict[str, Any],
+        targets: Dict[str, Any],
+    ) -> Draft:
+        draft_id = secrets.token_urlsafe(16)
+        state = self._build(plan, responses, targets)
+        if self.collection is not None:
+            await self.collection.insert_one({
+                "_id": draft_id,
+                "questionnaire_id": questionnaire_id,
+                "responses": {_key(k): v for k, v in state.responses.items()},
+                "target_responses": {_key(k): v for k, v in state.targets.items()},
+                "rev": 0,
+                "created_at": datetime.utcnow().isoformat(),
+                "expires_at": self._expires_at(),
+            })
+        return self._remember(Draft(draft_id, questionnaire_id, 0, state))
+
+    async def get(self, draft_id: str, plan_for, check_rev: bool = True) -> Draft:
+        """Cached draft, reloaded if missing, stale or compiled against an old plan.
+
+        `plan_for(questionnaire_id)` returns the current ScoringPlan.
+        """
+        draft = self._cache.get(draft_id)
+        if draft is not None and time.monotonic() - draft.touched > self.ttl:
+            self._cache.pop(draft_id, None)
+            draft = None
+        if draft is not None and check_rev and self.collection is not None:
+            doc = await self.collection.find_one({"_id": draft_id}, {"rev": 1})
+            if doc is None or doc.get("rev", 0) != draft.rev:
+                self._cache.pop(draft_id, None)
+                draft = None
+        if draft is None:
+            if self.collection is None:
+                raise HTTPException(status_code=404, detail="Draft not found")
+            draft = await self._load(draft_id, plan_for)
+        plan = plan_for(draft.questionnaire_id)
+        if draft.state.plan is not plan:
+            # The questionnaire was edited; rescore the saved answers once
+            draft.state = self._build(plan, draft.state.responses, draft.state.targets)
+        return self._remember(draft)
+
+    async def _load(self, draft_id: str, plan_for) -> Draft:
+        doc = await self.collection.find_one({"_id": draft_id})
+        if doc is None:
+            raise HTTPException(status_code=404, detail="Draft not found")
+        state = self._build(
+            plan_for(doc["questionnaire_id"]),
+            {_unkey(k): v for k, v in (doc.get("responses") or {}).items()},
+            {_unkey(k): v for k, v in (doc.get("target_responses") or {}).items()},
+        )
+        return Draft(draft_id, doc["questionnaire_id"], doc.get("rev", 0), state)
+
+    async def apply(
+        self,
+        draft_id: str,
+        plan_for,
+        responses: Dict[str, Any],
+        targets: Dict[str, Any],
+    ) -> Draft:
+        """Apply answer deltas; a None value clears that answer."""
+        draft = await self.get(draft_id, plan_for, check_rev=False)
+        if self.collection is not None:
+            from pymongo import ReturnDocument
+
+            update: Dict[str, Any] = {"$inc": {"rev": 1}, "$set": {"expires_at": self._expires_at()}}
+            unset: Dict[str, str] = {}
+            for field, values in (("responses", responses), ("target_responses", targets)):
+                for qid, value in values.items():
+                    if value is None:
+                        unset[f"{field}.{_key(qid)}"] = ""
+                    else:
+                        update["$set"][f"{field}.{_key(qid)}"] = value
+            if unset:
+                update["$unset"] = unset
+            doc = await self.collection.find_one_and_update(
+                {"_id": draft_id},
+                update,
+                projection={"rev": 1},
+                return_document=ReturnDocument.AFTER,
+            )
+            if doc is None:
+                self._cache.pop(draft_id, None)
+                raise HTTPException(status_code=404, detail="Draft not found")
+            if doc["rev"] != draft.rev + 1:
+                # Someone else changed it meanwhile; our copy is stale
+                self._cache.pop(draft_id, None)
+                return await self.get(draft_id, plan_for)
+            draft.rev = doc["rev"]
+        else:
+            draft.rev += 1
+        for qid, value in targets.items():
+            draft.state.set_target(qid, value)
+        for qid, value in responses.items():
+            draft.state.set_answer(qid, value)
+        return draft
+
+    async def delete(self, draft_id: str):
+        self._cache.pop(draft_id, None)
+        if self.collection is not None:
+            await self.collection.delete_one({"_id": draft_id})
+
+    def stats(self) -> Dict[str, Any]:
+        return {"cached": len(self._cache), "backend": "mongo" if self.collection is not None else "memory"}
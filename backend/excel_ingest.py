@@ -0,0 +1,228 @@
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+# Bump when the parsed output changes so stale sidecar caches are ignored
+PARSER_VERSION = 1
+ASSESSMENT_SHEET = "Assessment"
+GAPS_SHEET = "Maturity vs. Target Gaps"
+PREVIEW_ROWS = 30
+HEADER_SEARCH_ROWS = 25
+
+FIXED_OPTIONS = [
+    {"value": 1, "text": "Does not exist", "score": 1.0},
+    {"value": 2, "text": "Partially exists", "score": 2.0},
+    {"value": 3, "text": "Fully exists", "score": 3.0},
+    {"value": 4, "text": "Fully exists and optimized", "score": 4.0},
+    {"value": 5, "text": "Fully exists and adaptive", "score": 5.0},
+]
+
+
+def _norm(s) -> str:
+    return re.sub(r"[^a-z0-9]+", "", str(s).lower())
+
+
+def _text(value) -> str:
+    return str(value).strip() if value is not None else ""
+
+
+def _cell(row: Sequence[Any], column: Optional[int]):
+    """1-based column access that tolerates short read-only rows."""
+    if not column or column > len(row):
+        return None
+    return row[column - 1]
+
+
+def _is_header(values: Sequence[str]) -> bool:
+    return any(
+        "tier3" in n and "capability" in n and ("description" in n or "score" in n)
+        for n in (_norm(v) for v in values)
+    )
+
+
+def _present(value) -> bool:
+    return bool(value) and bool(str(value).strip()) and str(value).strip().lower() != "none"
+
+
+def _parse_assessment(rows, questionnaire: Dict[str, Any], debug: Dict[str, Any]):
+    preview: List[List[str]] = debug["preview_first_rows"]
+    header_row_idx = None
+    idx_t1 = idx_t2 = idx_q_desc = idx_q_theme = None
+    current_tier1 = ""
+    current_tier2 = ""
+    seen_tier2_categories = set()
+
+    for r, row in enumerate(rows, start=1):
+        if r <= PREVIEW_ROWS:
+            preview.append([_text(v) for v in row])
+
+        if header_row_idx is None:
+            if r > HEADER_SEARCH_ROWS:
+                if r >= PREVIEW_ROWS:
+                    break
+                continue
+            headers = [_text(v) for v in row]
+            if not _is_header(headers):
+                continue
+            header_row_idx = r
+            norms = [_norm(h) for h in headers]
+            debug.update(header_row_index=r, headers=headers, normalized_headers=norms)
+
+            def find_idx(*preds):
+                for i, n in enumerate(norms, start=1):
+                    if all(p in n for p in preds):
+                        return i
+                return None
+
+            idx_t1 = find_idx("tier1")
+            idx_t2 = find_idx("tier2")
+            # "Tier 3 (the capability to score)" is the question text
+            idx_q_desc = find_idx("tier3", "capability", "score") or find_idx(
+                "tier3thecapabilitytoscore"
+            )
+            # "Tier 3 (capability description)" is the description/theme
+            idx_q_theme = find_idx("tier3", "capability", "description") or find_idx(
+                "tier3capabilitydescription"
+            )
+            continue
+
+        q_text = _cell(row, idx_q_desc)
+        theme = _cell(row, idx_q_theme)
+        t1_val = _cell(row, idx_t1)
+        t2_val = _cell(row, idx_t2)
+
+        # Tier values cascade down until the next non-empty cell; fall back
+        # to column 2 (descriptive Tier 1) when the short name is empty
+        if _present(t1_val):
+            current_tier1 = str(t1_val).strip()
+        elif idx_t1 and _present(_cell(row, 2)):
+            current_tier1 = str(_cell(row, 2)).strip()
+        if _present(t2_val):
+            current_tier2 = str(t2_val).strip()
+
+        if q_text is None or str(q_text).strip() == "":
+            continue
+        # One question per Tier 2 category
+        if current_tier2 in seen_tier2_categories:
+            continue
+        seen_tier2_categories.add(current_tier2)
+
+        questionnaire["questions"].append(
+            {
+                "id": f"q_{r}",
+                "text": str(q_text).strip(),
+                "type": "multiple_choice",
+                "options": FIXED_OPTIONS,
+                "weight": 1.0,
+                "category": str(theme).strip() if theme else None,
+                "tier1": current_tier1,
+                "tier2": current_tier2,
+                "tier3": str(q_text).strip(),
+                "theme": str(theme).strip() if theme else None,
+            }
+        )
+
+
+def _as_target(value) -> Optional[float]:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        target = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if target != target else target
+
+
+def _parse_gaps(rows, targets: Dict[str, Dict[str, float]]):
+    """Best-effort targets; the first row is the header row."""
+    header = next(rows, None)
+    if header is None:
+        return
+    names = [_text(v).lower() for v in header]
+    col_t2 = next((i for i, n in enumerate(names) if n == "tier 2"), None)
+    col_t1 = next((i for i, n in enumerate(names) if n == "tier 1"), None)
+    col_target = next((i for i, n in enumerate(names) if "target" in n), None)
+    if col_target is None or (col_t1 is None and col_t2 is None):
+        return
+    for row in rows:
+        target = _as_target(_cell(row, col_target + 1))
+        if target is None:
+            continue
+        for col, tier in ((col_t2, "tier2"), (col_t1, "tier1")):
+            name = _cell(row, col + 1) if col is not None else None
+            if name is not None:
+                targets[tier][str(name).strip()] = target
+
+
+def parse_workbook(excel_path: str) -> Dict[str, Any]:
+    """Parse Assessment.xlsx in one streaming pass over each sheet.
+
+    Returns {"questionnaire": ..., "debug": ...}; the debug part backs
+    /debug/excel-columns so it never needs to reopen the workbook.
+    """
+    questionnaire: Dict[str, Any] = {
+        "id": "ai_readiness",
+        "title": "AI Readiness Assessment",
+        "description": "Evaluate your organization's readiness for AI implementation",
+        "questions": [],
+        "targets": {"tier2": {}, "tier1": {}},
+    }
+    debug: Dict[str, Any] = {
+        "sheet_found": False,
+        "header_row_index": None,
+        "headers": [],
+        "normalized_headers": [],
+        "preview_first_rows": [],
+    }
+    from openpyxl import load_workbook  # only needed when the sidecar cache misses
+
+    wb = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        if ASSESSMENT_SHEET in wb.sheetnames:
+            debug["sheet_found"] = True
+            ws = wb[ASSESSMENT_SHEET]
+            _parse_assessment(
+                ws.iter_rows(min_row=1, values_only=True), questionnaire, debug
+            )
+        if GAPS_SHEET in wb.sheetnames:
+            _parse_gaps(
+                wb[GAPS_SHEET].iter_rows(values_only=True), questionnaire["targets"]
+            )
+    finally:
+        wb.close()
+    return {"questionnaire": questionnaire, "debug": debug}
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_workbook_cached(excel_path: str, cache_path: Path) -> Dict[str, Any]:
+    """parse_workbook() result, reused from the sidecar while the file hash matches."""
+    sha256 = file_sha256(excel_path)
+    try:
+        with cache_path.open("r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("sha256") == sha256 and cached.get("parser_version") == PARSER_VERSION:
+            return cached["parsed"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    parsed = parse_workbook(excel_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(
+            {"sha256": sha256, "parser_version": PARSER_VERSION, "parsed": parsed},
+            f,
+            ensure_ascii=False,
+        )
+    os.replace(tmp_path, cache_path)
+    return parsed
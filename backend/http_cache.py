@@ -0,0 +1,101 @@
+import gzip
+import hashlib
+import json
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+
+class CachedPayload(NamedTuple):
+    body: bytes
+    gzip: bytes
+    br: Optional[bytes]
+    etag: str
+
+
+def build_payload(content: Any) -> CachedPayload:
+    """Serialize once and keep compressed variants next to the raw bytes."""
+    body = json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+    return CachedPayload(
+        body=body,
+        gzip=gzip.compress(body, compresslevel=9, mtime=0),
+        br=brotli.compress(body, quality=11) if brotli is not None else None,
+        etag='"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+    )
+
+
+class PayloadCache:
+    """Pre-serialized JSON bodies keyed by name; entries live until invalidated."""
+
+    def __init__(self):
+        self._entries: Dict[str, CachedPayload] = {}
+
+    def get(self, key: str, build: Callable[[], Any]) -> CachedPayload:
+        payload = self._entries.get(key)
+        if payload is None:
+            payload = build_payload(build())
+            self._entries[key] = payload
+        return payload
+
+    def invalidate(self, key: Optional[str] = None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+
+def _variant_etag(etag: str, coding: str) -> str:
+    # Strong validators must differ per content-coding
+    return etag if coding == "identity" else f'{etag[:-1]}-{coding}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Any coding of the same version revalidates (weak comparison per RFC 9110)."""
+    if if_none_match.strip() == "*":
+        return True
+    versions = {etag, _variant_etag(etag, "gzip"), _variant_etag(etag, "br")}
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return any(tag in versions for tag in candidates)
+
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() == coding:
+            q = params.strip().lower()
+            if not q.startswith("q="):
+                return True
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return True
+    return False
+
+
+def payload_response(request: Request, payload: CachedPayload, max_age: int) -> Response:
+    """Serve a cached payload with ETag/304 handling and the best encoding."""
+    accept_encoding = request.headers.get("accept-encoding", "")
+    if payload.br is not None and _accepts(accept_encoding, "br"):
+        coding, body = "br", payload.br
+    elif _accepts(accept_encoding, "gzip"):
+        coding, body = "gzip", payload.gzip
+    else:
+        coding, body = "identity", payload.body
+    headers = {
+        "ETag": _variant_etag(payload.etag, coding),
+        "Cache-Control": f"public, max-age={max_age}, must-revalidate",
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, payload.etag):
+        return Response(status_code=304, headers=headers)
+    if coding != "identity":
+        headers["Content-Encoding"] = coding
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,67 @@
+"""Functions run in the job process pool (see jobs.py).
+
+They are imported by freshly spawned workers, so this module must stay
+cheap to import and must not import main.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from excel_ingest import load_workbook_cached
+from scoring import ScoringPlan, score_responses
+
+# The vectorized scorer groups rows by answered-question set; with mostly
+# distinct sets per chunk scoring row by row is faster
+VECTORIZE_MIN_ROWS_PER_LAYOUT = 4
+
+# Compiled plans in this worker, keyed by (questionnaire id, parent's plan version)
+_plans: Dict[Tuple[str, int], ScoringPlan] = {}
+
+
+def _plan(questionnaire_id: str, plan_version: int, questionnaire: Dict[str, Any]) -> ScoringPlan:
+    key = (questionnaire_id, plan_version)
+    plan = _plans.get(key)
+    if plan is None:
+        _plans.clear()
+        plan = _plans[key] = ScoringPlan(questionnaire)
+    return plan
+
+
+def parse_excel(excel_path: str, cache_path: str) -> Dict[str, Any]:
+    """Parse the assessment workbook (or reuse its sidecar cache)."""
+    return load_workbook_cached(excel_path, Path(cache_path))
+
+
+def score_chunk(
+    questionnaire_id: str,
+    plan_version: int,
+    questionnaire: Dict[str, Any],
+    items: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """score/category/maturity_results per item, as POST /score/batch returns them."""
+    plan = _plan(questionnaire_id, plan_version, questionnaire)
+    layouts = {frozenset(responses) for responses, _ in items}
+    if len(items) >= VECTORIZE_MIN_ROWS_PER_LAYOUT * len(layouts):
+        from batch_scoring import score_batch  # numpy
+
+        return score_batch(questionnaire_id, plan, items)
+    results = []
+    for responses, targets in items:
+        result = score_responses(questionnaire_id, plan, responses, targets)
+        results.append({
+            "questionnaire_id": questionnaire_id,
+            "score": result.score,
+            "category": result.category,
+            "maturity_results": result.maturity_results,
+        })
+    return results
+
+
+def rescore_chunk(
+    questionnaire_id: str,
+    plan_version: int,
+    questionnaire: Dict[str, Any],
+    items: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """Full results per item, as /submit-assessment stores them."""
+    plan = _plan(questionnaire_id, plan_version, questionnaire)
+    return [score_responses(questionnaire_id, plan, responses, targets).to_dict() for responses, targets in items]
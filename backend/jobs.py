@@ -0,0 +1,375 @@
+"""Background jobs for CPU-heavy admin work.
+
+A job kind is a coroutine handler(ctx, params) registered on the runner.
+Handlers stay on the event loop for I/O and hand CPU-bound pieces to a
+process pool with `await ctx.run(fn, *args)`, reporting progress as they
+go. Pool functions must be picklable top-level functions (see
+job_tasks.py); the pool uses the spawn start method so workers never
+inherit the server's event loop, sockets or threads, and it is created
+on first use.
+
+At most `max_concurrent` jobs run at once; the rest wait as "queued".
+Cancelling a job cancels its task: queued pool work is dropped, a piece
+already running in a worker finishes but its result is discarded.
+
+With a collection set, job state is shared by every server process: a job
+runs in the process that accepted it, which writes its status and, on a
+heartbeat, its progress to the job document. Any process can read it or
+request cancellation, which the owner picks up on its next heartbeat.
+Running jobs hold one of `max_concurrent` slots, made exclusive by a
+unique index, so the limit applies across processes. Jobs whose owner
+stops heartbeating are failed and give up their slot. Without a
+collection everything stays in process memory.
+"""
+import asyncio
+import multiprocessing
+import secrets
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+
+JOB_STATES = ("queued", "running", "succeeded", "failed", "cancelled")
+FINISHED = ("succeeded", "failed", "cancelled")
+
+
+class JobError(Exception):
+    """Raised by handlers for expected failures; the message becomes the job error."""
+
+
+class Job:
+    def __init__(self, kind: str, params: Any):
+        self.id = secrets.token_hex(8)
+        self.kind = kind
+        self.params = params
+        self.status = "queued"
+        self.progress: Dict[str, Any] = {"done": 0, "total": None}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.cancel_requested = False
+        self.task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> "Job":
+        """A read-only view of a job stored by any process."""
+        job = cls(doc["kind"], doc.get("params"))
+        job.id = doc["_id"]
+        for field in ("status", "progress", "result", "error", "created_at", "started_at", "finished_at"):
+            setattr(job, field, doc.get(field))
+        job.cancel_requested = doc.get("cancel_requested", False)
+        return job
+
+    def to_doc(self) -> Dict[str, Any]:
+        params = self.params.dict() if isinstance(self.params, BaseModel) else self.params
+        return {
+            "_id": self.id,
+            "params": params,
+            "cancel_requested": self.cancel_requested,
+            "heartbeat_at": time.time(),
+            **{k: v for k, v in self.to_dict().items() if k != "id"},
+        }
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": dict(self.progress),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "cancel_requested": self.cancel_requested,
+        }
+        if include_result:
+            data["result"] = self.result
+        return data
+
+
+class JobContext:
+    """What a handler sees of its job."""
+
+    def __init__(self, runner: "JobRunner", job: Job):
+        self._runner = runner
+        self.job = job
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Run fn(*args) in the process pool."""
+        return await self._runner._run_in_pool(fn, *args)
+
+    def progress(self, done: int, total: Optional[int] = None, **extra):
+        self.job.progress.update(done=done, **extra)
+        if total is not None:
+            self.job.progress["total"] = total
+
+
+Handler = Callable[[JobContext, Any], Awaitable[Any]]
+
+
+class JobRunner:
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_concurrent: int = 2,
+        keep_finished: int = 200,
+        heartbeat_interval: float = 2.0,
+        lease_seconds: float = 30.0,
+    ):
+        self.max_workers = max_workers
+        self.max_concurrent = max_concurrent
+        self.keep_finished = keep_finished
+        self.heartbeat_interval = heartbeat_interval
+        self.lease_seconds = lease_seconds
+        self.collection = None
+        self.handlers: Dict[str, Handler] = {}
+        self.param_models: Dict[str, Optional[Type[BaseModel]]] = {}
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.counters = {
+            "submitted": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "pool_restarts": 0,
+            "expired": 0,
+        }
+
+    async def ensure_indexes(self):
+        if self.collection is None:
+            return
+        # One running job per slot number, across every process
+        await self.collection.create_index(
+            [("slot", 1)], name="running_slot", unique=True, partialFilterExpression={"status": "running"}
+        )
+        await self.collection.create_index([("created_at", -1)], name="created_at", background=True)
+
+    def register(self, kind: str, handler: Handler, params: Optional[Type[BaseModel]] = None):
+        """Add a job kind; its params are validated with the given model at submit time."""
+        self.handlers[kind] = handler
+        self.param_models[kind] = params
+
+    def _pool_executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def _run_in_pool(self, fn: Callable[..., Any], *args) -> Any:
+        pool = self._pool_executor()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); later jobs get a fresh pool
+            if self._pool is pool:
+                self._pool = None
+                self.counters["pool_restarts"] += 1
+                pool.shutdown(wait=False, cancel_futures=True)
+            raise JobError("A job worker process died")
+
+    async def submit(self, kind: str, params: Dict[str, Any]) -> Job:
+        """Queue a job; it starts as soon as a slot is free."""
+        handler = self.handlers.get(kind)
+        if handler is None:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown job kind; expected one of {', '.join(sorted(self.handlers))}"
+            )
+        model = self.param_models.get(kind)
+        if model is not None:
+            try:
+                params = model(**params)
+            except ValidationError as e:
+                raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        job = Job(kind, params)
+        if self.collection is not None:
+            await self.collection.insert_one(job.to_doc())
+        self._jobs[job.id] = job
+        self.counters["submitted"] += 1
+        job.task = asyncio.create_task(self._execute(job, handler))
+        await self._trim()
+        return job
+
+    async def _execute(self, job: Job, handler: Handler):
+        started = None
+        heartbeat = asyncio.create_task(self._heartbeat(job)) if self.collection is not None else None
+        try:
+            async with self._slots:
+                await self._claim_slot(job)
+                started = time.perf_counter()
+                job.result = await handler(JobContext(self, job), job.params)
+            job.status = "succeeded"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except JobError as e:
+            job.status, job.error = "failed", str(e)
+        except Exception as e:
+            job.status, job.error = "failed", f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        finally:
+            job.finished_at = datetime.utcnow().isoformat()
+            if started is not None:
+                job.progress["seconds"] = round(time.perf_counter() - started, 3)
+            self.counters[job.status] += 1
+            if heartbeat is not None:
+                heartbeat.cancel()
+                await self._store_finished(job)
+            job.task = None
+
+    async def _claim_slot(self, job: Job):
+        job.started_at = datetime.utcnow().isoformat()
+        if self.collection is None:
+            job.status = "running"
+            return
+        from pymongo.errors import DuplicateKeyError
+
+        while True:
+            await self._expire_stale()
+            for slot in range(self.max_concurrent):
+                try:
+                    claimed = await self.collection.update_one(
+                        {"_id": job.id, "status": "queued"},
+                        {"$set": {"status": "running", "slot": slot, "started_at": job.started_at}},
+                    )
+                except DuplicateKeyError:
+                    continue
+                if not claimed.matched_count:
+                    raise JobError("The job record was removed or expired while queued")
+                job.status = "running"
+                return
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def _expire_stale(self):
+        """Fail jobs whose process stopped heartbeating, freeing their slots."""
+        expired = await self.collection.update_many(
+            {"status": {"$in": ["queued", "running"]}, "heartbeat_at": {"$lt": time.time() - self.lease_seconds}},
+            {"$set": {
+                "status": "failed",
+                "error": "The server process running this job went away",
+                "finished_at": datetime.utcnow().isoformat(),
+            }},
+        )
+        self.counters["expired"] += expired.modified_count
+
+    async def _heartbeat(self, job: Job):
+        """Publish progress and pick up cancellation requested through another process."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                doc = await self.collection.find_one_and_update(
+                    {"_id": job.id},
+                    {"$set": {"progress": job.progress, "heartbeat_at": time.time()}},
+                    projection={"cancel_requested": 1},
+                )
+            except Exception as e:
+                print(f"Failed to record heartbeat of job {job.id}: {e}")
+                continue
+            if doc and doc.get("cancel_requested") and job.task is not None:
+                job.cancel_requested = True
+                job.task.cancel()
+
+    async def _store_finished(self, job: Job):
+        fields = {k: v for k, v in job.to_dict().items() if k not in ("id", "kind", "created_at")}
+        try:
+            await self.collection.update_one({"_id": job.id}, {"$set": fields})
+        except Exception as e:
+            # Typically a result that is not storable in a document; keep the status at least
+            print(f"Failed to store job {job.id}: {e}")
+            fields.update(result=None, error=job.error or f"Result could not be stored: {e}")
+            try:
+                await self.collection.update_one({"_id": job.id}, {"$set": fields})
+            except Exception as e:
+                print(f"Failed to store job {job.id}: {e}")
+
+    async def _trim(self):
+        finished = [j for j in self._jobs.values() if j.status in FINISHED]
+        for job in finished[: max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job.id]
+        if self.collection is None:
+            return
+        oldest_kept = await (
+            self.collection.find({"status": {"$in": list(FINISHED)}}, {"created_at": 1})
+            .sort("created_at", -1)
+            .skip(max(0, self.keep_finished - 1))
+            .limit(1)
+            .to_list(length=1)
+        )
+        if oldest_kept:
+            await self.collection.delete_many(
+                {"status": {"$in": list(FINISHED)}, "created_at": {"$lt": oldest_kept[0]["created_at"]}}
+            )
+
+    async def get(self, job_id: str) -> Job:
+        job = self._jobs.get(job_id)
+        if job is None and self.collection is not None:
+            doc = await self.collection.find_one({"_id": job_id})
+            if doc is not None:
+                job = Job.from_doc(doc)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+
+    async def list(self):
+        if self.collection is None:
+            return [job.to_dict(include_result=False) for job in reversed(self._jobs.values())]
+        docs = await (
+            self.collection.find({}, {"result": 0, "heartbeat_at": 0})
+            .sort("created_at", -1)
+            .limit(self.keep_finished + self.max_concurrent)
+            .to_list(length=None)
+        )
+        # This process's own jobs have fresher progress than their last heartbeat
+        return [(self._jobs.get(doc["_id"]) or Job.from_doc(doc)).to_dict(include_result=False) for doc in docs]
+
+    async def cancel(self, job_id: str) -> Job:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            if job.task is not None:
+                job.task.cancel()
+            return job
+        if self.collection is not None:
+            from pymongo import ReturnDocument
+
+            doc = await self.collection.find_one_and_update(
+                {"_id": job_id},
+                {"$set": {"cancel_requested": True}},
+                return_document=ReturnDocument.AFTER,
+            )
+            if doc is not None:
+                return Job.from_doc(doc)
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stop(self):
+        tasks = [j.task for j in self._jobs.values() if j.task is not None]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        by_status = {state: 0 for state in JOB_STATES}
+        for job in self._jobs.values():
+            by_status[job.status] += 1
+        return {
+            "max_workers": self.max_workers,
+            "max_concurrent": self.max_concurrent,
+            "pool_started": self._pool is not None,
+            "backend": "mongo" if self.collection is not None else "memory",
+            # Jobs owned by this process
+            "jobs": by_status,
+            **self.counters,
+        }
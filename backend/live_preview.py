@@ -0,0 +1,135 @@
+"""Live score preview for drafts over a WebSocket.
+
+The client sends answer deltas as they are chosen:
+
+    {"responses": {"q_1": 3}, "target_responses": {"q_1": 5}}
+
+and receives the draft's score body (as GET /drafts/{id}/score returns it)
+whenever it changes. Deltas arriving within `debounce` seconds of each other
+are merged (the last value per question wins) and applied as one draft
+update, but never held back longer than `max_delay`. Each connection is a
+single coroutine, and an update costs the changed questions plus one
+summary, so hundreds of idle or typing sessions per worker stay cheap.
+"""
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+
+# Close codes are 4000 + the matching HTTP status (4404 for an unknown draft)
+CLOSE_SUPERSEDED = 4409
+
+
+def _delta(message: Any) -> Dict[str, Dict[str, Any]]:
+    if not isinstance(message, dict):
+        raise ValueError("message must be a JSON object")
+    delta = {}
+    for field in ("responses", "target_responses"):
+        values = message.get(field) or {}
+        if not isinstance(values, dict):
+            raise ValueError(f"{field} must be an object")
+        delta[field] = values
+    return delta
+
+
+class PreviewHub:
+    """Live preview connections of one worker, at most one per draft."""
+
+    def __init__(self, debounce: float = 0.15, max_delay: float = 1.0):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._connections: Dict[str, WebSocket] = {}
+        self.counters = {"connections": 0, "superseded": 0, "messages": 0, "updates": 0, "errors": 0}
+
+    async def serve(
+        self,
+        websocket: WebSocket,
+        draft_id: str,
+        load: Callable[[], Awaitable[Any]],
+        apply: Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[Any]],
+        render: Callable[[Any], Dict[str, Any]],
+    ):
+        """Run one connection until the client goes away.
+
+        load() returns the draft, apply(responses, targets) applies a merged
+        delta and returns the draft, render(draft) builds the pushed body.
+        """
+        await websocket.accept()
+        try:
+            draft = await load()
+        except HTTPException as e:
+            await websocket.close(code=4000 + e.status_code, reason=str(e.detail))
+            return
+
+        previous = self._connections.get(draft_id)
+        self._connections[draft_id] = websocket
+        self.counters["connections"] += 1
+        if previous is not None:
+            # A newer tab or reconnect owns the session now
+            self.counters["superseded"] += 1
+            try:
+                await previous.close(code=CLOSE_SUPERSEDED, reason="Opened elsewhere")
+            except Exception:
+                pass
+
+        try:
+            await self._send(websocket, render(draft))
+            await self._run(websocket, apply, render, draft.rev)
+        except (WebSocketDisconnect, HTTPException):
+            pass
+        finally:
+            if self._connections.get(draft_id) is websocket:
+                del self._connections[draft_id]
+
+    async def _run(self, websocket: WebSocket, apply, render, rev: int):
+        pending: Dict[str, Dict[str, Any]] = {"responses": {}, "target_responses": {}}
+        first = last = None  # monotonic times of the oldest and newest pending delta
+        while True:
+            timeout: Optional[float] = None
+            if first is not None:
+                timeout = max(0.0, min(last + self.debounce, first + self.max_delay) - time.monotonic())
+            try:
+                text = await asyncio.wait_for(websocket.receive_text(), timeout)
+            except WebSocketDisconnect:
+                if first is not None:
+                    # Keep what the client chose just before leaving
+                    await apply(pending["responses"], pending["target_responses"])
+                raise
+            except asyncio.TimeoutError:
+                try:
+                    draft = await apply(pending["responses"], pending["target_responses"])
+                except HTTPException as e:
+                    await websocket.close(code=4000 + e.status_code, reason=str(e.detail))
+                    return
+                pending = {"responses": {}, "target_responses": {}}
+                first = last = None
+                self.counters["updates"] += 1
+                if draft.rev != rev:
+                    rev = draft.rev
+                    await self._send(websocket, render(draft))
+                continue
+
+            self.counters["messages"] += 1
+            try:
+                delta = _delta(json.loads(text))
+            except ValueError as e:
+                self.counters["errors"] += 1
+                await self._send(websocket, {"type": "error", "detail": str(e)})
+                continue
+            if not delta["responses"] and not delta["target_responses"]:
+                continue
+            pending["responses"].update(delta["responses"])
+            pending["target_responses"].update(delta["target_responses"])
+            last = time.monotonic()
+            if first is None:
+                first = last
+
+    @staticmethod
+    async def _send(websocket: WebSocket, body: Dict[str, Any]):
+        body.setdefault("type", "score")
+        await websocket.send_text(json.dumps(body, separators=(",", ":")))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"open": len(self._connections), **self.counters}
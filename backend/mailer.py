@@ -0,0 +1,205 @@
+import asyncio
+import smtplib
+import threading
+import time
+from email.message import Message
+from typing import Any, Callable, Dict, List, Optional, Set
+
+
+class EmailDispatcher:
+    """Bounded queue of outgoing messages drained by a small SMTP worker pool.
+
+    Each worker keeps its own authenticated connection open between messages,
+    so the pool size is also the concurrency limit. Blocking smtplib calls run
+    in worker threads; the event loop only awaits them. Failed sends are
+    retried with exponential backoff before being counted as failed.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str = "",
+        password: str = "",
+        use_tls: bool = True,
+        pool_size: int = 2,
+        queue_size: int = 1000,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        idle_timeout: float = 60.0,
+        timeout: float = 30.0,
+        on_send: Optional[Callable[[float], None]] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.pool_size = max(1, pool_size)
+        self.queue_size = queue_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        # Called with the duration of every successful SMTP send
+        self.on_send = on_send
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._retries: Set[asyncio.Task] = set()
+        self._stopped = False
+        self._counter_lock = threading.Lock()
+        self.counters: Dict[str, float] = {
+            "enqueued": 0,
+            "sent": 0,
+            "failed": 0,
+            "retried": 0,
+            "backoff_seconds_total": 0.0,
+            "connections_opened": 0,
+            "in_flight": 0,
+            "send_seconds_total": 0.0,
+            "send_seconds_max": 0.0,
+        }
+
+    async def start(self):
+        if self._workers:
+            return
+        self._stopped = False
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.pool_size)
+        ]
+
+    async def stop(self, timeout: float = 10.0):
+        """Give queued and retrying messages up to `timeout` seconds, then close."""
+        self._stopped = True
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._drain(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Email dispatcher stopped with {self.queue_depth()} undelivered messages")
+        for task in [*self._workers, *self._retries]:
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._retries, return_exceptions=True)
+        self._workers = []
+        self._retries.clear()
+
+    async def _drain(self):
+        while True:
+            await self._queue.join()
+            if not self._retries:
+                return
+            await asyncio.wait(list(self._retries))
+
+    async def enqueue(self, msg: Message):
+        """Queue a message; waits for space when the queue is full.
+
+        Messages enqueued after stop() are counted as failed, not sent.
+        """
+        if self._stopped:
+            self.counters["failed"] += 1
+            print(f"Email dispatcher is stopped; dropping email to {msg['To']}")
+            return
+        if not self._workers:
+            await self.start()
+        self.counters["enqueued"] += 1
+        await self._queue.put((msg, 0))
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def stats(self) -> Dict[str, Any]:
+        sent = self.counters["sent"]
+        return {
+            **self.counters,
+            "queue_depth": self.queue_depth(),
+            "queue_size": self.queue_size,
+            "pending_retries": len(self._retries),
+            "workers": len(self._workers),
+            "send_seconds_avg": (self.counters["send_seconds_total"] / sent) if sent else 0.0,
+        }
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.user:
+                server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        with self._counter_lock:  # called from worker threads
+            self.counters["connections_opened"] += 1
+        return server
+
+    @staticmethod
+    def _close(server: Optional[smtplib.SMTP]):
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _deliver(self, server: Optional[smtplib.SMTP], last_used: float, msg: Message):
+        """Send on the worker's connection (runs in a thread); returns the connection."""
+        if server is not None and time.monotonic() - last_used > self.idle_timeout:
+            self._close(server)
+            server = None
+        if server is not None:
+            try:
+                server.send_message(msg)
+                return server
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped our idle connection; release it and reconnect
+                self._close(server)
+        server = self._connect()
+        try:
+            server.send_message(msg)
+        except Exception:
+            self._close(server)
+            raise
+        return server
+
+    async def _worker(self):
+        server: Optional[smtplib.SMTP] = None
+        last_used = 0.0
+        try:
+            while True:
+                msg, attempt = await self._queue.get()
+                self.counters["in_flight"] += 1
+                started = time.perf_counter()
+                try:
+                    server = await asyncio.to_thread(self._deliver, server, last_used, msg)
+                    last_used = time.monotonic()
+                    elapsed = time.perf_counter() - started
+                    self.counters["sent"] += 1
+                    self.counters["send_seconds_total"] += elapsed
+                    self.counters["send_seconds_max"] = max(
+                        self.counters["send_seconds_max"], elapsed
+                    )
+                    if self.on_send is not None:
+                        self.on_send(elapsed)
+                except Exception as e:
+                    await asyncio.to_thread(self._close, server)
+                    server = None
+                    if attempt < self.max_retries:
+                        self.counters["retried"] += 1
+                        delay = self.retry_backoff * (2 ** attempt)
+                        self.counters["backoff_seconds_total"] += delay
+                        task = asyncio.create_task(self._retry_later(msg, attempt + 1, delay))
+                        self._retries.add(task)
+                        task.add_done_callback(self._retries.discard)
+                    else:
+                        self.counters["failed"] += 1
+                        print(f"Failed to send email to {msg['To']}: {e}")
+                finally:
+                    self.counters["in_flight"] -= 1
+                    self._queue.task_done()
+        finally:
+            self._close(server)
+
+    async def _retry_later(self, msg: Message, attempt: int, delay: float):
+        await asyncio.sleep(delay)
+        await self._queue.put((msg, attempt))
@@ -1,22 +1,106 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
-from fastapi.responses import JSONResponse, FileResponse
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+from contextlib import asynccontextmanager, contextmanager
+from fastapi import FastAPI, HTTPException, BackgroundTasks, File, Request, UploadFile, WebSocket
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, EmailStr
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+import asyncio
+import dataclasses
 import json
 import os
-import pandas as pd
-import re
+import secrets
 from datetime import datetime
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from pathlib import Path
-from openpyxl import load_workbook
-from motor.motor_asyncio import AsyncIOMotorClient
 
-app = FastAPI(title="AI Navigator Assessment", version="1.0.0")
+from config import settings
+from compact_results import (
+    RESULT_FORMATS,
+    DictionaryStore,
+    compact_result,
+    dictionary_for,
+    public_dictionary,
+)
+from analytics import TierRollups, validate_bucket
+from percentiles import PercentileIndex
+from drafts import DraftStore
+from excel_ingest import load_workbook_cached, parse_workbook
+from live_preview import PreviewHub
+from question_search import QuestionIndex
+from questionnaire_snapshots import QuestionnaireSnapshotStore, questionnaire_hash
+from rescoring import RescoreCheckpoints, rescore_responses
+from questionnaire_diff import carry_over_ids, structural_diff, validate_questionnaire
+from http_cache import PayloadCache, payload_response
+import job_tasks
+from jobs import JobContext, JobError, JobRunner
+from mailer import EmailDispatcher
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry, RequestMetricsMiddleware, timed
+from response_queries import (
+    SORT,
+    SUMMARY_PROJECTION,
+    build_filter,
+    encode_cursor,
+    ensure_indexes,
+    summarize,
+)
+from result_cache import ResultCache, answers_digest
+from response_export import (
+    EXPORT_FORMATS,
+    EXPORT_PROJECTION,
+    export_columns,
+    iter_csv,
+    iter_ndjson,
+    iter_xlsx,
+)
+from storage import QuestionnaireStore
+from submission_buffer import SubmissionBuffer
+from scoring import (
+    ScoredResult,
+    ScoringPlan,
+    get_scoring_plan,
+    install_scoring_plan,
+    install_scoring_plans,
+    invalidate_scoring_plan,
+    score_responses,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load data and open connections after import, so the server binds fast."""
+    with _startup_stage("load_questionnaires"):
+        load_questionnaires()
+    with _startup_stage("init_mongo"):
+        init_mongo()
+        await ensure_response_indexes()
+        if submission_buffer is not None:
+            await submission_buffer.start()
+        await tier_rollups.start()
+        await percentile_index.start()
+    with _startup_stage("start_email_dispatcher"):
+        await email_dispatcher.start()
+    watcher = asyncio.create_task(watch_questionnaire_version())
+    startup_timings["ready_seconds"] = time.perf_counter() - _IMPORT_STARTED
+    yield
+    watcher.cancel()
+    await job_runner.stop()
+    await email_dispatcher.stop()
+    if submission_buffer is not None:
+        await submission_buffer.stop()
+    await tier_rollups.stop()
+    await percentile_index.stop()
+    await asyncio.to_thread(questionnaire_store.stop)
+    if mongo_client is not None:
+        mongo_client.close()
+
+
+app = FastAPI(title="AI Navigator Assessment", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -27,6 +111,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+metrics_registry = Registry()
+http_requests_total = metrics_registry.counter(
+    "ai_navigator_http_requests_total",
+    "HTTP requests by method, route template and status.",
+    ("method", "route", "status"),
+)
+http_request_seconds = metrics_registry.histogram(
+    "ai_navigator_http_request_duration_seconds",
+    "HTTP request latency by method, route template and status.",
+    ("method", "route", "status"),
+)
+submit_stage_seconds = metrics_registry.histogram(
+    "ai_navigator_submit_stage_duration_seconds",
+    "Time spent in assessment submission stages (mongo_insert is per insert_many batch, "
+    "email_dispatch per SMTP send).",
+    ("stage",),
+)
+app.add_middleware(
+    RequestMetricsMiddleware,
+    requests=http_requests_total,
+    latency=http_request_seconds,
+    skip_paths=("/metrics",),
+)
+
 
 class QuestionnaireResponse(BaseModel):
     questionnaire_id: str
@@ -35,6 +143,63 @@ class QuestionnaireResponse(BaseModel):
     user_email: EmailStr
 
 
+class BatchScoreItem(BaseModel):
+    responses: Dict[str, Any]
+    target_responses: Dict[str, Any] = {}
+    user_email: Optional[EmailStr] = None
+
+
+class BatchScoreRequest(BaseModel):
+    questionnaire_id: str
+    items: List[BatchScoreItem]
+    persist: bool = False
+    send_emails: bool = False
+
+
+class JobRequest(BaseModel):
+    kind: str
+    params: Dict[str, Any] = {}
+
+
+class ExcelParseJob(BaseModel):
+    pass
+
+
+class WorkbookReloadJob(BaseModel):
+    questionnaire_id: str
+    path: str
+    dry_run: bool = False
+
+
+class ScoreBatchJob(BaseModel):
+    questionnaire_id: str
+    items: List[BatchScoreItem]
+    chunk_size: int = 500
+
+
+class RescoreJob(BaseModel):
+    questionnaire_id: Optional[str] = None  # all questionnaires when omitted
+    batch_size: Optional[int] = None
+    restart: bool = False  # ignore a saved checkpoint
+    rebuild_analytics: bool = True
+
+
+class DraftCreate(BaseModel):
+    questionnaire_id: str
+    responses: Dict[str, Any] = {}
+    target_responses: Dict[str, Any] = {}
+
+
+class DraftUpdate(BaseModel):
+    # Only the answers that changed; null clears an answer
+    responses: Dict[str, Any] = {}
+    target_responses: Dict[str, Any] = {}
+
+
+class DraftSubmit(BaseModel):
+    user_email: EmailStr
+
+
 class AssessmentResult(BaseModel):
     questionnaire_id: str
     score: float
@@ -42,6 +207,7 @@ class AssessmentResult(BaseModel):
     recommendations: List[str]
     detailed_results: Dict[str, Any]
     maturity_results: Optional[Dict[str, Any]] = None
+    percentiles: Optional[Dict[str, Any]] = None
 
 
 class QuestionOption(BaseModel):
@@ -72,210 +238,109 @@ class Questionnaire(BaseModel):
 
 DATA_DIR = Path(__file__).parent / "data"
 QUESTIONNAIRES_JSON = DATA_DIR / "questionnaires.json"
+QUESTIONNAIRES_DIR = DATA_DIR / "questionnaires"
+SUBMISSION_SPOOL = DATA_DIR / "submission_spool.ndjson"
+WORKBOOK_UPLOADS = DATA_DIR / "uploads"
 
 questionnaire_data: Dict[str, Any] = {}
-mongo_client: Optional[AsyncIOMotorClient] = None
+# Version of the persisted questionnaire set that questionnaire_data reflects
+questionnaire_version = 0
+questionnaire_payloads = PayloadCache()
+# Result dictionaries are immutable, so their payloads are never invalidated
+dictionary_payloads = PayloadCache()
+result_dictionaries = DictionaryStore()
+# Content-addressed questionnaire snapshots that stored responses point at
+questionnaire_snapshots = QuestionnaireSnapshotStore(max_entries=settings.QUESTIONNAIRE_SNAPSHOT_CACHE_SIZE)
+# Snapshot payloads never change, like result dictionaries
+snapshot_payloads = PayloadCache()
+# Question search; follows questionnaire_data through _questionnaires_changed()
+question_index = QuestionIndex()
+# Scored results keyed by (questionnaire id, plan version, answers digest)
+result_cache = ResultCache(
+    max_entries=settings.RESULT_CACHE_SIZE, ttl=settings.RESULT_CACHE_TTL_SECONDS
+)
+questionnaire_store = QuestionnaireStore(QUESTIONNAIRES_DIR, legacy_file=QUESTIONNAIRES_JSON)
+email_dispatcher = EmailDispatcher(
+    host=settings.SMTP_HOST,
+    port=settings.SMTP_PORT,
+    user=settings.SMTP_USER,
+    password=settings.SMTP_PASSWORD,
+    use_tls=settings.SMTP_USE_TLS,
+    pool_size=settings.SMTP_POOL_SIZE,
+    queue_size=settings.EMAIL_QUEUE_SIZE,
+    max_retries=settings.EMAIL_MAX_RETRIES,
+    retry_backoff=settings.EMAIL_RETRY_BACKOFF,
+    on_send=lambda seconds: submit_stage_seconds.observe(seconds, ("email_dispatch",)),
+)
+mongo_client = None  # motor.motor_asyncio.AsyncIOMotorClient once init_mongo() ran
 mongo_db = None
 responses_collection = None
+# Write-behind for submission documents; created by init_mongo()
+submission_buffer: Optional[SubmissionBuffer] = None
+# In-progress assessments with running scores; persisted once init_mongo() ran
+drafts = DraftStore(ttl=settings.DRAFT_TTL_SECONDS, max_cached=settings.DRAFT_CACHE_SIZE)
+live_previews = PreviewHub(
+    debounce=settings.LIVE_PREVIEW_DEBOUNCE_SECONDS, max_delay=settings.LIVE_PREVIEW_MAX_DELAY_SECONDS
+)
+# CPU-heavy admin work in a process pool; kinds are registered below the endpoints
+job_runner = JobRunner(max_workers=settings.JOB_WORKERS, max_concurrent=settings.JOB_MAX_CONCURRENT)
+# Population quantile sketches behind the percentiles in scored results
+percentile_index = PercentileIndex(
+    k=settings.PERCENTILE_SKETCH_SIZE,
+    flush_interval=settings.PERCENTILE_FLUSH_SECONDS,
+    min_population=settings.PERCENTILE_MIN_POPULATION,
+)
+# Where interrupted rescore jobs continue from
+rescore_checkpoints = RescoreCheckpoints()
+rescores_running: set = set()
+# Running tier-maturity aggregates behind /admin/analytics
+tier_rollups = TierRollups(flush_interval=settings.ANALYTICS_FLUSH_SECONDS)
+startup_timings: Dict[str, Any] = {"stages": {}}
+# Duration of the most recent questionnaire load, Excel parse and registry refresh
+questionnaire_load_seconds: Dict[str, float] = {}
+
+
+@contextmanager
+def _startup_stage(name: str):
+    """Record how long a startup step took in startup_timings["stages"]."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings["stages"][name] = time.perf_counter() - started
 
 
 def load_questionnaires_from_json():
     global questionnaire_data
-    if QUESTIONNAIRES_JSON.exists():
-        try:
-            with QUESTIONNAIRES_JSON.open("r", encoding="utf-8") as f:
-                questionnaire_data = json.load(f)
-        except Exception:
-            questionnaire_data = {}
-
+    try:
+        questionnaire_data = questionnaire_store.load_all()
+    except Exception as e:
+        print(f"Failed to load questionnaires: {e}")
+        questionnaire_data = {}
 
 
+EXCEL_PATH = Path(__file__).resolve().parents[1] / "Assessment.xlsx"
+EXCEL_CACHE_JSON = DATA_DIR / "excel_cache.json"
 
 
 def load_excel_data_once():
     global questionnaire_data
     try:
-        excel_path = os.path.join(os.path.dirname(__file__), "..", "Assessment.xlsx")
-        excel_path = os.path.abspath(excel_path)
-        if not os.path.exists(excel_path):
+        if not EXCEL_PATH.exists():
             load_sample_data()
             return
 
-        excel_file = pd.ExcelFile(excel_path)
-        # Use openpyxl for robust header detection on the Assessment sheet
-        wb = load_workbook(excel_path, data_only=True)
-        assessment_ws = wb["Assessment"] if "Assessment" in wb.sheetnames else None
-        gaps_sheet = (
-            pd.read_excel(excel_file, sheet_name="Maturity vs. Target Gaps")
-            if "Maturity vs. Target Gaps" in excel_file.sheet_names
-            else None
-        )
-
-        questionnaire_data = {
-            "ai_readiness": {
-                "id": "ai_readiness",
-                "title": "AI Readiness Assessment",
-                "description": "Evaluate your organization's readiness for AI implementation",
-                "questions": [],
-                "targets": {"tier2": {}, "tier1": {}},
-            }
-        }
-
-        if assessment_ws is not None:
-
-            def _norm(s: str) -> str:
-                return re.sub(r"[^a-z0-9]+", "", str(s).lower())
-
-            header_row_idx = None
-            # Find the header row within the first 25 rows
-            for r in range(1, min(25, assessment_ws.max_row) + 1):
-                values = [
-                    str(c.value).strip() if c.value is not None else ""
-                    for c in assessment_ws[r]
-                ]
-                norms = [_norm(v) for v in values]
-                if any(
-                    "tier3" in n
-                    and "capability" in n
-                    and ("description" in n or "score" in n)
-                    for n in norms
-                ):
-                    header_row_idx = r
-                    break
-
-            if header_row_idx:
-                headers = [
-                    str(c.value).strip() if c.value is not None else ""
-                    for c in assessment_ws[header_row_idx]
-                ]
-                norms = [_norm(h) for h in headers]
-
-                def find_idx(*preds):
-                    for i, n in enumerate(norms, start=1):
-                        if all(p in n for p in preds):
-                            return i
-                    return None
-
-                idx_t1 = find_idx("tier1")
-                idx_t2 = find_idx("tier2")
-                # Column 4 is "Tier 3 (the capability to score)" - this is the question text
-                idx_q_desc = find_idx("tier3", "capability", "score") or find_idx(
-                    "tier3thecapabilitytoscore"
-                )
-                # Column 5 is "Tier 3 (capability description)" - this is the description/theme
-                idx_q_theme = find_idx("tier3", "capability", "description") or find_idx(
-                    "tier3capabilitydescription"
-                )
-
-                fixed_options = [
-                    {"value": 1, "text": "Does not exist", "score": 1.0},
-                    {"value": 2, "text": "Partially exists", "score": 2.0},
-                    {"value": 3, "text": "Fully exists", "score": 3.0},
-                    {"value": 4, "text": "Fully exists and optimized", "score": 4.0},
-                    {"value": 5, "text": "Fully exists and adaptive", "score": 5.0},
-                ]
-
-                # Track current tier values as we iterate through rows
-                current_tier1 = ""
-                current_tier2 = ""
-                seen_tier2_categories = set()  # Track which Tier 2 categories we've already added
-                
-                for r in range(header_row_idx + 1, assessment_ws.max_row + 1):
-                    # Get values from all relevant columns
-                    q_text = (
-                        assessment_ws.cell(row=r, column=idx_q_desc).value
-                        if idx_q_desc
-                        else None
-                    )
-                    theme = (
-                        assessment_ws.cell(row=r, column=idx_q_theme).value
-                        if idx_q_theme
-                        else None
-                    )
-                    t1_val = (
-                        assessment_ws.cell(row=r, column=idx_t1).value
-                        if idx_t1
-                        else None
-                    )
-                    t2_val = (
-                        assessment_ws.cell(row=r, column=idx_t2).value
-                        if idx_t2
-                        else None
-                    )
-                    
-                    # Update current tier values when they change (cascade down)
-                    # Check both Tier 1 columns (short name and descriptive)
-                    if t1_val and str(t1_val).strip() and str(t1_val).strip().lower() != "none":
-                        current_tier1 = str(t1_val).strip()
-                    else:
-                        # Also check column 2 (descriptive Tier 1)
-                        t1_desc_val = (
-                            assessment_ws.cell(row=r, column=2).value
-                            if idx_t1
-                            else None
-                        )
-                        if t1_desc_val and str(t1_desc_val).strip() and str(t1_desc_val).strip().lower() != "none":
-                            current_tier1 = str(t1_desc_val).strip()
-                    
-                    if t2_val and str(t2_val).strip() and str(t2_val).strip().lower() != "none":
-                        current_tier2 = str(t2_val).strip()
-                    
-                    # Only create questions for rows with actual question text (Tier 3)
-                    if q_text is None or str(q_text).strip() == "":
-                        continue
-                    
-                    # Skip if we've already added a question for this Tier 2 category
-                    if current_tier2 in seen_tier2_categories:
-                        continue
-                    
-                    # Mark this Tier 2 category as seen
-                    seen_tier2_categories.add(current_tier2)
-
-                    question = {
-                        "id": f"q_{r}",
-                        "text": str(q_text).strip(),
-                        "type": "multiple_choice",
-                        "options": fixed_options,
-                        "weight": 1.0,
-                        "category": str(theme).strip() if theme else None,
-                        "tier1": current_tier1,
-                        "tier2": current_tier2,
-                        "tier3": str(q_text).strip(),  # Tier 3 is the individual capability/question
-                        "theme": str(theme).strip() if theme else None,
-                    }
-                    questionnaire_data["ai_readiness"]["questions"].append(question)
-
-        # Parse targets (best-effort) from "Maturity vs. Target Gaps"
-        if gaps_sheet is not None:
-            cols = {str(c).strip(): c for c in gaps_sheet.columns}
-            col_t2 = next((c for k, c in cols.items() if k.lower() == "tier 2"), None)
-            col_t1 = next((c for k, c in cols.items() if k.lower() == "tier 1"), None)
-            # Try multiple target column names
-            col_target = next(
-                (c for k, c in cols.items() if "target" in k.lower()),
-                None,
-            )
-            if col_t2 and col_target:
-                for _, row in gaps_sheet.iterrows():
-                    t2 = row.get(col_t2)
-                    target = row.get(col_target)
-                    if pd.notna(t2) and pd.notna(target):
-                        questionnaire_data["ai_readiness"]["targets"]["tier2"][
-                            str(t2).strip()
-                        ] = float(target)
-            if col_t1 and col_target:
-                for _, row in gaps_sheet.iterrows():
-                    t1 = row.get(col_t1)
-                    target = row.get(col_target)
-                    if pd.notna(t1) and pd.notna(target):
-                        questionnaire_data["ai_readiness"]["targets"]["tier1"][
-                            str(t1).strip()
-                        ] = float(target)
+        # One streaming pass per sheet, skipped entirely while the workbook's
+        # SHA-256 matches the sidecar cache
+        started = time.perf_counter()
+        parsed = load_workbook_cached(str(EXCEL_PATH), EXCEL_CACHE_JSON)
+        questionnaire_load_seconds["excel_parse"] = time.perf_counter() - started
+        questionnaire_data = {"ai_readiness": parsed["questionnaire"]}
 
         # Do NOT fallback to sample data; keep as-is so issues can be diagnosed
 
         # Persist parsed questionnaire for future runs
-        save_questionnaires_to_json()
+        questionnaire_store.save_all(questionnaire_data)
         print(f"Successfully loaded {len(questionnaire_data.get('ai_readiness', {}).get('questions', []))} questions")
     except Exception as e:
         # Print the exception for debugging
@@ -286,45 +351,110 @@ def load_excel_data_once():
         pass
 
 
-load_questionnaires_from_json()
-# Check if we have actual questionnaire content, not just an empty dict
-if not questionnaire_data or not questionnaire_data.get("ai_readiness", {}).get("questions"):
-    load_excel_data_once()
-# Init MongoDB if configured
-mongodb_url = os.environ.get("MONGODB_URL")
-mongodb_db = os.environ.get("MONGODB_DB", "ai_navigator")
-responses_collection = None
+def load_questionnaires():
+    global questionnaire_version
+    started = time.perf_counter()
+    questionnaire_version = questionnaire_store.read_version()
+    load_questionnaires_from_json()
+    # Check if we have actual questionnaire content, not just an empty dict
+    if not questionnaire_data or not questionnaire_data.get("ai_readiness", {}).get("questions"):
+        load_excel_data_once()
+    _questionnaires_changed()
+    questionnaire_load_seconds["load"] = time.perf_counter() - started
+
+
+def _load_snapshot():
+    """Read and compile the persisted questionnaires (runs in a worker thread)."""
+    version = questionnaire_store.read_version()
+    data = questionnaire_store.overlay_pending(questionnaire_store.load_all())
+    plans = {}
+    for qid, questionnaire in data.items():
+        try:
+            plans[qid] = ScoringPlan(questionnaire)
+        except Exception as e:
+            print(f"Failed to compile questionnaire {qid}: {e}")
+    return version, data, plans
+
+
+async def refresh_questionnaires() -> bool:
+    """Swap in the persisted questionnaires if another worker changed them."""
+    global questionnaire_data, questionnaire_version
+    if questionnaire_store.read_version() <= questionnaire_version:
+        return False
+    started = time.perf_counter()
+    version, data, plans = await asyncio.to_thread(_load_snapshot)
+    questionnaire_load_seconds["refresh"] = time.perf_counter() - started
+    if version <= questionnaire_version:
+        return False
+    # Single reference swaps: requests already running keep the old objects.
+    # Re-apply local edits made while the snapshot was loading.
+    questionnaire_data = questionnaire_store.overlay_pending(data)
+    questionnaire_version = version
+    _questionnaires_changed()
+    install_scoring_plans(plans)
+    return True
+
+
+async def watch_questionnaire_version():
+    if settings.REGISTRY_POLL_SECONDS <= 0:
+        return
+    while True:
+        await asyncio.sleep(settings.REGISTRY_POLL_SECONDS)
+        try:
+            if await refresh_questionnaires():
+                print(f"Reloaded questionnaires at version {questionnaire_version}")
+        except Exception as e:
+            print(f"Failed to refresh questionnaires: {e}")
+
 
-if mongodb_url:
+def init_mongo():
+    """Create the Mongo client if MONGODB_URL is set (motor is imported lazily)."""
+    global mongo_client, mongo_db, responses_collection, submission_buffer
+    mongodb_url = os.environ.get("MONGODB_URL")
+    mongodb_db = os.environ.get("MONGODB_DB", "ai_navigator")
+    if not mongodb_url:
+        print("No MongoDB URL provided, skipping database connection")
+        return
     try:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
         mongo_client = AsyncIOMotorClient(mongodb_url)
         mongo_db = mongo_client[mongodb_db]
         responses_collection = mongo_db["responses"]
+        submission_buffer = SubmissionBuffer(
+            responses_collection,
+            SUBMISSION_SPOOL,
+            batch_size=settings.SUBMISSION_BATCH_SIZE,
+            flush_interval=settings.SUBMISSION_FLUSH_SECONDS,
+            max_pending=settings.SUBMISSION_BUFFER_MAX,
+            on_flush=lambda size, seconds: submit_stage_seconds.observe(seconds, ("mongo_insert",)),
+        )
+        tier_rollups.collection = mongo_db["analytics_rollups"]
+        result_dictionaries.collection = mongo_db["result_dictionaries"]
+        questionnaire_snapshots.collection = mongo_db["questionnaire_snapshots"]
+        rescore_checkpoints.collection = mongo_db["job_checkpoints"]
+        percentile_index.collection = mongo_db["percentile_sketches"]
+        drafts.collection = mongo_db["drafts"]
+        job_runner.collection = mongo_db["jobs"]
         print(f"Connected to MongoDB: {mongodb_url}")
     except Exception as e:
         print(f"Failed to connect to MongoDB: {e}")
-else:
-    print("No MongoDB URL provided, skipping database connection")
-
-
-def _ensure_data_dir():
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-
 
-def save_questionnaires_to_json():
-    _ensure_data_dir()
-    with QUESTIONNAIRES_JSON.open("w", encoding="utf-8") as f:
-        json.dump(questionnaire_data, f, ensure_ascii=False, indent=2)
 
-
-def _norm(s):
-    return re.sub(r"[^a-z0-9]+", "", str(s).lower())
-
-
-def save_questionnaires_to_json():
-    _ensure_data_dir()
-    with QUESTIONNAIRES_JSON.open("w", encoding="utf-8") as f:
-        json.dump(questionnaire_data, f, ensure_ascii=False, indent=2)
+def _questionnaires_changed(*questionnaire_ids: str):
+    """Drop everything derived from the given questionnaires (all if none given)."""
+    if not questionnaire_ids:
+        invalidate_scoring_plan()
+        questionnaire_payloads.invalidate()
+        result_cache.invalidate()
+        question_index.sync(questionnaire_data)
+        return
+    for qid in questionnaire_ids:
+        invalidate_scoring_plan(qid)
+        result_cache.invalidate(qid)
+        question_index.update(qid, questionnaire_data.get(qid))
+        questionnaire_payloads.invalidate(f"questionnaire:{qid}")
+    questionnaire_payloads.invalidate("questionnaires")
 
 
 def load_sample_data():
@@ -398,272 +528,123 @@ def calculate_assessment_score(
     questionnaire_id: str,
     responses: Dict[str, Any],
     target_responses: Dict[str, Any] = {},
-) -> AssessmentResult:
+) -> ScoredResult:
     questionnaire = questionnaire_data.get(questionnaire_id)
     if not questionnaire:
         raise HTTPException(status_code=404, detail="Questionnaire not found")
 
-    total_score = 0.0
-    max_possible_score = 0.0
-    detailed_results: Dict[str, Any] = {}
-    # Aggregation by tiers - collect Tier 3 (individual question) scores
-    tier3_scores: Dict[str, List[float]] = {}  # tier3 -> [scores]
-    tier2_to_tier3: Dict[str, List[str]] = {}  # tier2 -> [tier3 names]
-    tier1_to_tier2: Dict[str, List[str]] = {}  # tier1 -> [tier2 names]
-    
-    # For target maturity
-    tier3_target_scores: Dict[str, List[float]] = {}
-    tier2_target_scores: Dict[str, List[float]] = {}
-    tier1_target_scores: Dict[str, List[float]] = {}
-
-    for question in questionnaire["questions"]:
-        qid = question["id"]
-        if qid in responses:
-            response_value = responses[qid]
-            question_score = 0.0
-            for option in question["options"]:
-                if option["value"] == response_value:
-                    question_score = float(option["score"])
-                    break
-            weight = float(question.get("weight", 1.0))
-            weighted_score = question_score * weight
-            total_score += weighted_score
-
-            max_question_score = (
-                max([float(opt["score"]) for opt in question["options"]]) * weight
-            )
-            max_possible_score += max_question_score
-
-            # Get target maturity if provided
-            target_score = None
-            if target_responses and qid in target_responses:
-                target_value = target_responses[qid]
-                for option in question["options"]:
-                    if option["value"] == target_value:
-                        target_score = float(option["score"])
-                        break
-
-            detailed_results[qid] = {
-                "question": question["text"],
-                "response": response_value,
-                "score": question_score,
-                "weighted_score": weighted_score,
-                "tier1": question.get("tier1"),
-                "tier2": question.get("tier2"),
-                "tier3": question.get("tier3"),
-                "theme": question.get("theme"),
-                "target_score": target_score,
-            }
-
-            # Collect for tier aggregations (use raw scores 1-5)
-            t1 = question.get("tier1")
-            t2 = question.get("tier2")
-            t3 = question.get("tier3")
-            
-            # Store Tier 3 scores (individual questions)
-            if t3:
-                tier3_scores.setdefault(t3, []).append(question_score)
-                if target_score:
-                    tier3_target_scores.setdefault(t3, []).append(target_score)
-            
-            # Build tier hierarchy mappings
-            if t1 and t2:
-                if t2 not in tier1_to_tier2.get(t1, []):
-                    tier1_to_tier2.setdefault(t1, []).append(t2)
-            if t2 and t3:
-                if t3 not in tier2_to_tier3.get(t2, []):
-                    tier2_to_tier3.setdefault(t2, []).append(t3)
-
-    percentage_score = (
-        (total_score / max_possible_score * 100.0) if max_possible_score > 0 else 0.0
-    )
+    # Option lookups, max scores, weights and targets are compiled once per
+    # questionnaire version; scoring itself only touches answered questions.
+    plan = get_scoring_plan(questionnaire_id, questionnaire)
+    # Repeat submissions (retries, re-submits, demo accounts) skip scoring
+    key = (questionnaire_id, plan.version, answers_digest(responses, target_responses))
+    result = result_cache.get(key)
+    if result is None:
+        result = score_responses(questionnaire_id, plan, responses, target_responses)
+        result_cache.put(key, result)
+    ranks = percentile_index.percentiles(questionnaire_id, result.score, result.maturity_results)
+    if ranks is None:
+        return result
+    # The population moves, so ranks go on a copy rather than the cached result
+    return dataclasses.replace(result, percentiles=ranks, _json=None, email_html=None)
+
+
+def calculate_assessment_scores_batch(
+    questionnaire_id: str,
+    items: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """Score many (responses, target_responses) pairs in one vectorized pass.
 
-    if percentage_score >= 80:
-        category = "AI Ready"
-        recommendations = [
-            "Advanced AI Implementation: Your organization shows strong AI readiness. Focus on scaling existing AI initiatives across departments by identifying high-impact use cases for expansion, establishing cross-functional AI teams, and implementing advanced analytics and machine learning models.",
-            "Innovation Leadership: Position your organization as an AI innovation leader in your industry by developing proprietary AI solutions that differentiate your business, creating partnerships with AI research institutions, and establishing an AI center of excellence.",
-            "Continuous Optimization: Maintain your competitive advantage through continuous AI improvement by implementing AI performance monitoring dashboards, establishing regular AI model retraining schedules, and creating feedback loops for continuous learning and adaptation."
-        ]
-    elif percentage_score >= 60:
-        category = "Moderately Ready"
-        recommendations = [
-            "Strategic AI Planning: Develop a comprehensive AI strategy aligned with business objectives by conducting an AI readiness assessment across all departments, creating a 3-year AI roadmap with clear milestones, and establishing AI governance frameworks and ethical guidelines.",
-            "Skill Development: Invest in AI literacy and technical skills across your organization by implementing AI training programs for all employees, hiring or upskilling data scientists and AI specialists, and creating internal AI communities of practice for knowledge sharing.",
-            "Infrastructure Enhancement: Strengthen your data and technology infrastructure for AI implementation by auditing and upgrading data quality and accessibility systems, implementing cloud-based AI platforms and tools, and establishing robust data security and privacy protocols."
-        ]
-    elif percentage_score >= 40:
-        category = "Developing Readiness"
-        recommendations = [
-            "Foundation Building: Establish the fundamental building blocks for AI adoption by creating a data inventory and quality assessment, implementing basic data management and governance policies, and identifying and prioritizing initial AI use cases with high business impact.",
-            "Leadership Alignment: Secure organizational commitment and resources for AI initiatives by educating senior leadership on AI opportunities and risks, establishing an AI steering committee with executive sponsorship, and allocating dedicated budget and resources for AI projects.",
-            "Pilot Project Implementation: Start with small-scale AI projects to build experience and confidence by selecting low-risk, high-visibility pilot projects, assembling cross-functional teams with clear roles and responsibilities, and establishing success metrics and regular progress reviews."
-        ]
-    else:
-        category = "Not Ready"
-        recommendations = [
-            "Digital Foundation: Build essential digital capabilities before pursuing AI initiatives by implementing basic data collection and storage systems, digitizing key business processes and workflows, and establishing reliable IT infrastructure and cybersecurity measures.",
-            "Organizational Awareness: Create understanding and buy-in for digital transformation and AI by conducting AI awareness workshops for leadership and key stakeholders, developing a clear business case for AI investment, and creating a culture of data-driven decision making.",
-            "Capability Assessment: Understand your current state and requirements for AI readiness by performing a comprehensive digital maturity assessment, identifying skill gaps and training needs across the organization, and benchmarking against industry standards and best practices."
-        ]
+    Each result carries the score, category and maturity_results that
+    calculate_assessment_score would produce for the same answers.
+    """
+    questionnaire = questionnaire_data.get(questionnaire_id)
+    if not questionnaire:
+        raise HTTPException(status_code=404, detail="Questionnaire not found")
+    from batch_scoring import score_batch  # pulls in numpy on first use
 
-    # Build maturity results similar to spreadsheet outputs
-    # First calculate Tier 2 averages from Tier 3 scores
-    tier2_results = []
-    tier2_scores = {}  # For Tier 1 calculation
-    
-    for tier2_name, tier3_list in tier2_to_tier3.items():
-        # Collect all Tier 3 scores for this Tier 2
-        all_tier3_scores = []
-        all_tier3_targets = []
-        
-        for tier3_name in tier3_list:
-            if tier3_name in tier3_scores:
-                all_tier3_scores.extend(tier3_scores[tier3_name])
-            if tier3_name in tier3_target_scores:
-                all_tier3_targets.extend(tier3_target_scores[tier3_name])
-        
-        current = sum(all_tier3_scores) / len(all_tier3_scores) if all_tier3_scores else 0.0
-        target = sum(all_tier3_targets) / len(all_tier3_targets) if all_tier3_targets else None
-        
-        # Use spreadsheet targets as fallback
-        if target is None:
-            target = questionnaire.get("targets", {}).get("tier2", {}).get(tier2_name)
-        
-        gap = (target - current) if (target is not None) else None
-        
-        tier2_results.append({
-            "name": tier2_name,
-            "current_maturity": current,
-            "target_maturity": target,
-            "gap": gap,
-        })
-        
-        # Store for Tier 1 calculation
-        tier2_scores[tier2_name] = current
-        if target is not None:
-            tier2_target_scores[tier2_name] = [target]
-
-    # Then calculate Tier 1 averages from Tier 2 scores
-    tier1_results = []
-    
-    for tier1_name, tier2_list in tier1_to_tier2.items():
-        # Collect all Tier 2 scores for this Tier 1
-        all_tier2_scores = []
-        all_tier2_targets = []
-        
-        for tier2_name in tier2_list:
-            if tier2_name in tier2_scores:
-                all_tier2_scores.append(tier2_scores[tier2_name])
-            if tier2_name in tier2_target_scores and tier2_target_scores[tier2_name]:
-                all_tier2_targets.extend(tier2_target_scores[tier2_name])
-        
-        current = sum(all_tier2_scores) / len(all_tier2_scores) if all_tier2_scores else 0.0
-        target = sum(all_tier2_targets) / len(all_tier2_targets) if all_tier2_targets else None
-        
-        # Use spreadsheet targets as fallback
-        if target is None:
-            target = questionnaire.get("targets", {}).get("tier1", {}).get(tier1_name)
-        
-        gap = (target - current) if (target is not None) else None
-        
-        tier1_results.append({
-            "name": tier1_name,
-            "current_maturity": current,
-            "target_maturity": target,
-            "gap": gap,
-        })
-
-    result = AssessmentResult(
-        questionnaire_id=questionnaire_id,
-        score=percentage_score,
-        category=category,
-        recommendations=recommendations,
-        detailed_results=detailed_results,
-    )
-    # Attach extended maturity details
-    result_dict = result.dict()
-
-    # Create maturity vs target plot data for tier1 sections
-    maturity_plot_data = []
-    for item in tier1_results:
-        if (
-            item["name"]
-            and item["current_maturity"] is not None
-            and item["target_maturity"] is not None
-        ):
-            maturity_plot_data.append(
-                {
-                    "name": item["name"],
-                    "current_maturity": item["current_maturity"],
-                    "target_maturity": item["target_maturity"],
-                }
-            )
+    plan = get_scoring_plan(questionnaire_id, questionnaire)
+    return score_batch(questionnaire_id, plan, items)
 
-    result_dict["maturity_results"] = {
-        "tier1": tier1_results,
-        "tier2": tier2_results,
-        "maturity_plot": maturity_plot_data,
-        "overall_maturity": (
-            (
-                sum([s for scores in tier3_scores.values() for s in scores])
-                / max(1, sum([len(scores) for scores in tier3_scores.values()]))
-            )
-            if tier3_scores
-            else 0.0
-        ),
-    }
-    return AssessmentResult(**result_dict)
 
+async def compact_results_for(questionnaire_id: str, results: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact form of a full result dict; its dictionary is persisted first."""
+    plan = get_scoring_plan(questionnaire_id, questionnaire_data[questionnaire_id])
+    dictionary = dictionary_for(questionnaire_id, plan)
+    await result_dictionaries.remember(dictionary)
+    return compact_result(results, dictionary)
 
-async def send_email(email: str, assessment_result: AssessmentResult):
+
+async def stored_results(questionnaire_id: str, results: Dict[str, Any]) -> Dict[str, Any]:
+    """Results in the RESULT_STORAGE_FORMAT; falls back to full if compacting fails."""
+    if settings.RESULT_STORAGE_FORMAT != "compact":
+        return results
     try:
-        msg = MIMEMultipart()
-        msg["From"] = settings.SMTP_USER
-        msg["To"] = email
-        msg["Subject"] = (
-            f"Your {assessment_result.questionnaire_id.replace('_', ' ').title()} Results"
-        )
+        return await compact_results_for(questionnaire_id, results)
+    except Exception as e:
+        print(f"Failed to compact results, storing full form: {e}")
+        return results
 
-        results_html = "".join(
-            [
-                f"<p><strong>{res['question']}</strong><br>Score: {res['score']} (weighted: {res['weighted_score']:.2f})</p>"
-                for _, res in assessment_result.detailed_results.items()
-            ]
-        )
 
-        html_body = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-            <div style="background-color: #171C8F; color: white; padding: 20px; text-align: center;">
-                <h1>Assessment Results</h1>
-            </div>
-            <div style="padding: 20px;">
-                <h2 style="color: #171C8F;">Your Score: {assessment_result.score:.1f}%</h2>
-                <h3 style="color: #0072CE;">Category: {assessment_result.category}</h3>
-                <h3 style="color: #171C8F;">Recommendations:</h3>
-                <ul>
-                    {''.join([f'<li>{rec}</li>' for rec in assessment_result.recommendations])}
-                </ul>
-                <h3 style="color: #171C8F;">Detailed Results:</h3>
-                <div style="background-color: #f5f5f5; padding: 15px; border-radius: 5px;">
-                    {results_html}
-                </div>
-            </div>
-            <div style="background-color: #f0f0f0; padding: 15px; text-align: center; margin-top: 20px;">
-                <p style="color: #666;">Thank you for using AI Navigator Assessment Tool</p>
-            </div>
-        </body>
-        </html>
-        """
-
-        msg.attach(MIMEText(html_body, "html"))
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(msg)
+async def snapshot_hash(questionnaire_id: str) -> Optional[str]:
+    """Content hash of the live questionnaire, its snapshot stored on first use."""
+    plan = get_scoring_plan(questionnaire_id, questionnaire_data[questionnaire_id])
+    try:
+        return await questionnaire_snapshots.remember(questionnaire_id, plan)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to send email: {e}")
+        # The submission still counts; the snapshot is retried on the next one
+        print(f"Failed to store questionnaire snapshot: {e}")
+        return None
+
+
+def render_results_email(assessment_result: ScoredResult) -> str:
+    results_html = "".join(
+        [
+            f"<p><strong>{res['question']}</strong><br>Score: {res['score']} (weighted: {res['weighted_score']:.2f})</p>"
+            for _, res in assessment_result.detailed_results.items()
+        ]
+    )
+
+    html_body = f"""
+    <html>
+    <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+        <div style="background-color: #171C8F; color: white; padding: 20px; text-align: center;">
+            <h1>Assessment Results</h1>
+        </div>
+        <div style="padding: 20px;">
+            <h2 style="color: #171C8F;">Your Score: {assessment_result.score:.1f}%</h2>
+            <h3 style="color: #0072CE;">Category: {assessment_result.category}</h3>
+            <h3 style="color: #171C8F;">Recommendations:</h3>
+            <ul>
+                {''.join([f'<li>{rec}</li>' for rec in assessment_result.recommendations])}
+            </ul>
+            <h3 style="color: #171C8F;">Detailed Results:</h3>
+            <div style="background-color: #f5f5f5; padding: 15px; border-radius: 5px;">
+                {results_html}
+            </div>
+        </div>
+        <div style="background-color: #f0f0f0; padding: 15px; text-align: center; margin-top: 20px;">
+            <p style="color: #666;">Thank you for using AI Navigator Assessment Tool</p>
+        </div>
+    </body>
+    </html>
+    """
+    return html_body
+
+
+async def send_email(email: str, assessment_result: ScoredResult):
+    """Render the results email and hand it to the SMTP dispatcher queue."""
+    msg = MIMEMultipart()
+    msg["From"] = settings.SMTP_USER
+    msg["To"] = email
+    msg["Subject"] = (
+        f"Your {assessment_result.questionnaire_id.replace('_', ' ').title()} Results"
+    )
+    # The body does not depend on the recipient; repeat results reuse it
+    if assessment_result.email_html is None:
+        assessment_result.email_html = render_results_email(assessment_result)
+    msg.attach(MIMEText(assessment_result.email_html, "html"))
+    await email_dispatcher.enqueue(msg)
 
 
 # Root endpoint removed to allow frontend static files to be served at "/"
@@ -671,86 +652,84 @@ async def send_email(email: str, assessment_result: AssessmentResult):
 
 
 @app.get("/questionnaires")
-async def get_questionnaires():
-    return {
-        "questionnaires": [
-            {
-                "id": qid,
-                "title": data["title"],
-                "description": data["description"],
-            }
-            for qid, data in questionnaire_data.items()
-        ]
-    }
+async def get_questionnaires(request: Request):
+    payload = questionnaire_payloads.get(
+        "questionnaires",
+        lambda: {
+            "questionnaires": [
+                {
+                    "id": qid,
+                    "title": data["title"],
+                    "description": data["description"],
+                }
+                for qid, data in questionnaire_data.items()
+            ]
+        },
+    )
+    return payload_response(request, payload, settings.QUESTIONNAIRE_CACHE_MAX_AGE)
 
 
 @app.get("/questionnaires/{questionnaire_id}")
-async def get_questionnaire(questionnaire_id: str):
+async def get_questionnaire(questionnaire_id: str, request: Request):
     if questionnaire_id not in questionnaire_data:
         raise HTTPException(status_code=404, detail="Questionnaire not found")
-    return questionnaire_data[questionnaire_id]
+    # Serialized (and compressed) once per version; admin edits invalidate it
+    payload = questionnaire_payloads.get(
+        f"questionnaire:{questionnaire_id}",
+        lambda: questionnaire_data[questionnaire_id],
+    )
+    return payload_response(request, payload, settings.QUESTIONNAIRE_CACHE_MAX_AGE)
+
+
+@app.get("/search/questions")
+async def search_questions(
+    q: str = "",
+    questionnaire_id: Optional[str] = None,
+    tier1: Optional[str] = None,
+    tier2: Optional[str] = None,
+    tier3: Optional[str] = None,
+    theme: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+):
+    """Questions across all questionnaires ranked by match on text, theme and tier names.
+
+    Tier and theme filters match whole names, ignoring case and punctuation.
+    """
+    limit = max(1, min(limit, 100))
+    result = question_index.search(
+        q,
+        {
+            "questionnaire_id": questionnaire_id,
+            "tier1": tier1,
+            "tier2": tier2,
+            "tier3": tier3,
+            "theme": theme,
+        },
+        limit=limit,
+        offset=max(0, offset),
+    )
+    return {**result, "limit": limit, "offset": max(0, offset)}
 
 
 @app.get("/debug/excel-columns")
 async def debug_excel_columns():
     """Expose detected headers and a small sample to help troubleshoot parsing."""
+    if not EXCEL_PATH.exists():
+        raise HTTPException(status_code=404, detail="Assessment.xlsx not found")
     try:
-        excel_path = os.path.join(os.path.dirname(__file__), "..", "Assessment.xlsx")
-        excel_path = os.path.abspath(excel_path)
-        if not os.path.exists(excel_path):
-            raise HTTPException(status_code=404, detail="Assessment.xlsx not found")
-
-        wb = load_workbook(excel_path, data_only=True)
-        ws_name = "Assessment"
-        if ws_name not in wb.sheetnames:
-            raise HTTPException(status_code=404, detail=f"Sheet '{ws_name}' not found")
-        ws = wb[ws_name]
-
-        def _norm(s: str) -> str:
-            return re.sub(r"[^a-z0-9]+", "", str(s).lower())
-
-        # Capture the first 30 rows as text for inspection
-        preview_rows = []
-        for r in range(1, min(30, ws.max_row) + 1):
-            row_vals = [
-                str(c.value).strip() if c.value is not None else "" for c in ws[r]
-            ]
-            preview_rows.append(row_vals)
-
-        # Find header row as in parser
-        header_row_idx = None
-        for r in range(1, min(25, ws.max_row) + 1):
-            values = [
-                str(c.value).strip() if c.value is not None else "" for c in ws[r]
-            ]
-            norms = [_norm(v) for v in values]
-            if any(
-                "tier3" in n
-                and "capability" in n
-                and ("description" in n or "score" in n)
-                for n in norms
-            ):
-                header_row_idx = r
-                break
-
-        headers = (
-            [
-                str(c.value).strip() if c.value is not None else ""
-                for c in ws[header_row_idx]
-            ]
-            if header_row_idx
-            else []
-        )
-        norms = [_norm(h) for h in headers] if headers else []
-        return {
-            "excel_path": excel_path,
-            "header_row_index": header_row_idx,
-            "headers": headers,
-            "normalized_headers": norms,
-            "preview_first_rows": preview_rows,
-        }
+        debug = load_workbook_cached(str(EXCEL_PATH), EXCEL_CACHE_JSON)["debug"]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Debug failed: {e}")
+    if not debug["sheet_found"]:
+        raise HTTPException(status_code=404, detail="Sheet 'Assessment' not found")
+    return {
+        "excel_path": str(EXCEL_PATH),
+        "header_row_index": debug["header_row_index"],
+        "headers": debug["headers"],
+        "normalized_headers": debug["normalized_headers"],
+        "preview_first_rows": debug["preview_first_rows"],
+    }
 
 
 def _require_admin(request: Request):
@@ -765,7 +744,8 @@ async def create_questionnaire(q: Questionnaire, request: Request):
     if q.id in questionnaire_data:
         raise HTTPException(status_code=400, detail="Questionnaire ID already exists")
     questionnaire_data[q.id] = q.dict()
-    save_questionnaires_to_json()
+    _questionnaires_changed(q.id)
+    questionnaire_store.schedule_save(q.id, questionnaire_data[q.id])
     return {"message": "Questionnaire created", "id": q.id}
 
 
@@ -779,8 +759,10 @@ async def update_questionnaire(
     if q.id != questionnaire_id:
         # Allow renaming by removing old and inserting new
         questionnaire_data.pop(questionnaire_id)
+        questionnaire_store.schedule_delete(questionnaire_id)
     questionnaire_data[q.id] = q.dict()
-    save_questionnaires_to_json()
+    _questionnaires_changed(questionnaire_id, q.id)
+    questionnaire_store.schedule_save(q.id, questionnaire_data[q.id])
     return {"message": "Questionnaire updated", "id": q.id}
 
 
@@ -790,70 +772,318 @@ async def delete_questionnaire(questionnaire_id: str, request: Request):
     if questionnaire_id not in questionnaire_data:
         raise HTTPException(status_code=404, detail="Questionnaire not found")
     questionnaire_data.pop(questionnaire_id)
-    save_questionnaires_to_json()
+    _questionnaires_changed(questionnaire_id)
+    questionnaire_store.schedule_delete(questionnaire_id)
     return {"message": "Questionnaire deleted", "id": questionnaire_id}
 
 
 @app.post("/submit-assessment")
 async def submit_assessment(
-    response: QuestionnaireResponse, background_tasks: BackgroundTasks
+    response: QuestionnaireResponse, background_tasks: BackgroundTasks, format: str = "full"
 ):
-    assessment_result = calculate_assessment_score(
-        response.questionnaire_id, response.responses, response.target_responses
-    )
+    """Score, store and email an assessment.
+
+    format=compact returns results that reference questions by id; names and
+    texts are served once per questionnaire version at dictionary_url.
+    """
+    if format not in RESULT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(RESULT_FORMATS)}")
+    with timed(submit_stage_seconds, ("scoring",)):
+        assessment_result = calculate_assessment_score(
+            response.questionnaire_id, response.responses, response.target_responses
+        )
     background_tasks.add_task(send_email, response.user_email, assessment_result)
-    # Persist to Mongo if available
-    if responses_collection is not None:
-        try:
-            doc = {
-                "created_at": datetime.utcnow().isoformat(),
-                "questionnaire_id": response.questionnaire_id,
-                "user_email": str(response.user_email),
-                "responses": response.responses,
-                "target_responses": response.target_responses,
-                "results": assessment_result.dict(),
-            }
-            await responses_collection.insert_one(doc)
-        except Exception as e:
-            print(f"Failed to save response: {e}")
+    # Shares the result's containers; the JSON body below is encoded once
+    results = assessment_result.to_dict()
+    doc = {
+        "created_at": datetime.utcnow().isoformat(),
+        "questionnaire_id": response.questionnaire_id,
+        "questionnaire_hash": await snapshot_hash(response.questionnaire_id),
+        "user_email": str(response.user_email),
+        "responses": response.responses,
+        "target_responses": response.target_responses,
+        "results": results,
+    }
+    tier_rollups.record(doc)
+    percentile_index.record(doc)
+    compact = None
+    if format == "compact":
+        compact = await compact_results_for(response.questionnaire_id, results)
+    # Persist to Mongo if available; the buffer batches inserts and spools
+    # to disk while Mongo is unreachable
+    if submission_buffer is not None:
+        if settings.RESULT_STORAGE_FORMAT == "compact":
+            doc["results"] = compact or await stored_results(response.questionnaire_id, results)
+        await submission_buffer.add(doc)
     else:
         print("No responses collection available, skipping persistence")
+    if compact is not None:
+        return {
+            "message": "Assessment submitted successfully",
+            "results": compact,
+            "dictionary_url": f"/result-dictionaries/{compact['dictionary']}",
+            "email_sent": True,
+        }
+    return Response(
+        content=b'{"message":"Assessment submitted successfully","results":'
+        + assessment_result.to_json()
+        + b',"email_sent":true}',
+        media_type="application/json",
+    )
+
+
+def _draft_plan(questionnaire_id: str) -> ScoringPlan:
+    questionnaire = questionnaire_data.get(questionnaire_id)
+    if not questionnaire:
+        raise HTTPException(status_code=404, detail="Questionnaire not found")
+    return get_scoring_plan(questionnaire_id, questionnaire)
+
+
+def _draft_body(draft) -> Dict[str, Any]:
+    return {"id": draft.id, "rev": draft.rev, **draft.state.summary(draft.questionnaire_id)}
+
+
+@app.post("/drafts")
+async def create_draft(body: DraftCreate):
+    """Start an assessment that is answered incrementally and scored as it goes."""
+    draft = await drafts.create(
+        body.questionnaire_id,
+        _draft_plan(body.questionnaire_id),
+        body.responses,
+        body.target_responses,
+    )
+    return _draft_body(draft)
+
+
+@app.get("/drafts/{draft_id}")
+async def get_draft(draft_id: str):
+    draft = await drafts.get(draft_id, _draft_plan)
+    return {
+        "id": draft.id,
+        "rev": draft.rev,
+        "questionnaire_id": draft.questionnaire_id,
+        "responses": draft.state.responses,
+        "target_responses": draft.state.targets,
+    }
+
+
+@app.patch("/drafts/{draft_id}")
+async def update_draft(draft_id: str, body: DraftUpdate):
+    """Apply changed answers; only the questions in the delta are rescored."""
+    draft = await drafts.apply(draft_id, _draft_plan, body.responses, body.target_responses)
+    return _draft_body(draft)
+
+
+@app.get("/drafts/{draft_id}/score")
+async def get_draft_score(draft_id: str):
+    """Provisional score and tier maturity from the draft's running sums."""
+    return _draft_body(await drafts.get(draft_id, _draft_plan))
+
+
+@app.websocket("/drafts/{draft_id}/live")
+async def draft_live_preview(websocket: WebSocket, draft_id: str):
+    """Send answer deltas, receive the updated score as it changes (see live_preview.py)."""
+    await live_previews.serve(
+        websocket,
+        draft_id,
+        load=lambda: drafts.get(draft_id, _draft_plan),
+        apply=lambda responses, targets: drafts.apply(draft_id, _draft_plan, responses, targets),
+        render=_draft_body,
+    )
+
+
+@app.post("/drafts/{draft_id}/submit")
+async def submit_draft(
+    draft_id: str, body: DraftSubmit, background_tasks: BackgroundTasks, format: str = "full"
+):
+    """Finalize a draft through the regular submission path, then discard it."""
+    draft = await drafts.get(draft_id, _draft_plan)
+    response = QuestionnaireResponse(
+        questionnaire_id=draft.questionnaire_id,
+        responses=dict(draft.state.responses),
+        target_responses=dict(draft.state.targets),
+        user_email=body.user_email,
+    )
+    result = await submit_assessment(response, background_tasks, format)
+    await drafts.delete(draft_id)
+    return result
+
+
+@app.delete("/drafts/{draft_id}")
+async def delete_draft(draft_id: str):
+    await drafts.delete(draft_id)
+    return {"message": "Draft deleted", "id": draft_id}
+
+
+@app.get("/result-dictionaries/{dictionary_id}")
+async def get_result_dictionary(dictionary_id: str, request: Request):
+    """Question texts and tier names that compact results refer to (immutable)."""
+    dictionary = await result_dictionaries.get(dictionary_id)
+    if dictionary is None:
+        raise HTTPException(status_code=404, detail="Result dictionary not found")
+    payload = dictionary_payloads.get(dictionary_id, lambda: public_dictionary(dictionary))
+    return payload_response(request, payload, 31536000)
+
+
+@app.get("/questionnaire-snapshots/{digest}")
+async def get_questionnaire_snapshot(digest: str, request: Request):
+    """The questionnaire exactly as responses with this questionnaire_hash saw it (immutable)."""
+    questionnaire = await questionnaire_snapshots.get(digest)
+    if questionnaire is None:
+        raise HTTPException(status_code=404, detail="Questionnaire snapshot not found")
+    payload = snapshot_payloads.get(digest, lambda: questionnaire)
+    return payload_response(request, payload, 31536000)
+
+
+@app.post("/score/batch")
+async def score_batch_endpoint(
+    batch: BatchScoreRequest, request: Request, background_tasks: BackgroundTasks
+):
+    """Re-score many assessments at once; nothing is stored or emailed unless asked."""
+    if batch.persist or batch.send_emails:
+        _require_admin(request)
+    results = calculate_assessment_scores_batch(
+        batch.questionnaire_id,
+        [(item.responses, item.target_responses) for item in batch.items],
+    )
+
+    persisted = 0
+    emails_queued = 0
+    if batch.persist or batch.send_emails:
+        if batch.persist and responses_collection is None:
+            raise HTTPException(status_code=500, detail="Responses storage not initialized")
+        docs = []
+        digest = await snapshot_hash(batch.questionnaire_id) if batch.persist else None
+        for item in batch.items:
+            if not batch.persist and item.user_email is None:
+                continue
+            # Stored documents and emails carry the full per-item result
+            assessment_result = calculate_assessment_score(
+                batch.questionnaire_id, item.responses, item.target_responses
+            )
+            if batch.send_emails and item.user_email is not None:
+                background_tasks.add_task(send_email, item.user_email, assessment_result)
+                emails_queued += 1
+            if batch.persist:
+                # Email is optional here; anonymous items are stored without one
+                docs.append(
+                    {
+                        "created_at": datetime.utcnow().isoformat(),
+                        "questionnaire_id": batch.questionnaire_id,
+                        "questionnaire_hash": digest,
+                        "user_email": str(item.user_email) if item.user_email is not None else None,
+                        "responses": item.responses,
+                        "target_responses": item.target_responses,
+                        "results": assessment_result.to_dict(),
+                    }
+                )
+        if docs:
+            stored_docs = [
+                dict(doc, results=await stored_results(batch.questionnaire_id, doc["results"]))
+                for doc in docs
+            ]
+            with timed(submit_stage_seconds, ("mongo_insert",)):
+                await responses_collection.insert_many(stored_docs, ordered=False)
+            persisted = len(docs)
+            for doc in docs:
+                tier_rollups.record(doc)
+                percentile_index.record(doc)
+
     return {
-        "message": "Assessment submitted successfully",
-        "results": assessment_result.dict(),
-        "email_sent": True,
+        "questionnaire_id": batch.questionnaire_id,
+        "count": len(results),
+        "results": results,
+        "persisted": persisted,
+        "emails_queued": emails_queued,
     }
 
 
 @app.get("/admin/responses")
-async def list_responses(request: Request, limit: int = 50, skip: int = 0):
+async def list_responses(
+    request: Request,
+    limit: int = 50,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    questionnaire_id: Optional[str] = None,
+    user_email: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+):
+    """Newest-first summaries; pass the returned next_cursor to get the next page.
+
+    `skip` is still accepted for old clients but degrades with depth.
+    """
     _require_admin(request)
     if responses_collection is None:
         raise HTTPException(status_code=500, detail="Responses storage not initialized")
-    cursor = responses_collection.find({}, skip=skip, limit=limit).sort(
-        "created_at", -1
-    )
-    items = []
+    limit = max(1, min(limit, 500))
+    query = build_filter(questionnaire_id, user_email, min_score, max_score, cursor)
+    find = responses_collection.find(query, SUMMARY_PROJECTION).sort(SORT)
+    if skip and not cursor:
+        find = find.skip(skip)
+    # One extra document tells us whether another page exists
+    docs = await find.limit(limit + 1).to_list(length=limit + 1)
+    await result_dictionaries.expand_documents(docs)
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return {
+        "responses": [summarize(doc) for doc in docs[:limit]],
+        "next_cursor": next_cursor,
+    }
+
+
+async def _expanded(cursor):
     async for doc in cursor:
-        doc_id = str(doc.get("_id")) if doc.get("_id") else None
-        res = doc.get("results", {}) if isinstance(doc.get("results"), dict) else {}
-        maturity = res.get("maturity_results", {}) if isinstance(res, dict) else {}
-        items.append(
-            {
-                "id": doc_id,
-                "created_at": doc.get("created_at"),
-                "questionnaire_id": doc.get("questionnaire_id"),
-                "user_email": doc.get("user_email"),
-                "score": res.get("score"),
-                "tier1": maturity.get("tier1"),
-                "tier2": maturity.get("tier2"),
-            }
-        )
-    return {"responses": items}
+        await result_dictionaries.expand_documents((doc,))
+        yield doc
+
+
+@app.get("/admin/responses/export")
+async def export_responses(
+    request: Request,
+    format: str = "csv",
+    questionnaire_id: Optional[str] = None,
+    user_email: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+):
+    """Stream every matching response, newest first, as CSV, NDJSON or XLSX.
+
+    Documents are read from the cursor in EXPORT_BATCH_SIZE batches and
+    written out as they arrive, so memory use does not grow with the
+    number of responses.
+    """
+    _require_admin(request)
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if responses_collection is None:
+        raise HTTPException(status_code=500, detail="Responses storage not initialized")
+    query = build_filter(questionnaire_id, user_email, min_score, max_score)
+    cursor = (
+        responses_collection.find(query, EXPORT_PROJECTION)
+        .sort(SORT)
+        .batch_size(settings.EXPORT_BATCH_SIZE)
+    )
+    cursor = _expanded(cursor)
+    if format == "ndjson":
+        body = iter_ndjson(cursor)
+    else:
+        if questionnaire_id:
+            definitions = [questionnaire_data.get(questionnaire_id, {})]
+        else:
+            definitions = list(questionnaire_data.values())
+        columns = export_columns(definitions)
+        body = iter_csv(cursor, columns) if format == "csv" else iter_xlsx(cursor, columns)
+    filename = f"responses-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @app.get("/admin/responses/{response_id}")
-async def get_response(response_id: str, request: Request):
+async def get_response(response_id: str, request: Request, format: str = "full"):
+    """One stored response; compact results are expanded unless format=compact."""
     _require_admin(request)
     if responses_collection is None:
         raise HTTPException(status_code=500, detail="Responses storage not initialized")
@@ -864,15 +1094,452 @@ async def get_response(response_id: str, request: Request):
         if not doc:
             raise HTTPException(status_code=404, detail="Response not found")
         doc["_id"] = str(doc["_id"])  # stringify
+        if format != "compact":
+            await result_dictionaries.expand_documents([doc])
+        if doc.get("questionnaire_hash"):
+            doc["questionnaire_url"] = f"/questionnaire-snapshots/{doc['questionnaire_hash']}"
         return doc
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid response id")
 
 
+async def ensure_response_indexes():
+    if responses_collection is None:
+        return
+    try:
+        await ensure_indexes(responses_collection)
+        await tier_rollups.ensure_indexes()
+        await drafts.ensure_indexes()
+        await job_runner.ensure_indexes()
+    except Exception as e:
+        print(f"Failed to ensure response indexes: {e}")
+
+
+def startup_report() -> Dict[str, Any]:
+    """Import and startup timings compared against STARTUP_BUDGET_SECONDS."""
+    ready = startup_timings.get("ready_seconds")
+    return {
+        "import_seconds": startup_timings.get("import_seconds"),
+        "ready_seconds": ready,
+        "stages": dict(startup_timings["stages"]),
+        "budget_seconds": settings.STARTUP_BUDGET_SECONDS,
+        "within_budget": ready is not None and ready <= settings.STARTUP_BUDGET_SECONDS,
+    }
+
+
+@app.get("/debug/startup")
+async def debug_startup():
+    return startup_report()
+
+
+@app.get("/admin/email-stats")
+async def email_stats(request: Request):
+    _require_admin(request)
+    return email_dispatcher.stats()
+
+
+@app.get("/admin/submission-stats")
+async def submission_stats(request: Request):
+    _require_admin(request)
+    if submission_buffer is None:
+        raise HTTPException(status_code=500, detail="Responses storage not initialized")
+    return submission_buffer.stats()
+
+
+@app.get("/admin/draft-stats")
+async def draft_stats(request: Request):
+    _require_admin(request)
+    return {**drafts.stats(), "live": live_previews.stats()}
+
+
+@app.get("/admin/questionnaire-snapshot-stats")
+async def questionnaire_snapshot_stats(request: Request):
+    _require_admin(request)
+    return questionnaire_snapshots.stats()
+
+
+@app.get("/admin/result-cache-stats")
+async def result_cache_stats(request: Request):
+    _require_admin(request)
+    return result_cache.stats()
+
+
+@app.get("/admin/analytics")
+async def analytics(
+    request: Request, questionnaire_id: Optional[str] = None, bucket: str = "all"
+):
+    """Tier1/tier2 maturity and gap statistics from running rollups.
+
+    bucket is "all", a month (YYYY-MM) or a day (YYYY-MM-DD) in UTC.
+    """
+    _require_admin(request)
+    return await tier_rollups.query(questionnaire_id, validate_bucket(bucket))
+
+
+@app.post("/admin/analytics/rebuild")
+async def rebuild_analytics(request: Request):
+    """Backfill the rollups from every stored response."""
+    _require_admin(request)
+    if responses_collection is None:
+        raise HTTPException(status_code=500, detail="Responses storage not initialized")
+    if submission_buffer is not None:
+        await submission_buffer.flush()
+    try:
+        return await tier_rollups.rebuild(
+            responses_collection, result_dictionaries.expand_documents
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rebuilding analytics: {e}")
+
+
+@app.post("/admin/percentiles/rebuild")
+async def rebuild_percentiles(request: Request):
+    """Recompute the percentile sketches from every stored response."""
+    _require_admin(request)
+    if responses_collection is None:
+        raise HTTPException(status_code=500, detail="Responses storage not initialized")
+    if submission_buffer is not None:
+        await submission_buffer.flush()
+    try:
+        return await percentile_index.rebuild(responses_collection, result_dictionaries.expand_documents)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rebuilding percentiles: {e}")
+
+
+@app.get("/admin/percentile-stats")
+async def percentile_stats(request: Request):
+    _require_admin(request)
+    return percentile_index.stats()
+
+
+async def _excel_parse_job(ctx: JobContext, params: ExcelParseJob) -> Dict[str, Any]:
+    """Parse Assessment.xlsx in a worker process and summarize what it contains."""
+    if not EXCEL_PATH.exists():
+        raise JobError(f"{EXCEL_PATH.name} not found")
+    ctx.progress(0, 1)
+    parsed = await ctx.run(job_tasks.parse_excel, str(EXCEL_PATH), str(EXCEL_CACHE_JSON))
+    ctx.progress(1)
+    questionnaire = parsed["questionnaire"]
+    questions = questionnaire.get("questions", [])
+    return {
+        "sheet_found": parsed["debug"].get("sheet_found"),
+        "questions": len(questions),
+        **{tier: len({q.get(tier) for q in questions if q.get(tier)}) for tier in ("tier1", "tier2", "tier3")},
+        "targets": {tier: len(t) for tier, t in (questionnaire.get("targets") or {}).items()},
+    }
+
+
+async def _score_batch_job(ctx: JobContext, params: ScoreBatchJob) -> Dict[str, Any]:
+    """Like POST /score/batch without persisting, for batches too big for a request."""
+    questionnaire = questionnaire_data.get(params.questionnaire_id)
+    if not questionnaire:
+        raise JobError("Questionnaire not found")
+    plan = get_scoring_plan(params.questionnaire_id, questionnaire)
+    items = [(item.responses, item.target_responses) for item in params.items]
+    size = max(1, params.chunk_size)
+    results: List[Dict[str, Any]] = []
+    ctx.progress(0, len(items))
+    for start in range(0, len(items), size):
+        results.extend(
+            await ctx.run(
+                job_tasks.score_chunk,
+                params.questionnaire_id,
+                plan.version,
+                questionnaire,
+                items[start:start + size],
+            )
+        )
+        ctx.progress(len(results))
+    return {"questionnaire_id": params.questionnaire_id, "results": results}
+
+
+def _swap_questionnaire(questionnaire_id: str, questionnaire: Dict[str, Any], plan: ScoringPlan):
+    """Publish a replacement questionnaire by swapping the whole mapping.
+
+    Requests that already looked up the old dict keep scoring against it;
+    everything after the swap sees the new one and its precompiled plan.
+    """
+    global questionnaire_data
+    data = dict(questionnaire_data)
+    data[questionnaire_id] = questionnaire
+    questionnaire_data = data
+    _questionnaires_changed(questionnaire_id)
+    install_scoring_plan(questionnaire_id, plan)
+    questionnaire_store.schedule_save(questionnaire_id, questionnaire)
+
+
+async def _questionnaire_reload_job(ctx: JobContext, params: WorkbookReloadJob) -> Dict[str, Any]:
+    """Parse an uploaded workbook, validate and diff it, then swap it in."""
+    path = Path(params.path)
+    if path.resolve().parent != WORKBOOK_UPLOADS.resolve():
+        raise JobError("Workbook must be uploaded through /admin/questionnaires/{id}/workbook")
+    qid = params.questionnaire_id
+    try:
+        ctx.progress(0, 3, stage="parse")
+        parsed = await ctx.run(parse_workbook, str(path))
+    except JobError:
+        raise
+    except Exception as e:
+        raise JobError(f"Could not read workbook: {type(e).__name__}: {e}")
+    finally:
+        path.unlink(missing_ok=True)
+    old = questionnaire_data.get(qid)
+    new = parsed["questionnaire"]
+    new["id"] = qid
+    if old:
+        new["title"] = old.get("title", new["title"])
+        new["description"] = old.get("description", new["description"])
+        carried = carry_over_ids(old, new)
+    else:
+        carried = 0
+
+    ctx.progress(1, stage="validate")
+    errors, warnings = validate_questionnaire(new)
+    if errors:
+        raise JobError("Workbook rejected: " + "; ".join(errors[:20]))
+    diff = structural_diff(old, new)
+    unchanged = old is not None and all(old.get(k) == new.get(k) for k in ("questions", "targets"))
+    result = {
+        "questionnaire_id": qid,
+        "diff": diff,
+        "warnings": warnings,
+        "ids_carried_over": carried,
+        "applied": False,
+        "unchanged": unchanged,
+    }
+    if params.dry_run or unchanged:
+        ctx.progress(3, stage="done")
+        return result
+
+    ctx.progress(2, stage="compile")
+    plan = await asyncio.to_thread(ScoringPlan, new)
+    if questionnaire_data.get(qid) is not old:
+        raise JobError("The questionnaire was edited while the workbook was processed; upload it again")
+    _swap_questionnaire(qid, new, plan)
+    ctx.progress(3, stage="done")
+    result["applied"] = True
+    return result
+
+
+async def _rescore_job(ctx: JobContext, params: RescoreJob) -> Dict[str, Any]:
+    """Recompute stored results with the current questionnaires, resuming after a crash."""
+    if responses_collection is None:
+        raise JobError("Responses storage not initialized")
+    qid = params.questionnaire_id
+    if qid is not None and qid not in questionnaire_data:
+        raise JobError("Questionnaire not found")
+    key = f"rescore:{qid or '*'}"
+    if key in rescores_running:
+        raise JobError("This rescore is already running")
+
+    def fingerprint() -> Dict[str, str]:
+        ids = [qid] if qid is not None else sorted(questionnaire_data)
+        return {i: questionnaire_hash(questionnaire_data[i]) for i in ids if i in questionnaire_data}
+
+    async def score_batch(docs: List[Dict[str, Any]]) -> List[Tuple[Any, Optional[Dict[str, Any]]]]:
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for doc in docs:
+            groups.setdefault(doc.get("questionnaire_id"), []).append(doc)
+        rescored_at = datetime.utcnow().isoformat()
+        updates = []
+        for group_qid, group in groups.items():
+            questionnaire = questionnaire_data.get(group_qid)
+            if not questionnaire:
+                # Deleted questionnaire: nothing to score against
+                updates.extend((doc["_id"], None) for doc in group)
+                continue
+            plan = get_scoring_plan(group_qid, questionnaire)
+            digest = await snapshot_hash(group_qid)
+            items = [(doc.get("responses") or {}, doc.get("target_responses") or {}) for doc in group]
+            # Spread the group over the pool's workers
+            size = max(100, -(-len(items) // job_runner.max_workers))
+            chunks = await asyncio.gather(*(
+                ctx.run(job_tasks.rescore_chunk, group_qid, plan.version, questionnaire, items[i:i + size])
+                for i in range(0, len(items), size)
+            ))
+            results = [result for chunk in chunks for result in chunk]
+            for doc, result in zip(group, results):
+                fields = {"results": await stored_results(group_qid, result), "rescored_at": rescored_at}
+                if digest is not None:
+                    fields["questionnaire_hash"] = digest
+                updates.append((doc["_id"], fields))
+        return updates
+
+    rescores_running.add(key)
+    try:
+        if submission_buffer is not None:
+            await submission_buffer.flush()
+        result = await rescore_responses(
+            responses_collection,
+            rescore_checkpoints,
+            key,
+            {"questionnaire_id": qid} if qid is not None else {},
+            fingerprint,
+            score_batch,
+            batch_size=max(1, params.batch_size or settings.RESCORE_BATCH_SIZE),
+            progress=ctx.progress,
+            restart=params.restart,
+        )
+    finally:
+        rescores_running.discard(key)
+    if params.rebuild_analytics and result["updated"]:
+        result["analytics"] = await tier_rollups.rebuild(
+            responses_collection, result_dictionaries.expand_documents
+        )
+        result["percentiles"] = await percentile_index.rebuild(
+            responses_collection, result_dictionaries.expand_documents
+        )
+    return result
+
+
+job_runner.register("excel_parse", _excel_parse_job, ExcelParseJob)
+job_runner.register("questionnaire_reload", _questionnaire_reload_job, WorkbookReloadJob)
+job_runner.register("score_batch", _score_batch_job, ScoreBatchJob)
+job_runner.register("rescore", _rescore_job, RescoreJob)
+
+
+@app.post("/admin/questionnaires/{questionnaire_id}/workbook", status_code=202)
+async def upload_workbook(
+    questionnaire_id: str, request: Request, file: UploadFile = File(...), dry_run: bool = False
+):
+    """Replace a questionnaire from an Assessment.xlsx-style workbook without a restart.
+
+    Parsing, validation and the diff run as a questionnaire_reload job; its
+    result lists added/removed/changed tier2 and tier3 items and targets.
+    With dry_run the live questionnaire is left alone.
+    """
+    _require_admin(request)
+    if not (file.filename or "").lower().endswith(".xlsx"):
+        raise HTTPException(status_code=400, detail="Expected an .xlsx workbook")
+    WORKBOOK_UPLOADS.mkdir(parents=True, exist_ok=True)
+    path = WORKBOOK_UPLOADS / f"{secrets.token_hex(8)}.xlsx"
+    size = 0
+    try:
+        with path.open("wb") as out:
+            while chunk := await file.read(1 << 20):
+                size += len(chunk)
+                if size > settings.WORKBOOK_UPLOAD_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail="Workbook is too large")
+                await asyncio.to_thread(out.write, chunk)
+        job = await job_runner.submit(
+            "questionnaire_reload",
+            {"questionnaire_id": questionnaire_id, "path": str(path), "dry_run": dry_run},
+        )
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return job.to_dict(include_result=False)
+
+
+@app.post("/admin/jobs", status_code=202)
+async def submit_job(body: JobRequest, request: Request):
+    """Queue a background job; poll GET /admin/jobs/{id} for progress and result."""
+    _require_admin(request)
+    return (await job_runner.submit(body.kind, body.params)).to_dict(include_result=False)
+
+
+@app.get("/admin/jobs")
+async def list_jobs(request: Request):
+    _require_admin(request)
+    return {"jobs": await job_runner.list(), "stats": job_runner.stats()}
+
+
+@app.get("/admin/jobs/{job_id}")
+async def get_job(job_id: str, request: Request):
+    _require_admin(request)
+    return (await job_runner.get(job_id)).to_dict()
+
+
+@app.post("/admin/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str, request: Request):
+    _require_admin(request)
+    return (await job_runner.cancel(job_id)).to_dict(include_result=False)
+
+
+def _questionnaire_size_metrics() -> Dict[Tuple[str, ...], float]:
+    data = questionnaire_data
+    return {
+        ("count",): len(data),
+        ("questions",): sum(len(q.get("questions", [])) for q in data.values()),
+        ("json_bytes",): sum(
+            len(json.dumps(q, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            for q in data.values()
+        ),
+    }
+
+
+def _backlog_metrics() -> Dict[Tuple[str, ...], float]:
+    email = email_dispatcher.stats()
+    backlog = {
+        ("email_queue",): email["queue_depth"],
+        ("email_in_flight",): email["in_flight"],
+        ("email_retry_wait",): email["pending_retries"],
+        ("questionnaire_writes",): questionnaire_store.stats()["pending"],
+        ("analytics_rollups",): tier_rollups.stats()["pending"],
+    }
+    if submission_buffer is not None:
+        submissions = submission_buffer.stats()
+        backlog[("submission_buffer",)] = submissions["pending"]
+        backlog[("submission_spool",)] = submissions["spool_depth"]
+    return backlog
+
+
+metrics_registry.gauge(
+    "ai_navigator_questionnaire_load_seconds",
+    "Duration of the most recent questionnaire load, Excel parse and registry refresh.",
+    lambda: {(phase,): seconds for phase, seconds in questionnaire_load_seconds.items()},
+    ("phase",),
+)
+metrics_registry.gauge(
+    "ai_navigator_questionnaires",
+    "In-memory questionnaires: count, total questions and serialized JSON size in bytes.",
+    _questionnaire_size_metrics,
+    ("measure",),
+)
+metrics_registry.gauge(
+    "ai_navigator_background_backlog",
+    "Items waiting in background queues.",
+    _backlog_metrics,
+    ("queue",),
+)
+metrics_registry.gauge(
+    "ai_navigator_live_preview_connections",
+    "Open live preview WebSockets.",
+    lambda: {(): live_previews.stats()["open"]},
+)
+metrics_registry.gauge(
+    "ai_navigator_emails_total",
+    "Emails by outcome.",
+    lambda: {(k,): email_dispatcher.counters[k] for k in ("sent", "failed", "retried")},
+    ("outcome",),
+    kind="counter",
+)
+metrics_registry.gauge(
+    "ai_navigator_result_cache_total",
+    "Result cache lookups and removals by outcome.",
+    lambda: {
+        (k,): result_cache.stats()[k]
+        for k in ("hits", "misses", "evictions", "expirations", "invalidations")
+    },
+    ("outcome",),
+    kind="counter",
+)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition for this worker process."""
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for deployment platforms"""
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "questionnaire_version": questionnaire_version,
+    }
 
 
 if os.path.exists(os.path.join(os.path.dirname(__file__), "..", "frontend", "dist")):
@@ -884,3 +1551,6 @@ if os.path.exists(os.path.join(os.path.dirname(__file__), "..", "frontend", "dis
         ),
         name="static",
     )
+
+
+startup_timings["import_seconds"] = time.perf_counter() - _IMPORT_STARTED
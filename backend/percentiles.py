@@ -0,0 +1,357 @@
+"""Percentile ranks of a submission against every stored submission.
+
+Each questionnaire keeps one KLL quantile sketch per ranked value: the
+overall score, overall maturity, and the current maturity of every tier1
+and tier2 node. A sketch holds a few hundred values however many
+submissions it has seen, answers ranks to within about 1% and merges
+with another sketch without loss beyond that, so:
+
+- record() adds a stored submission to the in-memory sketches and to a
+  pending sketch of values not yet persisted;
+- flush() (every flush_interval) merges the pending sketches into the
+  documents in Mongo with a rev check, then reloads them, so each worker
+  sees every worker's submissions;
+- rebuild() recomputes all sketches from the responses collection.
+
+Ranks are read from a sorted cumulative view of each sketch that is
+rebuilt at most every refresh_seconds, so percentiles() is a couple of
+bisects per node.
+"""
+import asyncio
+import bisect
+import math
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+Node = Tuple[str, str]  # ("score" | "overall_maturity", "") or ("tier1" | "tier2", name)
+TIERS = ("tier1", "tier2")
+
+_coin = random.Random(0x4B4C4C)
+
+
+class KLLSketch:
+    """Karnin-Lang-Liberty quantile sketch; item weight is 2 ** level."""
+
+    __slots__ = ("k", "levels", "n")
+
+    def __init__(self, k: int = 200, levels: Optional[List[List[float]]] = None):
+        self.k = k
+        self.levels: List[List[float]] = levels or [[]]
+        self.n = sum(len(items) << h for h, items in enumerate(self.levels))
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - h - 1
+        return int(math.ceil(self.k * (2.0 / 3.0) ** depth)) + 1
+
+    def _size(self) -> int:
+        return sum(len(items) for items in self.levels)
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def _compress(self):
+        for h in range(len(self.levels)):
+            items = self.levels[h]
+            if len(items) < self._capacity(h):
+                continue
+            if h + 1 == len(self.levels):
+                self.levels.append([])
+            items.sort()
+            # An odd item out stays; the rest are halved into the next level
+            keep = [items.pop()] if len(items) % 2 else []
+            self.levels[h + 1].extend(items[_coin.random() < 0.5::2])
+            self.levels[h] = keep
+            if self._size() < self._max_size():
+                break
+
+    def add(self, value: float):
+        self.levels[0].append(value)
+        self.n += 1
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def merge(self, other: "KLLSketch"):
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for h, items in enumerate(other.levels):
+            self.levels[h].extend(items)
+        self.n += other.n
+        while self._size() >= self._max_size():
+            self._compress()
+
+    def copy(self) -> "KLLSketch":
+        return KLLSketch(self.k, [list(items) for items in self.levels])
+
+    def cdf(self) -> Tuple[List[float], List[int]]:
+        """Distinct values in order and the total weight at or below each."""
+        weights: Dict[float, int] = {}
+        for h, items in enumerate(self.levels):
+            for value in items:
+                weights[value] = weights.get(value, 0) + (1 << h)
+        values = sorted(weights)
+        cumulative, total = [], 0
+        for value in values:
+            total += weights[value]
+            cumulative.append(total)
+        return values, cumulative
+
+
+class _View:
+    __slots__ = ("n", "values", "cumulative", "_memo")
+
+    def __init__(self, sketch: KLLSketch):
+        self.n = sketch.n
+        self.values, self.cumulative = sketch.cdf()
+        # Maturity levels are averages of a few options, so values repeat a lot
+        self._memo: Dict[float, float] = {}
+
+    def percentile(self, value: float) -> float:
+        """Share of the population below `value`, counting ties as half (0-100)."""
+        rank = self._memo.get(value)
+        if rank is None:
+            lo = bisect.bisect_left(self.values, value)
+            hi = bisect.bisect_right(self.values, value)
+            below = self.cumulative[lo - 1] if lo else 0
+            at_or_below = self.cumulative[hi - 1] if hi else 0
+            rank = self._memo[value] = round(50.0 * (below + at_or_below) / self.cumulative[-1], 1)
+        return rank
+
+
+def ranked_values(results: Dict[str, Any]) -> Iterable[Tuple[Node, float]]:
+    maturity = results.get("maturity_results") or {}
+    if results.get("score") is not None:
+        yield ("score", ""), results["score"]
+    if maturity.get("overall_maturity") is not None:
+        yield ("overall_maturity", ""), maturity["overall_maturity"]
+    for tier in TIERS:
+        for node in maturity.get(tier) or []:
+            if node.get("name") and node.get("current_maturity") is not None:
+                yield (tier, node["name"]), node["current_maturity"]
+
+
+def _to_doc(sketches: Dict[Node, KLLSketch]) -> List[Dict[str, Any]]:
+    return [
+        {"kind": kind, "name": name, "levels": sketch.levels}
+        for (kind, name), sketch in sketches.items()
+    ]
+
+
+def _from_doc(doc: Optional[Dict[str, Any]], k: int) -> Dict[Node, KLLSketch]:
+    return {
+        (node["kind"], node["name"]): KLLSketch(k, [list(items) for items in node["levels"]])
+        for node in (doc or {}).get("nodes") or []
+    }
+
+
+class PercentileIndex:
+    def __init__(
+        self,
+        k: int = 200,
+        flush_interval: float = 30.0,
+        refresh_seconds: float = 1.0,
+        min_population: int = 10,
+    ):
+        self.k = k
+        self.flush_interval = flush_interval
+        self.refresh_seconds = refresh_seconds
+        self.min_population = min_population
+        self.collection = None
+        self._sketches: Dict[str, Dict[Node, KLLSketch]] = {}
+        self._pending: Dict[str, Dict[Node, KLLSketch]] = {}
+        # questionnaire id -> (built at, change count then, views)
+        self._views: Dict[str, Tuple[float, int, Dict[Node, _View]]] = {}
+        self._changes: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.conflicts = 0
+        self.errors = 0
+
+    async def start(self):
+        await self.load()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            await self.load()
+
+    def record(self, doc: Dict[str, Any]):
+        """Add one stored response document to the population."""
+        questionnaire_id = doc.get("questionnaire_id")
+        self._changes[questionnaire_id] = self._changes.get(questionnaire_id, 0) + 1
+        targets = [self._sketches.setdefault(questionnaire_id, {})]
+        if self.collection is not None:
+            targets.append(self._pending.setdefault(questionnaire_id, {}))
+        for node, value in ranked_values(doc.get("results") or {}):
+            for sketches in targets:
+                sketch = sketches.get(node)
+                if sketch is None:
+                    sketch = sketches[node] = KLLSketch(self.k)
+                sketch.add(value)
+
+    def _views_for(self, questionnaire_id: str) -> Dict[Node, _View]:
+        """Rank views of one questionnaire, rebuilt together once stale."""
+        entry = self._views.get(questionnaire_id)
+        changes = self._changes.get(questionnaire_id, 0)
+        if entry is not None:
+            built_at, built_changes, views = entry
+            if built_changes == changes or time.monotonic() - built_at < self.refresh_seconds:
+                return views
+        views = {
+            node: _View(sketch)
+            for node, sketch in self._sketches.get(questionnaire_id, {}).items()
+            if sketch.n >= self.min_population
+        }
+        self._views[questionnaire_id] = (time.monotonic(), changes, views)
+        return views
+
+    def percentiles(
+        self, questionnaire_id: str, score: float, maturity_results: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Percentiles of one result, or None until the questionnaire has min_population submissions."""
+        views = self._views_for(questionnaire_id)
+        population = views.get(("score", ""))
+        if population is None:
+            return None
+        maturity = maturity_results or {}
+        out: Dict[str, Any] = {"population": population.n, "score": population.percentile(score)}
+        view = views.get(("overall_maturity", ""))
+        if view is not None and maturity.get("overall_maturity") is not None:
+            out["overall_maturity"] = view.percentile(maturity["overall_maturity"])
+        for tier in TIERS:
+            ranks = out[tier] = {}
+            for node in maturity.get(tier) or []:
+                view = views.get((tier, node["name"]))
+                if view is not None and node["current_maturity"] is not None:
+                    ranks[node["name"]] = view.percentile(node["current_maturity"])
+        return out
+
+    async def load(self):
+        """Replace the in-memory sketches with the stored ones plus unflushed values."""
+        if self.collection is None:
+            return
+        try:
+            docs = await self.collection.find({}).to_list(length=None)
+        except Exception as e:
+            self.errors += 1
+            print(f"Failed to load percentile sketches: {e}")
+            return
+        sketches = {doc["_id"]: _from_doc(doc, self.k) for doc in docs}
+        for questionnaire_id, pending in self._pending.items():
+            merged = sketches.setdefault(questionnaire_id, {})
+            for node, sketch in pending.items():
+                if node in merged:
+                    merged[node].merge(sketch)
+                else:
+                    merged[node] = sketch.copy()
+        self._sketches = sketches
+        for questionnaire_id in sketches:
+            self._changes[questionnaire_id] = self._changes.get(questionnaire_id, 0) + 1
+
+    async def flush(self):
+        if not self._pending or self.collection is None:
+            return
+        batch, self._pending = self._pending, {}
+        for questionnaire_id, pending in batch.items():
+            try:
+                await self._merge_into_stored(questionnaire_id, pending)
+                self.flushes += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"Failed to flush percentile sketches: {e}")
+                # Keep the values for the next attempt
+                kept = self._pending.setdefault(questionnaire_id, {})
+                for node, sketch in pending.items():
+                    if node in kept:
+                        sketch.merge(kept[node])
+                    kept[node] = sketch
+
+    async def _merge_into_stored(self, questionnaire_id: str, pending: Dict[Node, KLLSketch]):
+        from pymongo.errors import DuplicateKeyError
+
+        while True:
+            doc = await self.collection.find_one({"_id": questionnaire_id})
+            stored = _from_doc(doc, self.k)
+            for node, sketch in pending.items():
+                if node in stored:
+                    stored[node].merge(sketch)
+                else:
+                    stored[node] = sketch.copy()
+            if doc is None:
+                try:
+                    await self.collection.insert_one({"_id": questionnaire_id, "rev": 1, "nodes": _to_doc(stored)})
+                    return
+                except DuplicateKeyError:
+                    self.conflicts += 1
+                    continue
+            written = await self.collection.update_one(
+                {"_id": questionnaire_id, "rev": doc["rev"]},
+                {"$set": {"nodes": _to_doc(stored)}, "$inc": {"rev": 1}},
+            )
+            if written.matched_count:
+                return
+            # Another worker flushed in between; merge into its version
+            self.conflicts += 1
+
+    async def rebuild(
+        self,
+        responses_collection,
+        expand_documents: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+    ) -> Dict[str, Any]:
+        """Recompute every sketch from the stored responses."""
+        self._pending = {}
+        sketches: Dict[str, Dict[Node, KLLSketch]] = {}
+        count = 0
+        cursor = responses_collection.find({}, {"questionnaire_id": 1, "results": 1})
+        async for doc in cursor:
+            if expand_documents is not None:
+                await expand_documents([doc])
+            nodes = sketches.setdefault(doc.get("questionnaire_id"), {})
+            for node, value in ranked_values(doc.get("results") or {}):
+                sketch = nodes.get(node)
+                if sketch is None:
+                    sketch = nodes[node] = KLLSketch(self.k)
+                sketch.add(value)
+            count += 1
+        if self.collection is not None:
+            for questionnaire_id, nodes in sketches.items():
+                await self.collection.update_one(
+                    {"_id": questionnaire_id},
+                    {"$set": {"nodes": _to_doc(nodes)}, "$inc": {"rev": 1}},
+                    upsert=True,
+                )
+            await self.collection.delete_many({"_id": {"$nin": list(sketches)}})
+        # Submissions recorded while the rebuild ran are still pending
+        for questionnaire_id, pending in self._pending.items():
+            nodes = sketches.setdefault(questionnaire_id, {})
+            for node, sketch in pending.items():
+                if node in nodes:
+                    nodes[node].merge(sketch)
+                else:
+                    nodes[node] = sketch.copy()
+        self._sketches = sketches
+        self._views = {}
+        return {"responses": count, "questionnaires": len(sketches)}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "questionnaires": len(self._sketches),
+            "sketches": sum(len(nodes) for nodes in self._sketches.values()),
+            "population": {
+                qid: nodes[("score", "")].n for qid, nodes in self._sketches.items() if ("score", "") in nodes
+            },
+            "pending": sum(1 for nodes in self._pending.values() for _ in nodes),
+            "flushes": self.flushes,
+            "conflicts": self.conflicts,
+            "errors": self.errors,
+        }
@@ -0,0 +1,217 @@
+"""In-memory inverted index over questionnaire questions.
+
+Searched fields are text, theme and the tier1/tier2/tier3 names, tokenized
+with the same _norm normalization the Excel importer uses: each
+whitespace-separated word is indexed as its _norm form ("AI-driven" ->
+"aidriven") and, when punctuation splits it, as its parts ("ai", "driven").
+A query matches questions that contain every query term; the last term
+also matches as a prefix so partial words work while typing. Hits are
+ranked by field-weighted idf and then by position in the questionnaire.
+
+The index is kept in step with questionnaire_data through update() and
+sync(), which only touch questions whose content changed.
+"""
+import bisect
+import math
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from excel_ingest import _norm
+
+FIELD_WEIGHTS = {"text": 3.0, "tier3": 2.5, "tier2": 2.0, "tier1": 1.5, "theme": 1.0}
+FACETS = ("tier1", "tier2", "tier3", "theme")
+# Vocabulary terms a trailing prefix may expand to
+MAX_PREFIX_TERMS = 64
+
+DocKey = Tuple[str, str]  # (questionnaire id, question id)
+
+
+def _terms(value: Any) -> Set[str]:
+    terms = set()
+    for word in str(value).split():
+        whole = _norm(word)
+        if whole:
+            terms.add(whole)
+            parts = re.findall(r"[a-z0-9]+", word.lower())
+            if len(parts) > 1:
+                terms.update(parts)
+    return terms
+
+
+def query_terms(q: str) -> List[str]:
+    """Query words split at punctuation, so they match both indexed forms."""
+    return list(dict.fromkeys(re.findall(r"[a-z0-9]+", q.lower())))
+
+
+class QuestionIndex:
+    def __init__(self):
+        # term -> {doc: summed weight of the fields containing it}
+        self._postings: Dict[str, Dict[DocKey, float]] = {}
+        self._vocabulary: List[str] = []  # sorted postings keys, for prefix lookups
+        self._facets: Dict[Tuple[str, str], Set[DocKey]] = {}
+        self._docs: Dict[DocKey, Dict[str, Any]] = {}
+        self._by_questionnaire: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _add(self, key: DocKey, question: Dict[str, Any], title: str, position: int):
+        weights: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            if question.get(field):
+                for term in _terms(question[field]):
+                    weights[term] = weights.get(term, 0.0) + weight
+        for term, weight in weights.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = {}
+                bisect.insort(self._vocabulary, term)
+            posting[key] = weight
+        facets = {}
+        for field in FACETS:
+            if question.get(field):
+                facets[field] = _norm(question[field])
+                self._facets.setdefault((field, facets[field]), set()).add(key)
+        self._docs[key] = {
+            "terms": tuple(weights),
+            "facets": facets,
+            "position": position,
+            "hit": {
+                "questionnaire_id": key[0],
+                "questionnaire_title": title,
+                "id": key[1],
+                "text": question.get("text"),
+                "tier1": question.get("tier1"),
+                "tier2": question.get("tier2"),
+                "tier3": question.get("tier3"),
+                "theme": question.get("theme"),
+            },
+        }
+
+    def _remove(self, key: DocKey):
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        for term in doc["terms"]:
+            posting = self._postings[term]
+            posting.pop(key, None)
+            if not posting:
+                del self._postings[term]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+        for facet in doc["facets"].items():
+            keys = self._facets[facet]
+            keys.discard(key)
+            if not keys:
+                del self._facets[facet]
+
+    def update(self, questionnaire_id: str, questionnaire: Optional[Dict[str, Any]]):
+        """Reindex one questionnaire (None removes it); unchanged questions are kept."""
+        old = self._by_questionnaire.pop(questionnaire_id, {})
+        new: Dict[str, Dict[str, Any]] = {}
+        positions: Dict[str, int] = {}
+        title = ""
+        if questionnaire:
+            title = questionnaire.get("title") or questionnaire_id
+            for position, question in enumerate(questionnaire.get("questions") or []):
+                if question.get("id") is not None and str(question["id"]) not in new:
+                    new[str(question["id"])] = question
+                    positions[str(question["id"])] = position
+        for question_id, question in old.items():
+            key = (questionnaire_id, question_id)
+            doc = self._docs.get(key)
+            if (
+                new.get(question_id) != question
+                or doc is None
+                or doc["position"] != positions.get(question_id)
+                or doc["hit"]["questionnaire_title"] != title
+            ):
+                self._remove(key)
+        for question_id, question in new.items():
+            key = (questionnaire_id, question_id)
+            if key not in self._docs:
+                self._add(key, question, title, positions[question_id])
+        if new:
+            # Copies, so in-place edits of questionnaire_data still show up as changes
+            self._by_questionnaire[questionnaire_id] = {k: dict(v) for k, v in new.items()}
+
+    def sync(self, questionnaires: Dict[str, Dict[str, Any]]):
+        """Bring the index in line with a whole questionnaire set."""
+        for questionnaire_id in list(self._by_questionnaire):
+            if questionnaire_id not in questionnaires:
+                self.update(questionnaire_id, None)
+        for questionnaire_id, questionnaire in questionnaires.items():
+            self.update(questionnaire_id, questionnaire)
+
+    def _expand(self, term: str, prefix: bool) -> Iterable[str]:
+        if not prefix:
+            return (term,) if term in self._postings else ()
+        vocabulary = self._vocabulary
+        start = bisect.bisect_left(vocabulary, term)
+        end = min(bisect.bisect_left(vocabulary, term + "\x7f", start), start + MAX_PREFIX_TERMS)
+        return vocabulary[start:end]
+
+    def search(
+        self,
+        q: str = "",
+        filters: Optional[Dict[str, Optional[str]]] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        """Ranked hits for `q` among questions matching every filter exactly.
+
+        filters maps questionnaire_id or a facet (tier1, tier2, tier3,
+        theme) to a value; facet values are compared after _norm.
+        """
+        candidates: Optional[Set[DocKey]] = None
+        for field, value in (filters or {}).items():
+            if not value:
+                continue
+            if field == "questionnaire_id":
+                keys = {(value, k) for k in self._by_questionnaire.get(value, ())}
+            else:
+                keys = self._facets.get((field, _norm(value)), set())
+            candidates = keys if candidates is None else candidates & keys
+
+        terms = query_terms(q)
+        scores: Dict[DocKey, float] = {}
+        total_docs = max(1, len(self._docs))
+        for i, term in enumerate(terms):
+            matched: Dict[DocKey, float] = {}
+            for expansion in self._expand(term, prefix=i == len(terms) - 1):
+                posting = self._postings[expansion]
+                idf = math.log(1.0 + total_docs / len(posting))
+                for key, weight in posting.items():
+                    if candidates is not None and key not in candidates:
+                        continue
+                    if i and key not in scores:
+                        continue
+                    score = weight * idf
+                    if score > matched.get(key, 0.0):
+                        matched[key] = score
+            scores = {key: scores.get(key, 0.0) + score for key, score in matched.items()}
+            if not scores:
+                break
+
+        if terms:
+            ranked = sorted(
+                scores.items(),
+                key=lambda item: (-item[1], item[0][0], self._docs[item[0]]["position"]),
+            )
+        else:
+            keys = self._docs if candidates is None else candidates
+            ranked = [
+                (key, 0.0)
+                for key in sorted(keys, key=lambda k: (k[0], self._docs[k]["position"]))
+            ]
+        page = ranked[offset:offset + limit]
+        return {
+            "total": len(ranked),
+            "hits": [{**self._docs[key]["hit"], "score": round(score, 4)} for key, score in page],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "questionnaires": len(self._by_questionnaire),
+            "questions": len(self._docs),
+            "terms": len(self._postings),
+        }
@@ -0,0 +1,153 @@
+"""Validation and structural diffs for questionnaires replaced from a workbook."""
+from typing import Any, Dict, List, Optional, Tuple
+
+QUESTION_FIELDS = ("text", "theme", "tier1", "tier2", "weight", "options")
+
+
+def _number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_questionnaire(questionnaire: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """(errors, warnings); any error means the questionnaire must not go live."""
+    errors: List[str] = []
+    warnings: List[str] = []
+    questions = questionnaire.get("questions") or []
+    if not questions:
+        errors.append("No questions found (is the Assessment sheet present with its header row?)")
+    seen = set()
+    tier_names: Dict[str, set] = {"tier1": set(), "tier2": set()}
+    low, high = None, None
+    for i, q in enumerate(questions):
+        label = q.get("id") or f"#{i + 1}"
+        if not q.get("id"):
+            errors.append(f"Question {label} has no id")
+        elif q["id"] in seen:
+            errors.append(f"Duplicate question id {q['id']}")
+        seen.add(q.get("id"))
+        if not str(q.get("text") or "").strip():
+            errors.append(f"Question {label} has no text")
+        options = q.get("options") or []
+        if not options or not all(_number(o.get("score")) for o in options):
+            errors.append(f"Question {label} needs options with numeric scores")
+        else:
+            scores = [o["score"] for o in options]
+            low = min(scores) if low is None else min(low, *scores)
+            high = max(scores) if high is None else max(high, *scores)
+        if not _number(q.get("weight", 1.0)) or q.get("weight", 1.0) < 0:
+            errors.append(f"Question {label} has an invalid weight")
+        for tier in tier_names:
+            if q.get(tier):
+                tier_names[tier].add(q[tier])
+            else:
+                warnings.append(f"Question {label} has no {tier}")
+    for tier, targets in (questionnaire.get("targets") or {}).items():
+        for name, value in targets.items():
+            if not _number(value):
+                errors.append(f"Target for {tier} {name!r} is not a number")
+            elif low is not None and not low <= value <= high:
+                errors.append(f"Target for {tier} {name!r} ({value}) is outside the score range {low}-{high}")
+            if tier in tier_names and name not in tier_names[tier]:
+                warnings.append(f"Target for unknown {tier} {name!r}")
+    return errors, warnings
+
+
+def _by_tier3(questionnaire: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    items: Dict[str, Dict[str, Any]] = {}
+    for q in (questionnaire or {}).get("questions") or []:
+        items.setdefault(q.get("tier3") or q.get("text"), q)
+    return items
+
+
+def carry_over_ids(old: Dict[str, Any], new: Dict[str, Any]) -> int:
+    """Give questions that already existed (same tier2 and tier3) their old ids.
+
+    Workbook ids come from row numbers and shift when rows are inserted;
+    keeping them keeps stored answers and open drafts attached to the same
+    capability. Returns how many ids were carried over.
+    """
+    old_ids = {
+        (q.get("tier2"), q.get("tier3") or q.get("text")): q["id"]
+        for q in old.get("questions") or []
+        if q.get("id")
+    }
+    kept: Dict[int, str] = {}
+    for i, q in enumerate(new.get("questions") or []):
+        old_id = old_ids.get((q.get("tier2"), q.get("tier3") or q.get("text")))
+        if old_id is not None:
+            kept[i] = old_id
+    taken = set(kept.values())
+    for i, q in enumerate(new.get("questions") or []):
+        if i in kept:
+            q["id"] = kept[i]
+        elif q.get("id") in taken:
+            # A new row landed on an id that a carried-over question keeps
+            base, n = q["id"], 2
+            while f"{base}_{n}" in taken:
+                n += 1
+            q["id"] = f"{base}_{n}"
+        taken.add(q.get("id"))
+    return len(kept)
+
+
+def _keyed_diff(old: Dict[str, Any], new: Dict[str, Any], describe) -> Dict[str, Any]:
+    changed = []
+    for name in old.keys() & new.keys():
+        fields = describe(old[name], new[name])
+        if fields:
+            changed.append({"name": name, "changed": fields})
+    return {
+        "added": sorted(new.keys() - old.keys()),
+        "removed": sorted(old.keys() - new.keys()),
+        "changed": sorted(changed, key=lambda c: c["name"]),
+    }
+
+
+def _tier2_items(questionnaire: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    items: Dict[str, Dict[str, Any]] = {}
+    for q in (questionnaire or {}).get("questions") or []:
+        if q.get("tier2"):
+            item = items.setdefault(q["tier2"], {"tier1": q.get("tier1"), "tier3": set()})
+            item["tier3"].add(q.get("tier3") or q.get("text"))
+    return items
+
+
+def _targets_diff(old: Dict[str, float], new: Dict[str, float]) -> Dict[str, Any]:
+    return {
+        "added": {k: new[k] for k in sorted(new.keys() - old.keys())},
+        "removed": {k: old[k] for k in sorted(old.keys() - new.keys())},
+        "changed": {k: [old[k], new[k]] for k in sorted(old.keys() & new.keys()) if old[k] != new[k]},
+    }
+
+
+def structural_diff(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Dict[str, Any]:
+    """tier2/tier3 items added, removed or changed, and target changes."""
+    tier3 = _keyed_diff(
+        _by_tier3(old),
+        _by_tier3(new),
+        lambda a, b: [f for f in ("id",) + QUESTION_FIELDS if a.get(f) != b.get(f)],
+    )
+    tier2 = _keyed_diff(
+        _tier2_items(old),
+        _tier2_items(new),
+        lambda a, b: [f for f in ("tier1", "tier3") if a[f] != b[f]],
+    )
+    old_targets = (old or {}).get("targets") or {}
+    new_targets = new.get("targets") or {}
+    targets = {
+        tier: _targets_diff(old_targets.get(tier) or {}, new_targets.get(tier) or {})
+        for tier in ("tier1", "tier2")
+    }
+    has_changes = any(
+        part[key] for part in (tier2, tier3, *targets.values()) for key in ("added", "removed", "changed")
+    )
+    return {
+        "questions": {
+            "before": len((old or {}).get("questions") or []),
+            "after": len(new.get("questions") or []),
+        },
+        "tier2": tier2,
+        "tier3": tier3,
+        "targets": targets,
+        "has_changes": has_changes,
+    }
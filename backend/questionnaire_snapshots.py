@@ -0,0 +1,88 @@
+"""Immutable questionnaire snapshots, addressed by a hash of their content.
+
+Every stored response records the `questionnaire_hash` of the questionnaire
+it was scored against. The questionnaire itself is written once per hash to
+the questionnaire_snapshots collection, so old responses can still be
+displayed against the questions they answered after the questionnaire is
+edited, without copying the questionnaire into each document. Rescoring
+deliberately uses the live questionnaire instead (see rescoring.py).
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from scoring import ScoringPlan
+
+
+def questionnaire_hash(questionnaire: Dict[str, Any]) -> str:
+    canonical = json.dumps(questionnaire, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:24]
+
+
+# Plan version -> hash. Versions only grow and a plan is replaced whenever its
+# questionnaire changes, so evicting the oldest entries drops retired plans first
+_by_plan: "OrderedDict[int, str]" = OrderedDict()
+_BY_PLAN_MAX = 256
+
+
+def hash_for(plan: ScoringPlan) -> str:
+    """Content hash of the questionnaire a plan was compiled from, once per plan."""
+    digest = _by_plan.get(plan.version)
+    if digest is None:
+        digest = _by_plan[plan.version] = questionnaire_hash(plan.source)
+        while len(_by_plan) > _BY_PLAN_MAX:
+            _by_plan.popitem(last=False)
+    return digest
+
+
+class QuestionnaireSnapshotStore:
+    """Snapshots persisted once each to Mongo, served from a bounded LRU."""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.collection = None
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._persisted: set = set()
+        self.counters = {"hits": 0, "misses": 0, "loads": 0, "stored": 0}
+
+    def _put(self, digest: str, questionnaire: Dict[str, Any]) -> Dict[str, Any]:
+        self._cache[digest] = questionnaire
+        self._cache.move_to_end(digest)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return questionnaire
+
+    async def remember(self, questionnaire_id: str, plan: ScoringPlan) -> str:
+        """Hash of the questionnaire behind `plan`, stored if not yet known."""
+        digest = hash_for(plan)
+        if digest not in self._cache:
+            self._put(digest, plan.source)
+        if self.collection is not None and digest not in self._persisted:
+            await self.collection.update_one(
+                {"_id": digest},
+                {"$setOnInsert": {"questionnaire_id": questionnaire_id, "questionnaire": plan.source}},
+                upsert=True,
+            )
+            self._persisted.add(digest)
+            self.counters["stored"] += 1
+        return digest
+
+    async def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        questionnaire = self._cache.get(digest)
+        if questionnaire is not None:
+            self.counters["hits"] += 1
+            self._cache.move_to_end(digest)
+            return questionnaire
+        self.counters["misses"] += 1
+        if self.collection is None:
+            return None
+        doc = await self.collection.find_one({"_id": digest})
+        if doc is None:
+            return None
+        self.counters["loads"] += 1
+        self._persisted.add(digest)
+        return self._put(digest, doc["questionnaire"])
+
+    def stats(self) -> Dict[str, Any]:
+        return {"cached": len(self._cache), "max_entries": self.max_entries, **self.counters}
@@ -0,0 +1,254 @@
+"""Resumable bulk rescoring of stored responses.
+
+rescore_responses() walks the responses collection in _id order, one
+batch at a time (keyset pagination, so no server cursor has to survive
+slow batches), and writes new results back with unordered bulk_write.
+After every batch the last _id and the running counts are saved to a
+checkpoint document; a run that finds a checkpoint for the same key
+continues after it, so a crash or restart only repeats the batch that
+was in flight.
+
+The checkpoint also records a fingerprint of the questionnaires being
+scored against. If they change, during a run or between a crash and the
+resume, already rewritten documents are stale again and the walk starts
+over from the first document.
+
+Scoring is passed in, so the same loop runs inside the server's job
+runner or from the command line against a local mongod or, for trying it
+out, an in-memory mongomock-motor database:
+
+    python rescoring.py [--questionnaire-id ID] [--batch-size N] [--restart]
+    python rescoring.py --in-memory 20000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# (document _id, fields to $set); None leaves the document alone
+Update = Tuple[Any, Optional[Dict[str, Any]]]
+ScoreBatch = Callable[[List[Dict[str, Any]]], Awaitable[List[Update]]]
+Progress = Callable[..., None]
+
+RESCORE_PROJECTION = {"questionnaire_id": 1, "responses": 1, "target_responses": 1}
+
+
+class RescoreCheckpoints:
+    """Progress of rescoring runs, one document per run key."""
+
+    def __init__(self):
+        self.collection = None
+        self._local: Dict[str, Dict[str, Any]] = {}
+
+    async def load(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.collection is None:
+            return self._local.get(key)
+        return await self.collection.find_one({"_id": key})
+
+    async def save(self, key: str, state: Dict[str, Any]):
+        state = {**state, "updated_at": datetime.utcnow().isoformat()}
+        if self.collection is None:
+            self._local[key] = {"_id": key, **state}
+            return
+        await self.collection.update_one({"_id": key}, {"$set": state}, upsert=True)
+
+    async def clear(self, key: str):
+        if self.collection is None:
+            self._local.pop(key, None)
+            return
+        await self.collection.delete_one({"_id": key})
+
+
+def _fresh(fingerprint: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        "last_id": None,
+        "fingerprint": fingerprint,
+        "done": 0,
+        "updated": 0,
+        "skipped": 0,
+        "write_errors": 0,
+        "started_at": datetime.utcnow().isoformat(),
+    }
+
+
+async def rescore_responses(
+    responses,
+    checkpoints: RescoreCheckpoints,
+    key: str,
+    query: Dict[str, Any],
+    fingerprint: Callable[[], Dict[str, str]],
+    score_batch: ScoreBatch,
+    batch_size: int = 1000,
+    progress: Optional[Progress] = None,
+    restart: bool = False,
+) -> Dict[str, Any]:
+    """Rescore every document matching `query`, resuming from the checkpoint `key`.
+
+    fingerprint() identifies the questionnaires results are computed from
+    (questionnaire id -> content hash); score_batch(docs) returns the new
+    fields per document. Counts in the result cover the whole walk, across
+    resumes; docs_per_second covers this run only.
+    """
+    from pymongo import UpdateOne
+    from pymongo.errors import BulkWriteError
+
+    current = fingerprint()
+    state = None if restart else await checkpoints.load(key)
+    resumed = state is not None and state.get("fingerprint") == current
+    if not resumed:
+        state = _fresh(current)
+    state.pop("_id", None)
+    state.pop("updated_at", None)
+    restarts = 0
+
+    async def remaining() -> int:
+        after = {"_id": {"$gt": state["last_id"]}} if state["last_id"] is not None else {}
+        return await responses.count_documents({**query, **after})
+
+    total = state["done"] + await remaining()
+    started = time.perf_counter()
+    processed = 0
+
+    def report():
+        if progress is not None:
+            elapsed = time.perf_counter() - started
+            progress(
+                state["done"],
+                total,
+                updated=state["updated"],
+                skipped=state["skipped"],
+                write_errors=state["write_errors"],
+                restarts=restarts,
+                docs_per_second=round(processed / elapsed, 1) if elapsed > 0 else None,
+            )
+
+    report()
+    while True:
+        after = {"_id": {"$gt": state["last_id"]}} if state["last_id"] is not None else {}
+        docs = await (
+            responses.find({**query, **after}, RESCORE_PROJECTION)
+            .sort("_id", 1)
+            .limit(batch_size)
+            .to_list(length=batch_size)
+        )
+        if not docs:
+            break
+        changed = fingerprint()
+        if changed != state["fingerprint"]:
+            # Questionnaires were edited mid-run: everything rewritten so far is stale
+            print(f"Questionnaires changed during rescoring {key}; starting over")
+            state = _fresh(changed)
+            restarts += 1
+            total = await remaining()
+            continue
+
+        updates = await score_batch(docs)
+        requests = [UpdateOne({"_id": doc_id}, {"$set": fields}) for doc_id, fields in updates if fields]
+        state["skipped"] += len(docs) - len(requests)
+        if requests:
+            try:
+                written = await responses.bulk_write(requests, ordered=False)
+                state["updated"] += written.modified_count
+            except BulkWriteError as e:
+                # Unordered: the other updates of the batch were still applied
+                details = e.details or {}
+                state["updated"] += details.get("nModified", 0)
+                state["write_errors"] += len(details.get("writeErrors") or ())
+        state["done"] += len(docs)
+        state["last_id"] = docs[-1]["_id"]
+        processed += len(docs)
+        await checkpoints.save(key, state)
+        report()
+
+    await checkpoints.clear(key)
+    elapsed = time.perf_counter() - started
+    return {
+        "done": state["done"],
+        "updated": state["updated"],
+        "skipped": state["skipped"],
+        "write_errors": state["write_errors"],
+        "resumed": resumed,
+        "restarts": restarts,
+        "seconds": round(elapsed, 3),
+        "docs_per_second": round(processed / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+async def _seed(responses, count: int):
+    """Synthetic responses for every loaded questionnaire, for --in-memory runs."""
+    import main
+
+    rng = random.Random(7)
+    docs = []
+    for i in range(count):
+        questionnaire_id = rng.choice(list(main.questionnaire_data))
+        questions = main.questionnaire_data[questionnaire_id]["questions"]
+        answered = rng.sample(questions, rng.randint(1, len(questions)))
+        docs.append({
+            "created_at": datetime.utcnow().isoformat(),
+            "questionnaire_id": questionnaire_id,
+            "user_email": f"user{i}@example.com",
+            "responses": {q["id"]: rng.randint(1, 5) for q in answered},
+            "target_responses": {q["id"]: rng.randint(1, 5) for q in answered},
+            "results": {},
+        })
+    for start in range(0, len(docs), 1000):
+        await responses.insert_many(docs[start:start + 1000])
+
+
+async def _run_cli(args) -> int:
+    import main
+
+    main.load_questionnaires()
+    if args.in_memory:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            print("--in-memory needs the mongomock-motor package")
+            return 2
+        db = AsyncMongoMockClient()["rescore"]
+        main.responses_collection = db["responses"]
+        main.rescore_checkpoints.collection = db["job_checkpoints"]
+        await _seed(main.responses_collection, args.in_memory)
+    else:
+        main.init_mongo()
+        if main.responses_collection is None:
+            print("Set MONGODB_URL (and MONGODB_DB) or pass --in-memory N")
+            return 2
+        await main.ensure_response_indexes()
+        # The job flushes it before reading; lifespan starts it in the server
+        if main.submission_buffer is not None:
+            await main.submission_buffer.start()
+
+    try:
+        job = await main.job_runner.submit(
+            "rescore",
+            {"questionnaire_id": args.questionnaire_id, "batch_size": args.batch_size, "restart": args.restart},
+        )
+        while job.task is not None:
+            await asyncio.sleep(1.0)
+            p = job.progress
+            print(f"{p.get('done')}/{p.get('total')} docs, {p.get('docs_per_second')} docs/s")
+    finally:
+        await main.job_runner.stop()
+        if main.submission_buffer is not None:
+            await main.submission_buffer.stop()
+    print(job.to_dict())
+    return 0 if job.status == "succeeded" else 1
+
+
+def main_cli(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questionnaire-id", default=None, help="only rescore this questionnaire")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--restart", action="store_true", help="ignore a saved checkpoint")
+    parser.add_argument("--in-memory", type=int, default=0, metavar="N", help="seed N synthetic responses in memory")
+    args = parser.parse_args(argv)
+    return asyncio.run(_run_cli(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
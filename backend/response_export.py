@@ -0,0 +1,165 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+from typing import Any, AsyncIterator, Dict, Iterable, List
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+EXPORT_PROJECTION = {
+    "created_at": 1,
+    "questionnaire_id": 1,
+    "questionnaire_hash": 1,
+    "user_email": 1,
+    "results.score": 1,
+    "results.category": 1,
+    "results.detailed_results": 1,
+    "results.maturity_results.tier1": 1,
+    "results.maturity_results.tier2": 1,
+    "results.maturity_results.overall_maturity": 1,
+    # compact-format results, expanded before flattening
+    "results.format": 1,
+    "results.dictionary": 1,
+    "results.questionnaire_id": 1,
+    "results.overall_maturity": 1,
+    "results.questions": 1,
+    "results.responses": 1,
+    "results.scores": 1,
+    "results.target_scores": 1,
+    "results.tier1": 1,
+    "results.tier2": 1,
+}
+
+BASE_COLUMNS = [
+    "id", "created_at", "questionnaire_id", "questionnaire_hash", "user_email", "score", "category", "overall_maturity"
+]
+QUESTION_FIELDS = ("response", "score", "target_score")
+TIER_FIELDS = ("current_maturity", "target_maturity", "gap")
+# Rows buffered before a chunk is handed to the client / the xlsx writer
+CHUNK_ROWS = 500
+
+
+def export_columns(questionnaires: Iterable[Dict[str, Any]]) -> List[str]:
+    """Fixed column order for CSV/XLSX, taken from the questionnaire definitions.
+
+    Answers to questions that are no longer defined are left out of these
+    formats; NDJSON rows carry every key found in the document.
+    """
+    question_cols: Dict[str, None] = {}
+    tier_cols: Dict[str, Dict[str, None]] = {"tier1": {}, "tier2": {}}
+    for questionnaire in questionnaires:
+        for q in questionnaire.get("questions", []):
+            for field in QUESTION_FIELDS:
+                question_cols[f"{q['id']}.{field}"] = None
+            for tier in tier_cols:
+                if q.get(tier):
+                    for field in TIER_FIELDS:
+                        tier_cols[tier][f"{tier}.{q[tier]}.{field}"] = None
+    return BASE_COLUMNS + list(question_cols) + list(tier_cols["tier1"]) + list(tier_cols["tier2"])
+
+
+def flatten_response(doc: Dict[str, Any]) -> Dict[str, Any]:
+    results = doc.get("results") if isinstance(doc.get("results"), dict) else {}
+    maturity = results.get("maturity_results") or {}
+    row: Dict[str, Any] = {
+        "id": str(doc["_id"]) if doc.get("_id") is not None else None,
+        "created_at": doc.get("created_at"),
+        "questionnaire_id": doc.get("questionnaire_id"),
+        "questionnaire_hash": doc.get("questionnaire_hash"),
+        "user_email": doc.get("user_email"),
+        "score": results.get("score"),
+        "category": results.get("category"),
+        "overall_maturity": maturity.get("overall_maturity"),
+    }
+    for qid, detail in (results.get("detailed_results") or {}).items():
+        for field in QUESTION_FIELDS:
+            row[f"{qid}.{field}"] = detail.get(field)
+    for tier in ("tier1", "tier2"):
+        for node in maturity.get(tier) or []:
+            for field in TIER_FIELDS:
+                row[f"{tier}.{node.get('name')}.{field}"] = node.get(field)
+    return row
+
+
+def _scalar(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+async def iter_csv(cursor, columns: List[str]) -> AsyncIterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    rows = 0
+    async for doc in cursor:
+        row = flatten_response(doc)
+        writer.writerow([_scalar(row.get(c)) for c in columns])
+        rows += 1
+        if rows % CHUNK_ROWS == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode("utf-8")
+
+
+async def iter_ndjson(cursor) -> AsyncIterator[bytes]:
+    lines: List[str] = []
+    async for doc in cursor:
+        lines.append(json.dumps(flatten_response(doc), ensure_ascii=False, default=str))
+        if len(lines) >= CHUNK_ROWS:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _xlsx_cell(value: Any) -> Any:
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    value = _scalar(value)
+    return ILLEGAL_CHARACTERS_RE.sub("", value) if isinstance(value, str) else value
+
+
+def _append_rows(ws, rows: List[List[Any]]):
+    for row in rows:
+        ws.append([_xlsx_cell(v) for v in row])
+
+
+async def iter_xlsx(cursor, columns: List[str]) -> AsyncIterator[bytes]:
+    """Rows go through an openpyxl write-only sheet, which spills to a temp
+    file instead of building cells in memory; the finished workbook is then
+    streamed from disk. The openpyxl work runs off the event loop."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Responses")
+    ws.append(columns)
+    rows: List[List[Any]] = []
+    async for doc in cursor:
+        row = flatten_response(doc)
+        rows.append([row.get(c) for c in columns])
+        if len(rows) >= CHUNK_ROWS:
+            await asyncio.to_thread(_append_rows, ws, rows)
+            rows = []
+    if rows:
+        await asyncio.to_thread(_append_rows, ws, rows)
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        await asyncio.to_thread(wb.save, path)
+        with open(path, "rb") as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, 1 << 20)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.unlink(path)
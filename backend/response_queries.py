@@ -0,0 +1,104 @@
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+# Every list query sorts on (created_at, _id) descending. Keys follow
+# equality, sort, range: equality-filtered fields lead their index, and the
+# score range comes after the sort keys so score-filtered pages are still
+# read in index order instead of being sorted in memory. Unfiltered pages
+# use the (created_at, _id) prefix of the score index.
+RESPONSE_INDEXES: List[Tuple[str, List[Tuple[str, int]]]] = [
+    ("created_at_id_score", [("created_at", -1), ("_id", -1), ("results.score", 1)]),
+    ("questionnaire_created_at", [("questionnaire_id", 1), ("created_at", -1), ("_id", -1)]),
+    ("user_email_created_at", [("user_email", 1), ("created_at", -1), ("_id", -1)]),
+]
+# Indexes created by earlier versions, dropped on startup
+RETIRED_INDEXES = ("score_created_at", "created_at_id")
+
+SUMMARY_PROJECTION = {
+    "created_at": 1,
+    "questionnaire_id": 1,
+    "questionnaire_hash": 1,
+    "user_email": 1,
+    "results.score": 1,
+    "results.maturity_results.tier1": 1,
+    "results.maturity_results.tier2": 1,
+    # compact-format results (expanded before summarizing)
+    "results.format": 1,
+    "results.dictionary": 1,
+    "results.questionnaire_id": 1,
+    "results.tier1": 1,
+    "results.tier2": 1,
+}
+
+SORT = [("created_at", -1), ("_id", -1)]
+
+
+async def ensure_indexes(collection):
+    for name, keys in RESPONSE_INDEXES:
+        await collection.create_index(keys, name=name, background=True)
+    existing = await collection.index_information()
+    for name in RETIRED_INDEXES:
+        if name in existing:
+            await collection.drop_index(name)
+
+
+def encode_cursor(doc: Dict[str, Any]) -> str:
+    raw = json.dumps([doc.get("created_at"), str(doc["_id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    from bson import ObjectId
+
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, doc_id = json.loads(base64.urlsafe_b64decode(padded))
+        return created_at, ObjectId(doc_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def build_filter(
+    questionnaire_id: Optional[str] = None,
+    user_email: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    query: Dict[str, Any] = {}
+    if questionnaire_id:
+        query["questionnaire_id"] = questionnaire_id
+    if user_email:
+        query["user_email"] = user_email
+    if min_score is not None or max_score is not None:
+        score: Dict[str, float] = {}
+        if min_score is not None:
+            score["$gte"] = min_score
+        if max_score is not None:
+            score["$lte"] = max_score
+        query["results.score"] = score
+    if cursor:
+        created_at, doc_id = decode_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": doc_id}},
+        ]
+    return query
+
+
+def summarize(doc: Dict[str, Any]) -> Dict[str, Any]:
+    res = doc.get("results", {}) if isinstance(doc.get("results"), dict) else {}
+    maturity = res.get("maturity_results") or {}
+    return {
+        "id": str(doc.get("_id")) if doc.get("_id") else None,
+        "created_at": doc.get("created_at"),
+        "questionnaire_id": doc.get("questionnaire_id"),
+        "questionnaire_hash": doc.get("questionnaire_hash"),
+        "user_email": doc.get("user_email"),
+        "score": res.get("score"),
+        "tier1": maturity.get("tier1"),
+        "tier2": maturity.get("tier2"),
+    }
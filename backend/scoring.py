@@ -0,0 +1,301 @@
+import itertools
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+
+RECOMMENDATIONS: Dict[str, List[str]] = {
+    "AI Ready": [
+        "Advanced AI Implementation: Your organization shows strong AI readiness. Focus on scaling existing AI initiatives across departments by identifying high-impact use cases for expansion, establishing cross-functional AI teams, and implementing advanced analytics and machine learning models.",
+        "Innovation Leadership: Position your organization as an AI innovation leader in your industry by developing proprietary AI solutions that differentiate your business, creating partnerships with AI research institutions, and establishing an AI center of excellence.",
+        "Continuous Optimization: Maintain your competitive advantage through continuous AI improvement by implementing AI performance monitoring dashboards, establishing regular AI model retraining schedules, and creating feedback loops for continuous learning and adaptation."
+    ],
+    "Moderately Ready": [
+        "Strategic AI Planning: Develop a comprehensive AI strategy aligned with business objectives by conducting an AI readiness assessment across all departments, creating a 3-year AI roadmap with clear milestones, and establishing AI governance frameworks and ethical guidelines.",
+        "Skill Development: Invest in AI literacy and technical skills across your organization by implementing AI training programs for all employees, hiring or upskilling data scientists and AI specialists, and creating internal AI communities of practice for knowledge sharing.",
+        "Infrastructure Enhancement: Strengthen your data and technology infrastructure for AI implementation by auditing and upgrading data quality and accessibility systems, implementing cloud-based AI platforms and tools, and establishing robust data security and privacy protocols."
+    ],
+    "Developing Readiness": [
+        "Foundation Building: Establish the fundamental building blocks for AI adoption by creating a data inventory and quality assessment, implementing basic data management and governance policies, and identifying and prioritizing initial AI use cases with high business impact.",
+        "Leadership Alignment: Secure organizational commitment and resources for AI initiatives by educating senior leadership on AI opportunities and risks, establishing an AI steering committee with executive sponsorship, and allocating dedicated budget and resources for AI projects.",
+        "Pilot Project Implementation: Start with small-scale AI projects to build experience and confidence by selecting low-risk, high-visibility pilot projects, assembling cross-functional teams with clear roles and responsibilities, and establishing success metrics and regular progress reviews."
+    ],
+    "Not Ready": [
+        "Digital Foundation: Build essential digital capabilities before pursuing AI initiatives by implementing basic data collection and storage systems, digitizing key business processes and workflows, and establishing reliable IT infrastructure and cybersecurity measures.",
+        "Organizational Awareness: Create understanding and buy-in for digital transformation and AI by conducting AI awareness workshops for leadership and key stakeholders, developing a clear business case for AI investment, and creating a culture of data-driven decision making.",
+        "Capability Assessment: Understand your current state and requirements for AI readiness by performing a comprehensive digital maturity assessment, identifying skill gaps and training needs across the organization, and benchmarking against industry standards and best practices."
+    ],
+}
+
+
+def categorize(percentage_score: float) -> Tuple[str, List[str]]:
+    if percentage_score >= 80:
+        category = "AI Ready"
+    elif percentage_score >= 60:
+        category = "Moderately Ready"
+    elif percentage_score >= 40:
+        category = "Developing Readiness"
+    else:
+        category = "Not Ready"
+    return category, list(RECOMMENDATIONS[category])
+
+
+@dataclass(slots=True)
+class ScoredResult:
+    """One scored submission, built once by score_responses.
+
+    Instances are shared (result cache, response, stored document, email),
+    so treat them as read-only. The JSON body and the email HTML are
+    rendered at most once per instance.
+    """
+
+    questionnaire_id: str
+    score: float
+    category: str
+    recommendations: List[str]
+    detailed_results: Dict[str, Any]
+    maturity_results: Optional[Dict[str, Any]] = None
+    # Rank against stored submissions; set per response, never on cached instances
+    percentiles: Optional[Dict[str, Any]] = None
+    _json: Optional[bytes] = field(default=None, repr=False, compare=False)
+    email_html: Optional[str] = field(default=None, repr=False, compare=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict view; nested containers are shared, not copied."""
+        data = {
+            "questionnaire_id": self.questionnaire_id,
+            "score": self.score,
+            "category": self.category,
+            "recommendations": self.recommendations,
+            "detailed_results": self.detailed_results,
+            "maturity_results": self.maturity_results,
+        }
+        if self.percentiles is not None:
+            data["percentiles"] = self.percentiles
+        return data
+
+    def to_json(self) -> bytes:
+        if self._json is None:
+            self._json = json.dumps(
+                self.to_dict(), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+            ).encode("utf-8")
+        return self._json
+
+
+class CompiledQuestion(NamedTuple):
+    qid: str
+    text: str
+    weight: float
+    max_weighted_score: float
+    scores: Dict[Any, float]  # option value -> score (first option wins)
+    tier1: Optional[str]
+    tier2: Optional[str]
+    tier3: Optional[str]
+    theme: Optional[str]
+
+
+_plan_versions = itertools.count(1)
+
+
+class ScoringPlan:
+    """Everything calculate_assessment_score needs, derived once per questionnaire."""
+
+    __slots__ = ("source", "version", "questions", "positions", "tier2_targets", "tier1_targets")
+
+    def __init__(self, questionnaire: Dict[str, Any]):
+        self.source = questionnaire
+        # Unique per compiled questionnaire content; results cached against
+        # an older plan can never be served for a newer one
+        self.version = next(_plan_versions)
+        self.questions: List[CompiledQuestion] = []
+        # question id -> positions in questionnaire order (ids are normally unique)
+        self.positions: Dict[str, Tuple[int, ...]] = {}
+        for pos, question in enumerate(questionnaire.get("questions", [])):
+            scores: Dict[Any, float] = {}
+            for option in question["options"]:
+                scores.setdefault(option["value"], float(option["score"]))
+            weight = float(question.get("weight", 1.0))
+            self.questions.append(
+                CompiledQuestion(
+                    qid=question["id"],
+                    text=question["text"],
+                    weight=weight,
+                    max_weighted_score=max(
+                        (float(o["score"]) for o in question["options"]), default=0.0
+                    ) * weight,
+                    scores=scores,
+                    tier1=question.get("tier1"),
+                    tier2=question.get("tier2"),
+                    tier3=question.get("tier3"),
+                    theme=question.get("theme"),
+                )
+            )
+            self.positions[question["id"]] = self.positions.get(question["id"], ()) + (pos,)
+        targets = questionnaire.get("targets", {})
+        self.tier2_targets: Dict[str, float] = targets.get("tier2", {})
+        self.tier1_targets: Dict[str, float] = targets.get("tier1", {})
+
+    def answered(self, responses: Dict[str, Any]) -> List[CompiledQuestion]:
+        """Compiled questions that have a response, in questionnaire order."""
+        positions = self.positions
+        hits = sorted(
+            pos for qid in responses if qid in positions for pos in positions[qid]
+        )
+        return [self.questions[pos] for pos in hits]
+
+
+_plans: Dict[str, ScoringPlan] = {}
+
+
+def get_scoring_plan(questionnaire_id: str, questionnaire: Dict[str, Any]) -> ScoringPlan:
+    """Return the cached plan, recompiling when the questionnaire dict was replaced."""
+    plan = _plans.get(questionnaire_id)
+    if plan is None or plan.source is not questionnaire:
+        plan = ScoringPlan(questionnaire)
+        _plans[questionnaire_id] = plan
+    return plan
+
+
+def install_scoring_plans(plans: Dict[str, ScoringPlan]):
+    """Replace all cached plans at once (plans compiled ahead for a new snapshot)."""
+    global _plans
+    _plans = dict(plans)
+
+
+def install_scoring_plan(questionnaire_id: str, plan: ScoringPlan):
+    """Swap in one plan compiled ahead (e.g. off the event loop)."""
+    _plans[questionnaire_id] = plan
+
+
+def invalidate_scoring_plan(questionnaire_id: Optional[str] = None):
+    if questionnaire_id is None:
+        _plans.clear()
+    else:
+        _plans.pop(questionnaire_id, None)
+
+
+def _lookup(scores: Dict[Any, float], value: Any) -> Optional[float]:
+    try:
+        return scores.get(value)
+    except TypeError:  # unhashable answer (list/dict) never matches an option
+        return None
+
+
+def score_responses(
+    questionnaire_id: str,
+    plan: ScoringPlan,
+    responses: Dict[str, Any],
+    target_responses: Optional[Dict[str, Any]] = None,
+) -> ScoredResult:
+    """Score one submission against a compiled plan."""
+    total_score = 0.0
+    max_possible_score = 0.0
+    detailed_results: Dict[str, Any] = {}
+    tier3_scores: Dict[str, List[float]] = {}
+    tier3_target_scores: Dict[str, List[float]] = {}
+    # Ordered sets (dict keys) keep first-seen order without list scans
+    tier2_to_tier3: Dict[str, Dict[str, None]] = {}
+    tier1_to_tier2: Dict[str, Dict[str, None]] = {}
+
+    for q in plan.answered(responses):
+        response_value = responses[q.qid]
+        question_score = _lookup(q.scores, response_value) or 0.0
+        weighted_score = question_score * q.weight
+        total_score += weighted_score
+        max_possible_score += q.max_weighted_score
+
+        target_score = None
+        if target_responses and q.qid in target_responses:
+            target_score = _lookup(q.scores, target_responses[q.qid])
+
+        detailed_results[q.qid] = {
+            "question": q.text,
+            "response": response_value,
+            "score": question_score,
+            "weighted_score": weighted_score,
+            "tier1": q.tier1,
+            "tier2": q.tier2,
+            "tier3": q.tier3,
+            "theme": q.theme,
+            "target_score": target_score,
+        }
+
+        t1, t2, t3 = q.tier1, q.tier2, q.tier3
+        if t3:
+            tier3_scores.setdefault(t3, []).append(question_score)
+            if target_score:
+                tier3_target_scores.setdefault(t3, []).append(target_score)
+        if t1 and t2:
+            tier1_to_tier2.setdefault(t1, {})[t2] = None
+        if t2 and t3:
+            tier2_to_tier3.setdefault(t2, {})[t3] = None
+
+    percentage_score = (
+        (total_score / max_possible_score * 100.0) if max_possible_score > 0 else 0.0
+    )
+    category, recommendations = categorize(percentage_score)
+
+    tier2_results = []
+    tier2_scores: Dict[str, float] = {}
+    tier2_targets: Dict[str, float] = {}
+    for tier2_name, tier3_names in tier2_to_tier3.items():
+        all_scores: List[float] = []
+        all_targets: List[float] = []
+        for tier3_name in tier3_names:
+            all_scores.extend(tier3_scores.get(tier3_name, ()))
+            all_targets.extend(tier3_target_scores.get(tier3_name, ()))
+        current = sum(all_scores) / len(all_scores) if all_scores else 0.0
+        target = sum(all_targets) / len(all_targets) if all_targets else None
+        if target is None:
+            target = plan.tier2_targets.get(tier2_name)
+        tier2_results.append({
+            "name": tier2_name,
+            "current_maturity": current,
+            "target_maturity": target,
+            "gap": (target - current) if target is not None else None,
+        })
+        tier2_scores[tier2_name] = current
+        if target is not None:
+            tier2_targets[tier2_name] = target
+
+    tier1_results = []
+    for tier1_name, tier2_names in tier1_to_tier2.items():
+        currents = [tier2_scores[n] for n in tier2_names if n in tier2_scores]
+        targets = [tier2_targets[n] for n in tier2_names if n in tier2_targets]
+        current = sum(currents) / len(currents) if currents else 0.0
+        target = sum(targets) / len(targets) if targets else None
+        if target is None:
+            target = plan.tier1_targets.get(tier1_name)
+        tier1_results.append({
+            "name": tier1_name,
+            "current_maturity": current,
+            "target_maturity": target,
+            "gap": (target - current) if target is not None else None,
+        })
+
+    maturity_plot_data = [
+        {
+            "name": item["name"],
+            "current_maturity": item["current_maturity"],
+            "target_maturity": item["target_maturity"],
+        }
+        for item in tier1_results
+        if item["name"] and item["target_maturity"] is not None
+    ]
+
+    all_tier3 = [s for scores in tier3_scores.values() for s in scores]
+    return ScoredResult(
+        questionnaire_id=questionnaire_id,
+        score=percentage_score,
+        category=category,
+        recommendations=recommendations,
+        detailed_results=detailed_results,
+        maturity_results={
+            "tier1": tier1_results,
+            "tier2": tier2_results,
+            "maturity_plot": maturity_plot_data,
+            "overall_maturity": (
+                sum(all_tier3) / max(1, len(all_tier3)) if tier3_scores else 0.0
+            ),
+        },
+    )
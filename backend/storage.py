@@ -0,0 +1,243 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import quote, unquote
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; version bumps are then per-process only
+    fcntl = None
+
+_DELETE = object()
+VERSION_FILE = "VERSION"
+
+
+def _atomic_write(path: Path, data: bytes):
+    """Write via a temp file in the same directory and rename over the target."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with tmp_path.open("wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class QuestionnaireStore:
+    """One JSON file per questionnaire, written behind by a background thread.
+
+    schedule_save/schedule_delete only record the latest state per id and
+    return immediately; the writer thread waits `coalesce_delay` seconds so
+    bursts of edits to the same questionnaire collapse into one write. Every
+    write is temp-file-and-rename, so a crash leaves either the old or the new
+    file, never a truncated one.
+
+    A legacy single questionnaires.json is migrated into the per-file
+    directory the first time it is loaded.
+
+    Every batch of writes bumps an integer in the directory's VERSION file
+    under an flock, so other worker processes can detect changes with a
+    single stat() and reload.
+    """
+
+    def __init__(self, directory: Path, legacy_file: Optional[Path] = None, coalesce_delay: float = 0.2):
+        self.directory = directory
+        self.legacy_file = legacy_file
+        self.coalesce_delay = coalesce_delay
+        self._pending: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._writing = False
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.writes = 0
+        self.coalesced = 0
+        self.errors = 0
+        self._version_stat = None
+        self._version = 0
+
+    def _path(self, questionnaire_id: str) -> Path:
+        return self.directory / f"{quote(questionnaire_id, safe='')}.json"
+
+    @contextmanager
+    def _version_lock(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with (self.directory / ".lock").open("a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def read_version(self) -> int:
+        """Current on-disk version; only re-reads the file when its stat changes."""
+        try:
+            st = os.stat(self.directory / VERSION_FILE)
+        except FileNotFoundError:
+            return 0
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if key != self._version_stat:
+            try:
+                self._version = int((self.directory / VERSION_FILE).read_text() or 0)
+            except (OSError, ValueError):
+                return self._version
+            self._version_stat = key
+        return self._version
+
+    def _bump_version(self) -> int:
+        with self._version_lock():
+            path = self.directory / VERSION_FILE
+            try:
+                current = int(path.read_text() or 0)
+            except (OSError, ValueError):
+                current = 0
+            _atomic_write(path, str(current + 1).encode("ascii"))
+            return current + 1
+
+    def overlay_pending(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply edits scheduled in this process but not yet written to `data`."""
+        with self._lock:
+            pending = dict(self._pending)
+        for questionnaire_id, state in pending.items():
+            if state is _DELETE:
+                data.pop(questionnaire_id, None)
+            else:
+                data[questionnaire_id] = state
+        return data
+
+    def load_all(self) -> Dict[str, Any]:
+        if self.directory.is_dir():
+            data: Dict[str, Any] = {}
+            for path in sorted(self.directory.glob("*.json")):
+                try:
+                    with path.open("r", encoding="utf-8") as f:
+                        data[unquote(path.stem)] = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"Skipping unreadable questionnaire file {path.name}: {e}")
+            return data
+        if self.legacy_file is not None and self.legacy_file.exists():
+            with self.legacy_file.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            # Migrate once so later per-questionnaire writes see the full set
+            self.save_all(data)
+            return data
+        return {}
+
+    def _write(self, questionnaire_id: str, questionnaire: Any):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(questionnaire_id)
+        if questionnaire is _DELETE:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            return
+        body = json.dumps(questionnaire, ensure_ascii=False, separators=(",", ":"))
+        _atomic_write(path, body.encode("utf-8"))
+
+    def save_all(self, questionnaires: Dict[str, Any]):
+        """Synchronously replace the stored set (used at startup, off the request path)."""
+        self.flush(timeout=10.0)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for path in self.directory.glob("*.json"):
+            if unquote(path.stem) not in questionnaires:
+                path.unlink()
+        for questionnaire_id, questionnaire in questionnaires.items():
+            self._write(questionnaire_id, questionnaire)
+            self.writes += 1
+        self._bump_version()
+
+    def schedule_save(self, questionnaire_id: str, questionnaire: Dict[str, Any]):
+        self._schedule(questionnaire_id, questionnaire)
+
+    def schedule_delete(self, questionnaire_id: str):
+        self._schedule(questionnaire_id, _DELETE)
+
+    def _schedule(self, questionnaire_id: str, state: Any):
+        with self._lock:
+            if questionnaire_id in self._pending:
+                self.coalesced += 1
+            self._pending[questionnaire_id] = state
+            self._ensure_thread()
+            self._wake.notify_all()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name="questionnaire-store", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._pending and not self._stopping:
+                    self._wake.wait()
+                if self._stopping and not self._pending:
+                    return
+            time.sleep(self.coalesce_delay if not self._stopping else 0)
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._writing = True
+            failed: Dict[str, Any] = {}
+            for questionnaire_id, state in batch.items():
+                try:
+                    self._write(questionnaire_id, state)
+                    self.writes += 1
+                except Exception as e:
+                    self.errors += 1
+                    failed[questionnaire_id] = state
+                    print(f"Failed to persist questionnaire {questionnaire_id}: {e}")
+            if len(failed) < len(batch):
+                try:
+                    self._bump_version()
+                except Exception as e:
+                    print(f"Failed to bump questionnaire version: {e}")
+            with self._lock:
+                # Retry failures unless a newer state arrived meanwhile
+                for questionnaire_id, state in failed.items():
+                    self._pending.setdefault(questionnaire_id, state)
+                self._writing = False
+                self._wake.notify_all()
+            if failed:
+                time.sleep(1.0)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until all scheduled writes are on disk; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._pending or self._writing:
+                if self._thread is None or not self._thread.is_alive():
+                    self._ensure_thread()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._wake.wait(remaining)
+        return True
+
+    def stop(self, timeout: float = 10.0):
+        self.flush(timeout)
+        with self._lock:
+            self._stopping = True
+            self._wake.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "version": self.read_version(),
+            "pending": pending,
+            "writes": self.writes,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+        }
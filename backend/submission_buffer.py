@@ -0,0 +1,260 @@
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; the spool is then safe for one process only
+    fcntl = None
+
+
+class SubmissionBuffer:
+    """Write-behind buffer for submission documents.
+
+    add() appends to an in-memory list and returns; a background task
+    flushes with insert_many once `batch_size` documents are waiting or
+    every `flush_interval` seconds. When `max_pending` documents are
+    waiting, add() blocks until a flush makes room. Batches that Mongo
+    cannot take are appended to a local NDJSON spool file (Extended JSON,
+    so ObjectIds survive). Until a replay of the spool succeeds, later
+    batches go straight to the spool instead of waiting out the driver's
+    server selection timeout each time.
+
+    All worker processes share the spool file. Appends and replays hold an
+    flock on a sidecar .lock file, so a replay never rewrites away lines
+    another worker appended while it was inserting.
+    """
+
+    def __init__(
+        self,
+        collection,
+        spool_path: Path,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        max_pending: int = 5000,
+        replay_interval: float = 10.0,
+        on_flush: Optional[Callable[[int, float], None]] = None,
+    ):
+        self.collection = collection
+        self.spool_path = spool_path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_pending = max(self.batch_size, max_pending)
+        self.replay_interval = replay_interval
+        # Called with (batch size, seconds) after every insert_many
+        self.on_flush = on_flush
+        self._pending: List[Dict[str, Any]] = []
+        self._space: Optional[asyncio.Condition] = None
+        self._flush_now: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._spool_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_replay = 0.0
+        self._mongo_down = False
+        self.counters: Dict[str, float] = {
+            "submitted": 0,
+            "inserted": 0,
+            "flushes": 0,
+            "last_flush_size": 0,
+            "max_flush_size": 0,
+            "flush_seconds_total": 0.0,
+            "flush_seconds_max": 0.0,
+            "backpressure_waits": 0,
+            "spooled": 0,
+            "replayed": 0,
+            "rejected": 0,
+            "spool_depth": 0,
+        }
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._space = asyncio.Condition()
+        self._flush_now = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._spool_lock = asyncio.Lock()
+        self.counters["spool_depth"] = await asyncio.to_thread(self._count_spool)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        # Whatever Mongo does not take now stays in the spool for next start
+        await self.flush()
+
+    async def add(self, doc: Dict[str, Any]):
+        if self._task is None:
+            await self.start()
+        async with self._space:
+            while len(self._pending) >= self.max_pending:
+                self.counters["backpressure_waits"] += 1
+                self._flush_now.set()
+                await self._space.wait()
+            self._pending.append(doc)
+            self.counters["submitted"] += 1
+            if len(self._pending) >= self.batch_size:
+                self._flush_now.set()
+
+    def stats(self) -> Dict[str, Any]:
+        flushes = self.counters["flushes"]
+        return {
+            **self.counters,
+            "pending": len(self._pending),
+            "spooling": self._mongo_down,
+            "flush_seconds_avg": (self.counters["flush_seconds_total"] / flushes) if flushes else 0.0,
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            try:
+                await self.flush()
+                if (
+                    self.counters["spool_depth"]
+                    and time.monotonic() - self._last_replay >= self.replay_interval
+                ):
+                    await self.replay_spool()
+            except Exception as e:
+                print(f"Submission flush failed: {e}")
+
+    async def flush(self):
+        if self._flush_lock is None:
+            # Not started: add() starts the buffer, so nothing can be pending
+            return
+        async with self._flush_lock:
+            while self._pending:
+                batch = self._pending[: self.batch_size]
+                del self._pending[: self.batch_size]
+                async with self._space:
+                    self._space.notify_all()
+                if self._mongo_down or not await self._insert(batch):
+                    self._mongo_down = True
+                    await self._spool(batch)
+
+    async def _insert(self, batch: List[Dict[str, Any]]) -> bool:
+        """insert_many the batch; False means Mongo is unavailable and it should be spooled."""
+        from pymongo.errors import BulkWriteError
+
+        started = time.perf_counter()
+        try:
+            await self.collection.insert_many(batch, ordered=False)
+            inserted = len(batch)
+        except BulkWriteError as e:
+            # Per-document errors will not go away on retry; duplicates mean
+            # an earlier attempt already landed
+            errors = e.details.get("writeErrors", [])
+            rejected = [err for err in errors if err.get("code") != 11000]
+            self.counters["rejected"] += len(rejected)
+            for err in rejected:
+                print(f"Rejected submission document: {err.get('errmsg')}")
+            inserted = len(batch) - len(errors)
+        except Exception as e:
+            print(f"Failed to save {len(batch)} responses, spooling: {e}")
+            return False
+        elapsed = time.perf_counter() - started
+        self.counters["inserted"] += inserted
+        self.counters["flushes"] += 1
+        self.counters["last_flush_size"] = len(batch)
+        self.counters["max_flush_size"] = max(self.counters["max_flush_size"], len(batch))
+        self.counters["flush_seconds_total"] += elapsed
+        self.counters["flush_seconds_max"] = max(self.counters["flush_seconds_max"], elapsed)
+        if self.on_flush is not None:
+            self.on_flush(len(batch), elapsed)
+        return True
+
+    def _lock_spool(self) -> int:
+        """Open and exclusively flock the spool's lock file (blocks; run in a thread)."""
+        self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.spool_path.with_suffix(".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        return fd
+
+    @staticmethod
+    def _unlock_spool(fd: int):
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def _count_spool(self) -> int:
+        try:
+            with self.spool_path.open("rb") as f:
+                return sum(1 for line in f if line.strip())
+        except FileNotFoundError:
+            return 0
+
+    def _append_spool(self, batch: List[Dict[str, Any]]):
+        from bson import json_util
+
+        self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.spool_path.open("a", encoding="utf-8") as f:
+            for doc in batch:
+                f.write(json_util.dumps(doc) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _read_spool(self) -> List[Dict[str, Any]]:
+        from bson import json_util
+
+        try:
+            with self.spool_path.open("r", encoding="utf-8") as f:
+                return [json_util.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+    def _rewrite_spool(self, docs: List[Dict[str, Any]]):
+        from bson import json_util
+
+        tmp_path = self.spool_path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            for doc in docs:
+                f.write(json_util.dumps(doc) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.spool_path)
+
+    def _append_and_count(self, batch: List[Dict[str, Any]]) -> int:
+        fd = self._lock_spool()
+        try:
+            self._append_spool(batch)
+            return self._count_spool()
+        finally:
+            self._unlock_spool(fd)
+
+    async def _spool(self, batch: List[Dict[str, Any]]):
+        async with self._spool_lock:
+            self.counters["spool_depth"] = await asyncio.to_thread(self._append_and_count, batch)
+            self.counters["spooled"] += len(batch)
+
+    async def replay_spool(self):
+        """Insert spooled documents; whatever still fails stays in the spool.
+
+        The file lock is held from the read to the rewrite, so other
+        workers' appends wait for the replay instead of being overwritten.
+        """
+        async with self._spool_lock:
+            self._last_replay = time.monotonic()
+            fd = await asyncio.to_thread(self._lock_spool)
+            try:
+                docs = await asyncio.to_thread(self._read_spool)
+                replayed = len(docs)
+                for start in range(0, len(docs), self.batch_size):
+                    if not await self._insert(docs[start : start + self.batch_size]):
+                        replayed = start
+                        break
+                await asyncio.to_thread(self._rewrite_spool, docs[replayed:])
+                self.counters["replayed"] += replayed
+                self.counters["spool_depth"] = await asyncio.to_thread(self._count_spool)
+            finally:
+                await asyncio.to_thread(self._unlock_spool, fd)
+            if replayed == len(docs):
+                self._mongo_down = False
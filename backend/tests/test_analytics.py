@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from analytics import TierRollups
+
+pytest.importorskip("mongomock_motor")
+
+OLD = "2026-01-01T09:00:00"
+
+
+def _response(created_at, score=50.0):
+    return {
+        "questionnaire_id": "q",
+        "created_at": created_at,
+        "results": {
+            "score": score,
+            "maturity_results": {
+                "overall_maturity": 2.0,
+                "tier1": [{"name": "Data", "current_maturity": 2.0, "gap": 1.0}],
+                "tier2": [],
+            },
+        },
+    }
+
+
+class _DuringScan:
+    """The responses collection, running `hook` once the rebuild starts reading it."""
+
+    def __init__(self, collection, hook):
+        self.collection = collection
+        self.hook = hook
+
+    def aggregate(self, pipeline):
+        rows = self.collection.aggregate(pipeline)
+
+        async def run():
+            if self.hook is not None:
+                hook, self.hook = self.hook, None
+                await hook()
+            async for row in rows:
+                yield row
+
+        return run()
+
+    def find(self, *args, **kwargs):
+        return self.collection.find(*args, **kwargs)
+
+
+async def _store(responses, rollups, doc):
+    await responses.insert_one(dict(doc))
+    rollups.record(doc)
+
+
+async def _count(rollups):
+    return (await rollups.query("q"))["count"]
+
+
+def test_rebuild_interleaved_with_other_workers():
+    from mongomock_motor import AsyncMongoMockClient
+
+    async def scenario():
+        db = AsyncMongoMockClient()["analytics_test"]
+        responses = db["responses"]
+        a, b, c = TierRollups(), TierRollups(), TierRollups()
+        a.collection = b.collection = c.collection = db["analytics_rollups"]
+        await a.ensure_indexes()
+        for worker in (a, b, c):
+            await worker._refresh_generation()
+
+        for _ in range(2):
+            await _store(responses, a, _response(OLD))
+        await a.flush()
+        # Stored before the rebuild but still pending in the other worker
+        for _ in range(2):
+            await _store(responses, b, _response(OLD))
+
+        async def submit_and_flush_mid_scan():
+            # Created after the watermark, flushed while the rebuild aggregates
+            await _store(responses, b, _response(datetime.utcnow().isoformat()))
+            await b.flush()
+
+        await a.rebuild(_DuringScan(responses, submit_and_flush_mid_scan))
+        assert await _count(a) == 5
+
+        # A worker that has not flushed since the rebuild records under the old generation
+        await _store(responses, c, _response(datetime.utcnow().isoformat()))
+        await c.flush()
+        assert await _count(a) == 6
+
+        await _store(responses, a, _response(datetime.utcnow().isoformat()))
+        await a.flush()
+        assert await _count(b) == 7
+        assert await responses.count_documents({}) == 7
+        assert not await a.collection.count_documents({"generation": 0})
+
+    asyncio.run(scenario())
+
+
+def test_rebuild_in_memory_skips_counted_pending():
+    async def scenario():
+        from mongomock_motor import AsyncMongoMockClient
+
+        # Rollups in process memory, responses still read from a collection
+        responses = AsyncMongoMockClient()["analytics_test"]["responses"]
+        rollups = TierRollups()
+        for i in range(3):
+            await _store(responses, rollups, _response(OLD, score=10.0 * i))
+        # Nothing flushed yet: the rebuild counts all three itself
+        await rollups.rebuild(responses)
+        await rollups.flush()
+        assert await _count(rollups) == 3
+        await _store(responses, rollups, _response(datetime.utcnow().isoformat()))
+        await rollups.flush()
+        assert await _count(rollups) == 4
+
+    asyncio.run(scenario())
@@ -0,0 +1,144 @@
+import asyncio
+import socket
+from email.message import EmailMessage
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from mailer import EmailDispatcher
+
+
+class Handler:
+    """Accepts messages, answering 451 to the first `fail_first` DATA commands."""
+
+    def __init__(self, fail_first: int = 0):
+        self.fail_first = fail_first
+        self.attempts = 0
+        self.received = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.attempts += 1
+        if self.attempts <= self.fail_first:
+            return "451 Try again later"
+        self.received.append(envelope.content)
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp():
+    handlers = []
+
+    def start(handler: Handler, port: int = 0) -> Controller:
+        controller = Controller(handler, hostname="127.0.0.1", port=port or _free_port())
+        controller.start()
+        handlers.append(controller)
+        return controller
+
+    yield start
+    for controller in handlers:
+        try:
+            controller.stop()
+        except Exception:
+            pass
+
+
+def _message(i: int = 0) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "noreply@example.com"
+    msg["To"] = f"user{i}@example.com"
+    msg["Subject"] = "Results"
+    msg.set_content("body")
+    return msg
+
+
+def _dispatcher(controller: Controller, **kwargs) -> EmailDispatcher:
+    return EmailDispatcher(
+        host=controller.hostname,
+        port=controller.port,
+        use_tls=False,
+        pool_size=1,
+        retry_backoff=0.01,
+        **kwargs,
+    )
+
+
+def _send(dispatcher: EmailDispatcher, count: int):
+    async def run():
+        await dispatcher.start()
+        for i in range(count):
+            await dispatcher.enqueue(_message(i))
+        await dispatcher.stop()
+
+    asyncio.run(run())
+
+
+def test_connection_is_reused(smtp):
+    handler = Handler()
+    dispatcher = _dispatcher(smtp(handler))
+    _send(dispatcher, 3)
+    assert len(handler.received) == 3
+    assert dispatcher.counters["sent"] == 3
+    assert dispatcher.counters["connections_opened"] == 1
+
+
+def test_retries_with_backoff(smtp):
+    handler = Handler(fail_first=2)
+    dispatcher = _dispatcher(smtp(handler), max_retries=3)
+    _send(dispatcher, 1)
+    assert len(handler.received) == 1
+    assert dispatcher.counters["sent"] == 1
+    assert dispatcher.counters["retried"] == 2
+    assert dispatcher.counters["backoff_seconds_total"] == pytest.approx(0.01 + 0.02)
+    assert dispatcher.counters["failed"] == 0
+
+
+def test_gives_up_after_max_retries(smtp):
+    handler = Handler(fail_first=100)
+    dispatcher = _dispatcher(smtp(handler), max_retries=2)
+    _send(dispatcher, 1)
+    assert handler.attempts == 3
+    assert dispatcher.counters["retried"] == 2
+    assert dispatcher.counters["failed"] == 1
+    assert dispatcher.counters["sent"] == 0
+
+
+def test_reconnects_after_server_restart(smtp):
+    handler = Handler()
+    controller = smtp(handler)
+    dispatcher = _dispatcher(controller)
+
+    async def run():
+        await dispatcher.start()
+        await dispatcher.enqueue(_message(0))
+        await dispatcher._queue.join()
+        controller.stop()
+        smtp(handler, port=controller.port)
+        await dispatcher.enqueue(_message(1))
+        await dispatcher.stop()
+
+    asyncio.run(run())
+    assert len(handler.received) == 2
+    assert dispatcher.counters["connections_opened"] == 2
+    # The dropped connection is replaced in place, not retried later
+    assert dispatcher.counters["retried"] == 0
+
+
+def test_enqueue_after_stop_does_not_restart(smtp):
+    handler = Handler()
+    dispatcher = _dispatcher(smtp(handler))
+
+    async def run():
+        await dispatcher.start()
+        await dispatcher.stop()
+        await dispatcher.enqueue(_message())
+
+    asyncio.run(run())
+    assert dispatcher.stats()["workers"] == 0
+    assert dispatcher.counters["failed"] == 1
+    assert handler.received == []
@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+pytest.importorskip("mongomock_motor")
+
+# The MONGODB_URL branch of the command line, with motor's client swapped for
+# an in-memory one that already holds the responses
+CLI_AGAINST_DATABASE = """
+import asyncio, json
+from unittest import mock
+from mongomock_motor import AsyncMongoMockClient
+import main, rescoring
+
+client = AsyncMongoMockClient()
+responses = client["rescore_test"]["responses"]
+main.load_questionnaires()
+asyncio.run(rescoring._seed(responses, 50))
+with mock.patch("motor.motor_asyncio.AsyncIOMotorClient", lambda url, **kwargs: client):
+    code = rescoring.main_cli(["--batch-size", "20"])
+docs = asyncio.run(responses.find({}, {"rescored_at": 1}).to_list(length=None))
+print(json.dumps({"code": code, "total": len(docs), "rescored": sum("rescored_at" in d for d in docs)}))
+"""
+
+
+def test_cli_rescores_against_database():
+    env = {**os.environ, "MONGODB_URL": "mongodb://rescore-test", "MONGODB_DB": "rescore_test"}
+    out = subprocess.run(
+        [sys.executable, "-c", CLI_AGAINST_DATABASE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    assert out.returncode == 0, out.stdout + out.stderr
+    report = json.loads(out.stdout.strip().splitlines()[-1])
+    assert report == {"code": 0, "total": 50, "rescored": 50}
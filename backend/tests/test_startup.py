@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+HEAVY_MODULES = ("pandas", "openpyxl", "motor")
+
+
+def _run(code: str) -> dict:
+    """Run `code` in a fresh interpreter and parse the JSON it prints last."""
+    env = {k: v for k, v in os.environ.items() if k not in ("MONGODB_URL", "MONGO_URL")}
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+        check=True,
+    )
+    # The app prints progress; the report is the last line
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_import_skips_heavy_modules():
+    loaded = _run(
+        "import json, sys, main; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    assert loaded == []
+
+
+def test_lifespan_within_budget():
+    report = _run(
+        "import json, main\n"
+        "from fastapi.testclient import TestClient\n"
+        "with TestClient(main.app) as client:\n"
+        "    report = client.get('/debug/startup').json()\n"
+        "print(json.dumps(report))\n"
+    )
+    assert report["ready_seconds"] is not None
+    assert report["within_budget"], report
@@ -4,15 +4,18 @@ import axios from 'axios'
 const API_BASE_URL = 'http://localhost:8000'
 
 export const useAdminStore = defineStore('admin', {
-  state: () => ({ responses: [], loading: false, error: null, adminKey: localStorage.getItem('adminKey') || '' }),
+  state: () => ({ responses: [], nextCursor: null, loading: false, error: null, adminKey: localStorage.getItem('adminKey') || '' }),
   actions: {
     setAdminKey(key) { this.adminKey = key; localStorage.setItem('adminKey', key) },
-    async fetchResponses({ limit = 50, skip = 0 } = {}) {
+    async fetchResponses({ limit = 50, cursor = null, ...filters } = {}) {
       if (!this.adminKey) { this.error = 'Admin key required'; return [] }
       this.loading = true; this.error = null
       try {
-        const response = await axios.get(`${API_BASE_URL}/admin/responses`, { headers: { 'X-Admin-Key': this.adminKey }, params: { limit, skip } })
-        this.responses = response.data.responses || []
+        const response = await axios.get(`${API_BASE_URL}/admin/responses`, { headers: { 'X-Admin-Key': this.adminKey }, params: { limit, ...(cursor ? { cursor } : {}), ...filters } })
+        const page = response.data.responses || []
+        // A cursor continues the current list; no cursor starts over
+        this.responses = cursor ? [...this.responses, ...page] : page
+        this.nextCursor = response.data.next_cursor || null
         return this.responses
       } catch (error) {
         this.error = error.response?.data?.detail || error.message
@@ -26,6 +26,25 @@ export const useQuestionnaireStore = defineStore('questionnaire', {
         this.error = error.message; console.error('Error fetching questionnaire:', error); throw error
       } finally { this.loading = false }
     },
+    async createDraft(questionnaireId) {
+      const response = await axios.post(`${API_BASE_URL}/drafts`, { questionnaire_id: questionnaireId })
+      return response.data
+    },
+    async fetchDraft(draftId) {
+      const response = await axios.get(`${API_BASE_URL}/drafts/${draftId}`)
+      return response.data
+    },
+    openLivePreview(draftId, onScore) {
+      const socket = new WebSocket(`${API_BASE_URL.replace(/^http/, 'ws')}/drafts/${draftId}/live`)
+      socket.onmessage = (event) => {
+        const message = JSON.parse(event.data)
+        if (message.type === 'score') onScore(message)
+      }
+      return socket
+    },
+    async deleteDraft(draftId) {
+      await axios.delete(`${API_BASE_URL}/drafts/${draftId}`)
+    },
     async submitAssessment(assessmentData) {
       this.loading = true; this.error = null
       try {